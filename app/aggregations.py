@@ -0,0 +1,293 @@
+"""Agregações de transações usadas pelo dashboard e pela API de resumo.
+
+Cada quebra (categoria, campo, igreja, mês) é calculada com um único
+GROUP BY que soma entradas e saídas via `Sum(..., filter=Q(type=...))`, em
+vez de duas queries `aggregate(Sum('value'))` por item de cada dimensão.
+
+No PostgreSQL (com `SUMMARY_GROUPING_SETS` ativo) os totais e todas as
+quebras saem de uma única query com `GROUPING SETS`, ou seja, uma única
+varredura do conjunto filtrado; nos demais backends (ex.: SQLite em dev)
+cai para um GROUP BY por dimensão.
+
+As mesmas funções aceitam querysets de `TransactionMonthlyRollup` (mesmos
+nomes de campos que `Transaction`): a soma passa a ser de `total` e a
+quantidade de `count`, o que permite responder períodos de meses inteiros
+sem varrer as transações. `breakdowns`, `split_by` e `build_summary` também
+aceitam uma lista de querysets disjuntos (ex.: rollup para os meses inteiros
+e transações para os dias das pontas do período) e somam os resultados.
+"""
+from datetime import date, datetime
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Count, F, Q, Sum, Value
+from django.db.models.functions import TruncMonth
+
+from .models import TransactionMonthlyRollup
+
+
+MONTH_NAMES = [
+    'Janeiro', 'Fevereiro', 'Março', 'Abril', 'Maio', 'Junho',
+    'Julho', 'Agosto', 'Setembro', 'Outubro', 'Novembro', 'Dezembro'
+]
+
+# Expressões de agrupamento de cada dimensão
+DIMENSIONS = {
+    'category': lambda: F('category_id'),
+    'field': lambda: F('field_id'),
+    'church': lambda: F('church_id'),
+    'month': lambda: TruncMonth('date'),
+}
+
+
+def _is_rollup(queryset):
+    return queryset.model is TransactionMonthlyRollup
+
+
+def _value_field(queryset):
+    return 'total' if _is_rollup(queryset) else 'value'
+
+
+def _count(queryset):
+    return Sum('count') if _is_rollup(queryset) else Count('id')
+
+
+def _income(queryset):
+    return Sum(_value_field(queryset), filter=Q(type='income'))
+
+
+def _expense(queryset):
+    return Sum(_value_field(queryset), filter=Q(type='expense'))
+
+
+def _totals(count, income, expense):
+    income = income or 0
+    expense = expense or 0
+    return {
+        'total_transactions': count or 0,
+        'total_income': income,
+        'total_expense': expense,
+        'balance': income - expense,
+    }
+
+
+def totals(queryset):
+    """Quantidade, entradas, saídas e saldo do queryset em uma única query."""
+    data = queryset.order_by().aggregate(
+        count=_count(queryset),
+        income=_income(queryset),
+        expense=_expense(queryset),
+    )
+    return _totals(data['count'], data['income'], data['expense'])
+
+
+def _parts(querysets):
+    return list(querysets) if isinstance(querysets, (list, tuple)) else [querysets]
+
+
+def _merge_split(target, split):
+    for key, (income, expense) in split.items():
+        current_income, current_expense = target.get(key, (0, 0))
+        target[key] = (current_income + income, current_expense + expense)
+    return target
+
+
+def split_by(querysets, dimension):
+    """Retorna {chave: (entradas, saídas)} agrupando pela dimensão informada."""
+    parts = _parts(querysets)
+    if len(parts) > 1:
+        result = {}
+        for queryset in parts:
+            _merge_split(result, split_by(queryset, dimension))
+        return result
+    queryset = parts[0]
+    rows = queryset.order_by().values(key=DIMENSIONS[dimension]()).annotate(
+        income=_income(queryset),
+        expense=_expense(queryset),
+    )
+    return {
+        row['key']: (row['income'] or 0, row['expense'] or 0)
+        for row in rows
+    }
+
+
+# Expressões SQL de cada dimensão sobre a subquery `t` de `_grouping_sets`
+GROUPING_SETS_COLUMNS = {
+    'category': 't.g_category',
+    'field': 't.g_field',
+    'church': 't.g_church',
+    'month': "CAST(DATE_TRUNC('month', t.g_date) AS date)",
+}
+
+
+def grouping_sets_enabled(using='default'):
+    """Indica se o backend de GROUPING SETS pode ser usado na conexão."""
+    return (
+        getattr(settings, 'SUMMARY_GROUPING_SETS', True)
+        and connections[using].vendor == 'postgresql'
+    )
+
+
+def _grouping_sets(queryset, dimensions):
+    """Totais e quebras em uma única query `GROUP BY GROUPING SETS`.
+
+    O queryset filtrado vira uma subquery (mantendo escopo, filtros e
+    DISTINCT) e cada conjunto de agrupamento é identificado pela máscara
+    de `GROUPING(...)`: o bit de uma dimensão é 0 quando ela está agrupada.
+    """
+    rollup = _is_rollup(queryset)
+    inner = queryset.order_by().values(
+        g_id=F('id'),
+        g_type=F('type'),
+        g_value=F(_value_field(queryset)),
+        g_count=F('count') if rollup else Value(1),
+        g_category=F('category_id'),
+        g_field=F('field_id'),
+        g_church=F('church_id'),
+        g_date=F('date'),
+    )
+    inner_sql, params = inner.query.sql_with_params()
+    columns = [GROUPING_SETS_COLUMNS[dimension] for dimension in dimensions]
+    sets = ', '.join(['()'] + [f'({column})' for column in columns])
+    sql = (
+        f"SELECT GROUPING({', '.join(columns)}), {', '.join(columns)}, SUM(t.g_count), "
+        "SUM(t.g_value) FILTER (WHERE t.g_type = 'income'), "
+        "SUM(t.g_value) FILTER (WHERE t.g_type = 'expense') "
+        f"FROM ({inner_sql}) AS t GROUP BY GROUPING SETS ({sets})"
+    )
+
+    result = {dimension: {} for dimension in dimensions}
+    result['totals'] = _totals(0, 0, 0)
+    full_mask = (1 << len(dimensions)) - 1
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(sql, params)
+        for row in cursor.fetchall():
+            mask, keys = row[0], row[1:len(dimensions) + 1]
+            count, income, expense = row[len(dimensions) + 1:]
+            if mask == full_mask:
+                result['totals'] = _totals(count, income, expense)
+                continue
+            income, expense = income or 0, expense or 0
+            for position, dimension in enumerate(dimensions):
+                if not mask & (1 << (len(dimensions) - 1 - position)):
+                    key = keys[position]
+                    if isinstance(key, datetime):
+                        key = key.date()
+                    result[dimension][key] = (income, expense)
+    return result
+
+
+def breakdowns(querysets, dimensions):
+    """Retorna {'totals': ..., dimensão: {chave: (entradas, saídas)}, ...}."""
+    parts = _parts(querysets)
+    if len(parts) > 1:
+        result = {'totals': _totals(0, 0, 0), **{dimension: {} for dimension in dimensions}}
+        for queryset in parts:
+            data = breakdowns(queryset, dimensions)
+            result['totals'] = _totals(
+                result['totals']['total_transactions'] + data['totals']['total_transactions'],
+                result['totals']['total_income'] + data['totals']['total_income'],
+                result['totals']['total_expense'] + data['totals']['total_expense'],
+            )
+            for dimension in dimensions:
+                _merge_split(result[dimension], data[dimension])
+        return result
+    queryset = parts[0]
+    if dimensions and grouping_sets_enabled(queryset.db):
+        return _grouping_sets(queryset, list(dimensions))
+    result = {'totals': totals(queryset)}
+    for dimension in dimensions:
+        result[dimension] = split_by(queryset, dimension)
+    return result
+
+
+def month_range(start_date, end_date):
+    """Lista (ano, mês) de todos os meses entre as duas datas (inclusive)."""
+    months = []
+    year, month = start_date.year, start_date.month
+    while date(year, month, 1) <= end_date:
+        months.append((year, month))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+
+def categories_data(split, categories):
+    """Série por categoria, na ordem do queryset de categorias."""
+    data = []
+    for category in categories:
+        income, expense = split.get(category.id, (0, 0))
+        if income > 0 or expense > 0:
+            data.append({
+                'category': category.name,
+                'income': float(income),
+                'expense': float(expense),
+            })
+    return data
+
+
+def fields_data(split, fields):
+    """Série por campo, ordenada por nome."""
+    data = []
+    for field in fields:
+        income, expense = split.get(field.id, (0, 0))
+        if income > 0 or expense > 0:
+            data.append({
+                'name': field.name,
+                'income': float(income),
+                'expense': float(expense),
+            })
+    data.sort(key=lambda x: x['name'])
+    return data
+
+
+def churches_data(split, churches):
+    """Série por igreja (com o nome do campo), ordenada por nome."""
+    data = []
+    for church in churches.select_related('field'):
+        income, expense = split.get(church.id, (0, 0))
+        if income > 0 or expense > 0:
+            data.append({
+                'name': church.name,
+                'field': church.field.name if church.field else 'Sem Campo',
+                'income': float(income),
+                'expense': float(expense),
+            })
+    data.sort(key=lambda x: x['name'])
+    return data
+
+
+def monthly_data(split, start_date, end_date):
+    """Série mensal com todos os meses do intervalo (meses sem valores zerados)."""
+    data = []
+    for year, month in month_range(start_date, end_date):
+        income, expense = split.get(date(year, month, 1), (0, 0))
+        data.append({
+            'month': f"{MONTH_NAMES[month - 1]}/{year}",
+            'month_number': month,
+            'year': year,
+            'income': float(income),
+            'expense': float(expense),
+            'balance': float(income) - float(expense),
+        })
+    return data
+
+
+def build_summary(filtered, *, categories, fields, churches, monthly_start, monthly_end, monthly_qs=None):
+    """Monta totais e séries do dashboard a partir dos querysets já filtrados.
+
+    Sem `monthly_qs` a série mensal sai de `filtered` (que deve então estar
+    restrito a `monthly_start`..`monthly_end`) na mesma varredura das demais
+    quebras; com `monthly_qs` ela é calculada à parte sobre esse queryset.
+    """
+    dimensions = ['category', 'field', 'church']
+    if monthly_qs is None:
+        dimensions.append('month')
+    data = breakdowns(filtered, dimensions)
+    month_split = data['month'] if monthly_qs is None else split_by(monthly_qs, 'month')
+    return {
+        'totals': data['totals'],
+        'categories_data': categories_data(data['category'], categories),
+        'churches_data': fields_data(data['field'], fields),
+        'churches_individual_data': churches_data(data['church'], churches),
+        'monthly_data': monthly_data(month_split, monthly_start, monthly_end),
+    }
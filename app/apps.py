@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class AppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'app'
+
+    def ready(self):
+        # Registra os sinais do rollup mensal, do campo/pastor desnormalizados,
+        # da invalidação dos caches do dashboard e de escopos e da gravação
+        # do log de auditoria ao fim das requisições
+        from . import attribution, audit, dashboard_cache, rollups, scopes  # noqa: F401
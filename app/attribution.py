@@ -0,0 +1,87 @@
+"""Campo e pastor desnormalizados nas transações.
+
+`Transaction.field` (e `TransactionMonthlyRollup.field`) copia o campo atual
+da igreja, de modo que filtros e quebras por campo são feitos na própria
+tabela, sem join com `app_church`. `Transaction.shepherd_at_time` guarda o
+pastor da igreja na data da transação segundo o `ShepherdHistory` (ou o
+pastor da igreja quando o histórico não cobre a data), sem junções por
+intervalo de datas nas consultas.
+
+`Transaction.save()` preenche os dois campos; os sinais abaixo os mantêm
+quando uma igreja muda de campo ou de pastor e quando o histórico de
+pastores é alterado. `reconcile` recalcula e corrige divergências (comando
+`reconcile_transaction_attribution`).
+"""
+from django.db.models import F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .models import Church, ShepherdHistory, Transaction, TransactionMonthlyRollup
+
+
+def church_field():
+    """Subquery com o campo atual da igreja da linha externa."""
+    return Subquery(Church.objects.filter(pk=OuterRef('church_id')).values('field_id')[:1])
+
+
+def shepherd_at_time():
+    """Subquery com o pastor da igreja na data da transação externa."""
+    history = ShepherdHistory.objects.filter(
+        Q(end_date__isnull=True) | Q(end_date__gte=OuterRef('date')),
+        church_id=OuterRef('church_id'),
+        start_date__lte=OuterRef('date'),
+    ).order_by('-start_date', '-id').values('shepherd_id')[:1]
+    current = Church.objects.filter(pk=OuterRef('church_id')).values('shepherd_id')[:1]
+    return Coalesce(Subquery(history), Subquery(current))
+
+
+def reconcile(church_ids=None):
+    """Corrige campo e pastor na data das transações (e o campo do rollup).
+
+    Com `church_ids` limita às igrejas dadas. Retorna
+    `(transações corrigidas, linhas do rollup corrigidas)`.
+    """
+    transactions = Transaction.objects.all()
+    rollups = TransactionMonthlyRollup.objects.all()
+    if church_ids is not None:
+        transactions = transactions.filter(church_id__in=church_ids)
+        rollups = rollups.filter(church_id__in=church_ids)
+
+    stale = transactions.alias(
+        expected_field=church_field(),
+        expected_shepherd=shepherd_at_time(),
+    ).exclude(field_id=F('expected_field'), shepherd_at_time_id=F('expected_shepherd'))
+    fixed = Transaction.objects.filter(pk__in=stale.values('pk')).update(
+        field_id=church_field(),
+        shepherd_at_time_id=shepherd_at_time(),
+    )
+    stale_rollups = rollups.alias(expected_field=church_field()).exclude(field_id=F('expected_field'))
+    fixed_rollups = TransactionMonthlyRollup.objects.filter(pk__in=stale_rollups.values('pk')).update(
+        field_id=church_field(),
+    )
+    return fixed, fixed_rollups
+
+
+@receiver(pre_save, sender=Church)
+def remember_previous_church_attribution(sender, instance, **kwargs):
+    instance._attribution_previous = None
+    if instance.pk:
+        instance._attribution_previous = (
+            Church.objects.filter(pk=instance.pk).values_list('field_id', 'shepherd_id').first()
+        )
+
+
+@receiver(post_save, sender=Church)
+def reconcile_on_church_change(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_attribution_previous', None)
+    instance._attribution_previous = None
+    # Igreja mudou de campo ou de pastor (o pastor atual cobre datas fora do histórico)
+    if previous and previous != (instance.field_id, instance.shepherd_id):
+        reconcile([instance.pk])
+
+
+@receiver(post_save, sender=ShepherdHistory)
+@receiver(post_delete, sender=ShepherdHistory)
+def reconcile_on_history_change(sender, instance, **kwargs):
+    reconcile([instance.church_id])
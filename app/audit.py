@@ -0,0 +1,160 @@
+"""Gravação em lote do log de auditoria (`AccessLog`).
+
+`log_action` não grava na hora: a entrada é montada na requisição e entra
+no buffer quando a transação do banco em que foi registrada é confirmada
+(entradas de transações desfeitas são descartadas). Em requisições
+(`AuditLogMiddleware`) o buffer é gravado com um único `bulk_create` depois
+que a resposta foi enviada (sinal `request_finished`), então a latência da
+requisição não inclui a gravação; operações em lote (ex.:
+`transaction_bulk_delete`) geram um único INSERT. Fora de requisições
+(comandos, shell) `buffer()` agrupa as entradas de um bloco; sem buffer
+cada entrada é gravada no commit.
+
+Com `AUDIT_LOG_QUEUE=True` o buffer vai para uma lista no Redis (um RPUSH)
+e o comando `drain_audit_log` grava a fila em lotes; se o Redis estiver
+indisponível, as entradas são gravadas direto no banco.
+"""
+import json
+import logging
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.signals import request_finished
+from django.db import close_old_connections, transaction as db_transaction
+from django.dispatch import receiver
+from django.utils.dateparse import parse_datetime
+from django_redis import get_redis_connection
+
+from .models import AccessLog, User
+
+
+logger = logging.getLogger(__name__)
+
+QUEUE_KEY = 'audit:queue'
+
+_state = threading.local()
+
+
+def make_entry(user, action, obj=None, description=''):
+    """Monta a entrada do log sem gravar (None para usuários sem log)."""
+    if user and (user.is_superuser or user.email == settings.SYSTEM_HIDDEN_EMAIL):
+        return None
+    entry = AccessLog(user=user, action=action, description=description)
+    if obj:
+        # get_for_model usa o cache de tipos de conteúdo do processo
+        entry.content_type = ContentType.objects.get_for_model(obj)
+        entry.object_id = obj.pk
+        if not description:
+            entry.description = f'{action} em {obj._meta.verbose_name}'
+    return entry
+
+
+def record(user, action, obj=None, description=''):
+    entry = make_entry(user, action, obj, description)
+    if entry is not None:
+        db_transaction.on_commit(lambda: _add(entry))
+
+
+def _add(entry):
+    pending = getattr(_state, 'pending', None)
+    if pending is None:
+        write([entry])
+    else:
+        pending.append(entry)
+
+
+def start():
+    """Abre o buffer da requisição (grava sobras de uma requisição anterior)."""
+    _flush()
+    _state.pending = []
+
+
+def _flush():
+    pending = getattr(_state, 'pending', None)
+    _state.pending = None
+    if pending:
+        write(pending)
+    return bool(pending)
+
+
+@receiver(request_finished)
+def _request_finished(sender, **kwargs):
+    if _flush():
+        # A conexão pode ter sido reaberta após o close_old_connections do Django
+        close_old_connections()
+
+
+@contextmanager
+def buffer():
+    """Acumula as entradas confirmadas no bloco e grava todas de uma vez ao sair.
+
+    Dentro de uma requisição (buffer já aberto) não tem efeito.
+    """
+    if getattr(_state, 'pending', None) is not None:
+        yield
+        return
+    _state.pending = []
+    try:
+        yield
+    finally:
+        _flush()
+
+
+def write(entries):
+    """Grava as entradas: na fila do Redis com `AUDIT_LOG_QUEUE`, senão com um `bulk_create`."""
+    if getattr(settings, 'AUDIT_LOG_QUEUE', False) and _push(entries):
+        return
+    try:
+        AccessLog.objects.bulk_create(entries)
+    except Exception as e:
+        logger.warning('Falha ao gravar log de auditoria: %s', e)
+
+
+def _serialize(entry):
+    return json.dumps({
+        'user_id': entry.user_id,
+        'action': entry.action,
+        'content_type_id': entry.content_type_id,
+        'object_id': entry.object_id,
+        'description': entry.description,
+        'created_at': entry.created_at.isoformat(),
+    })
+
+
+def _deserialize(item):
+    data = json.loads(item)
+    data['created_at'] = parse_datetime(data['created_at'])
+    return AccessLog(**data)
+
+
+def _push(entries):
+    try:
+        get_redis_connection('default').rpush(QUEUE_KEY, *[_serialize(entry) for entry in entries])
+    except Exception as e:
+        logger.warning('Fila do log de auditoria indisponível, gravando no banco: %s', e)
+        return False
+    return True
+
+
+def drain(batch_size=1000):
+    """Grava no banco um lote da fila do Redis. Retorna o número de entradas retiradas da fila."""
+    redis = get_redis_connection('default')
+    with redis.pipeline() as pipe:
+        # MULTI/EXEC: vários workers podem drenar a fila sem repetir entradas
+        pipe.lrange(QUEUE_KEY, 0, batch_size - 1)
+        pipe.ltrim(QUEUE_KEY, batch_size, -1)
+        items, _ = pipe.execute()
+    if not items:
+        return 0
+    entries = [_deserialize(item) for item in items]
+    # Usuários excluídos depois do registro travariam a fila com erro de FK
+    existing = set(User.objects.filter(pk__in={entry.user_id for entry in entries}).values_list('pk', flat=True))
+    try:
+        AccessLog.objects.bulk_create([entry for entry in entries if entry.user_id in existing])
+    except Exception:
+        # Devolve o lote ao início da fila, na ordem original
+        redis.lpush(QUEUE_KEY, *reversed(items))
+        raise
+    return len(items)
@@ -4,4 +4,5 @@ from django.conf import settings
 def global_settings(request):
     return {
         'whatsapp_group_url': settings.WHATSAPP_GROUP_URL,
+        'export_jobs': settings.EXPORT_JOBS,
     }
@@ -0,0 +1,123 @@
+"""Cache (Redis) dos resultados do dashboard e da API de resumo.
+
+A chave é o hash canônico de `TransactionFilter` (filtros normalizados +
+escopo de visibilidade; administradores compartilham o mesmo escopo). Cada valor guarda a
+"geração de dados" em que foi calculado; toda gravação em Transaction,
+Category, Church, Field, Shepherd, ShepherdHistory (pastor na data das
+exportações) e nos vínculos de usuários com campos
+incrementa a geração após o commit, então resultados antigos simplesmente
+deixam de ser servidos, sem deletes por padrão de chave. A leitura é um
+único MGET (geração + resultado).
+"""
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction as db_transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Category, Church, ClosedPeriod, Field, Shepherd, ShepherdHistory, Transaction, User
+
+
+logger = logging.getLogger(__name__)
+
+GENERATION_KEY = 'dashboard:generation'
+
+
+def make_key(namespace, transaction_filter, **extra):
+    return f'dashboard:{namespace}:{transaction_filter.scope}:{transaction_filter.hash(**extra)[:32]}'
+
+
+def _initial_generation():
+    # Valor baseado no relógio: se a chave for perdida, nenhum resultado antigo volta a casar
+    return time.time_ns()
+
+
+def get_or_compute(namespace, transaction_filter, compute, **extra):
+    """Retorna o resultado em cache para os filtros ou calcula e grava com `compute()`.
+
+    `extra` entra na chave junto com os filtros (parâmetros próprios da view);
+    `compute` deve retornar um valor serializável em JSON.
+    """
+    if not getattr(settings, 'DASHBOARD_CACHE', True):
+        return compute()
+    key = make_key(namespace, transaction_filter, **extra)
+    try:
+        values = cache.get_many([GENERATION_KEY, key])
+        generation = values.get(GENERATION_KEY)
+        if generation is None:
+            cache.add(GENERATION_KEY, _initial_generation(), timeout=None)
+            generation = cache.get(GENERATION_KEY)
+        entry = values.get(key)
+        if entry and entry.get('generation') == generation:
+            return entry['data']
+    except Exception as e:
+        # Redis indisponível: calcula sem cache
+        logger.warning('Cache do dashboard indisponível: %s', e)
+        return compute()
+    data = compute()
+    try:
+        cache.set(
+            key,
+            {'generation': generation, 'data': data},
+            timeout=getattr(settings, 'DASHBOARD_CACHE_TIMEOUT', 300),
+        )
+    except Exception as e:
+        logger.warning('Falha ao gravar cache do dashboard: %s', e)
+    return data
+
+
+def current_generation():
+    """Geração de dados atual (None com o Redis indisponível)."""
+    try:
+        generation = cache.get(GENERATION_KEY)
+        if generation is None:
+            cache.add(GENERATION_KEY, _initial_generation(), timeout=None)
+            generation = cache.get(GENERATION_KEY)
+        return generation
+    except Exception as e:
+        logger.warning('Cache do dashboard indisponível: %s', e)
+        return None
+
+
+def bump_generation():
+    """Invalida todos os resultados em cache incrementando a geração de dados."""
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        # Geração ainda não existe: qualquer valor novo invalida os resultados
+        cache.add(GENERATION_KEY, _initial_generation(), timeout=None)
+    except Exception as e:
+        logger.warning('Falha ao invalidar cache do dashboard: %s', e)
+
+
+def _schedule_bump(**kwargs):
+    # Após o commit: uma leitura concorrente não grava dados antigos com a nova geração
+    db_transaction.on_commit(bump_generation)
+
+
+for _model in (Transaction, Category, Church, Field, Shepherd, ShepherdHistory, ClosedPeriod):
+    post_save.connect(_schedule_bump, sender=_model, dispatch_uid=f'dashboard_cache_save_{_model.__name__}')
+    post_delete.connect(_schedule_bump, sender=_model, dispatch_uid=f'dashboard_cache_delete_{_model.__name__}')
+
+
+@receiver(m2m_changed, sender=User.fields.through)
+def bump_on_user_fields_change(sender, action, **kwargs):
+    # Vínculos de usuários com campos mudam a visibilidade de supervisores e tesoureiros
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        _schedule_bump()
+
+
+@receiver(post_save, sender=User)
+def bump_on_user_change(sender, instance, update_fields=None, **kwargs):
+    # Ignora a atualização de `last_login` feita a cada login
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    _schedule_bump()
+
+
+@receiver(post_delete, sender=User)
+def bump_on_user_delete(sender, instance, **kwargs):
+    _schedule_bump()
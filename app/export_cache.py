@@ -0,0 +1,127 @@
+"""Cache em disco (volume de mídia) dos arquivos de exportação.
+
+O nome do arquivo combina a geração de dados do `dashboard_cache` (muda
+após o commit de qualquer gravação que afete relatórios) com o hash
+canônico de `TransactionFilter` (filtros normalizados + escopo; os
+administradores compartilham o escopo) e o formato:
+`exports/cache/<geração>-<hash>.<formato>`. A mesma exportação repetida sem
+mudanças nos dados é servida pelo nginx (X-Accel-Redirect) sem gerar nada.
+
+Cada acerto atualiza o mtime do arquivo; ao gravar um arquivo novo,
+`prune` apaga os de gerações anteriores (nunca mais servidos) sem uso há
+mais de `STALE_GRACE` segundos — um arquivo recém-entregue ao nginx ainda
+pode estar para ser aberto — e, acima de `EXPORT_CACHE_MAX_MB`, os menos
+usados recentemente. Gerações posteriores à do processo (a geração mudou
+durante a exportação) nunca são apagadas por ele.
+"""
+import logging
+import os
+import time
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+
+from .dashboard_cache import current_generation
+
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = 'exports/cache'
+# Arquivos parciais mais antigos que isso são de gerações interrompidas
+PARTIAL_MAX_AGE = 3600
+# Arquivos de gerações anteriores usados há menos que isso (segundos) são mantidos
+STALE_GRACE = 300
+
+
+def _name(transaction_filter, format, generation, **extra):
+    return f'{CACHE_DIR}/{generation}-{transaction_filter.hash(export=format, **extra)[:32]}.{format}'
+
+
+def get_or_create(transaction_filter, format, write, **extra):
+    """Nome (relativo ao MEDIA_ROOT) do arquivo em cache para os filtros, gerado com `write(output)` se preciso.
+
+    `extra` entra na chave junto com os filtros. Retorna None com o cache
+    desativado ou sem a geração de dados (Redis indisponível): o chamador
+    gera o arquivo sem cache.
+    """
+    if not settings.EXPORT_CACHE:
+        return None
+    generation = current_generation()
+    if generation is None:
+        return None
+    name = _name(transaction_filter, format, generation, **extra)
+    path = default_storage.path(name)
+    try:
+        # Acerto: o mtime marca o uso recente (LRU)
+        os.utime(path)
+        return name
+    except FileNotFoundError:
+        pass
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    partial = f'{path}.{os.getpid()}.partial'
+    try:
+        with open(partial, 'wb') as output:
+            write(output)
+        os.replace(partial, path)
+    except BaseException:
+        if os.path.exists(partial):
+            os.remove(partial)
+        raise
+    prune(generation)
+    return name
+
+
+def prune(generation=None, max_bytes=None):
+    """Apaga arquivos de gerações anteriores a `generation` e, acima do limite, os de mtime mais antigo. Retorna (apagados, bytes restantes)."""
+    if max_bytes is None:
+        max_bytes = settings.EXPORT_CACHE_MAX_MB * 1024 * 1024
+    root = default_storage.path(CACHE_DIR)
+    now = time.time()
+    removed = 0
+    files = []
+    for entry in os.scandir(root) if os.path.isdir(root) else ():
+        try:
+            stat = entry.stat()
+        except FileNotFoundError:
+            continue
+        if entry.name.endswith('.partial'):
+            stale = now - stat.st_mtime > PARTIAL_MAX_AGE
+        else:
+            stale = (
+                generation is not None
+                and _generation(entry.name) < generation
+                and now - stat.st_mtime > STALE_GRACE
+            )
+        if stale:
+            removed += _remove(entry.path)
+        elif not entry.name.endswith('.partial'):
+            files.append((stat.st_mtime, stat.st_size, entry.path))
+
+    total = sum(size for _, size, _ in files)
+    for _, size, path in sorted(files):
+        if total <= max_bytes:
+            break
+        removed += _remove(path)
+        total -= size
+    return removed, total
+
+
+def _generation(name):
+    """Geração de um arquivo do cache pelo nome (`<geração>-<hash>.<formato>`); desconhecidos ficam para o limite de tamanho."""
+    try:
+        return int(name.split('-', 1)[0])
+    except ValueError:
+        return float('inf')
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+        return 1
+    except FileNotFoundError:
+        # Já apagado por outro processo
+        return 0
+    except OSError as e:
+        logger.warning('Falha ao apagar exportação em cache %s: %s', path, e)
+        return 0
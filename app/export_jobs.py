@@ -0,0 +1,140 @@
+"""Exportações de transações em segundo plano.
+
+A requisição só cria o `ExportJob` (filtros + formato) e responde com o
+ID; o processo `run_export_jobs` (serviço `worker`) pega os jobs da fila
+com `SELECT ... FOR UPDATE SKIP LOCKED`, gera o arquivo no volume de mídia
+(`exports/<usuário>/`) atualizando o progresso a cada bloco de linhas e o
+dono baixa o resultado por X-Accel-Redirect. Os workers do gunicorn ficam
+livres para o tráfego interativo.
+"""
+import logging
+import os
+import shutil
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction as db_transaction
+from django.http import QueryDict
+from django.utils import timezone
+
+from . import export_cache, exports, pdf_reports
+from .filters import TransactionFilter
+from .models import ExportJob
+
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = ('pending', 'running')
+
+
+class TooManyJobs(Exception):
+    pass
+
+
+def submit(user, format, query):
+    """Cria o job de exportação; `query` é a query string dos filtros da lista."""
+    active = ExportJob.objects.filter(user=user, status__in=ACTIVE_STATUSES).count()
+    if active >= settings.EXPORT_JOB_MAX_ACTIVE:
+        raise TooManyJobs(f'Aguarde a conclusão das suas {active} exportações em andamento.')
+    return ExportJob.objects.create(user=user, format=format, query=query, created_by=user, updated_by=user)
+
+
+def claim():
+    """Marca como em andamento e retorna o job mais antigo da fila (None se vazia)."""
+    with db_transaction.atomic():
+        job = (
+            ExportJob.objects.select_for_update(skip_locked=True)
+            .filter(status='pending')
+            .order_by('created_at')
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = 'running'
+        job.started_at = timezone.now()
+        job.save(update_fields=['status', 'started_at', 'updated_at'])
+    return job
+
+
+def _relative_path(job):
+    return f'exports/{job.user_id}/transacoes_{timezone.localtime(job.created_at):%d-%m-%Y}_{job.pk}.{job.format}'
+
+
+def _link(source, destination):
+    """Arquivo do job a partir do cache: hard link (mesmo volume, sem cópia) ou cópia."""
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copyfile(source, destination)
+
+
+def run(job):
+    """Gera o arquivo do job, registrando progresso, resultado ou erro."""
+    transaction_filter = TransactionFilter.from_get(job.user, QueryDict(job.query))
+    queryset = transaction_filter.queryset()
+    job.total_rows = queryset.count()
+    job.save(update_fields=['total_rows', 'updated_at'])
+
+    def progress(rows):
+        ExportJob.objects.filter(pk=job.pk).update(processed_rows=rows, updated_at=timezone.now())
+
+    # Mesma chave de cache que a exportação direta (agrupamento só no ZIP)
+    extra = {'report_by': QueryDict(job.query).get('report_by', 'field')} if job.format == 'zip' else {}
+
+    def write(output):
+        if job.format == 'pdf':
+            exports.write_pdf(transaction_filter, output, progress)
+        elif job.format == 'xlsx':
+            exports.write_xlsx(queryset, output, progress)
+        elif job.format == 'zip':
+            pdf_reports.write_zip(job.user, job.query, extra['report_by'], output, progress)
+        else:
+            for chunk in exports.csv_chunks(queryset, progress):
+                output.write(chunk)
+
+    name = _relative_path(job)
+    path = default_storage.path(name)
+    partial = f'{path}.partial'
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    try:
+        cached = export_cache.get_or_create(transaction_filter, job.format, write, **extra)
+        if cached:
+            _link(default_storage.path(cached), partial)
+        else:
+            with open(partial, 'wb') as output:
+                write(output)
+        os.replace(partial, path)
+    except Exception:
+        logger.exception('Falha na exportação %s', job.pk)
+        if os.path.exists(partial):
+            os.remove(partial)
+        job.status = 'failed'
+        job.error = 'Erro ao gerar a exportação. Tente novamente.'
+        job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'error', 'finished_at', 'updated_at'])
+        return job
+
+    job.status = 'done'
+    job.file.name = name
+    job.processed_rows = job.total_rows
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'file', 'processed_rows', 'finished_at', 'updated_at'])
+    return job
+
+
+def cleanup():
+    """Remove jobs (e arquivos) antigos e falha jobs interrompidos. Retorna (removidos, interrompidos)."""
+    now = timezone.now()
+    stale = ExportJob.objects.filter(
+        status='running', updated_at__lt=now - timedelta(minutes=settings.EXPORT_JOB_STALE_MINUTES)
+    ).update(status='failed', error='Exportação interrompida.', finished_at=now, updated_at=now)
+
+    expired = ExportJob.objects.filter(created_at__lt=now - timedelta(hours=settings.EXPORT_JOB_RETENTION_HOURS))
+    removed = 0
+    for job in expired.exclude(status__in=ACTIVE_STATUSES).iterator():
+        if job.file:
+            job.file.delete(save=False)
+        job.delete()
+        removed += 1
+    return removed, stale
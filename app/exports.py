@@ -0,0 +1,485 @@
+"""Exportação das transações filtradas (XLSX, CSV e PDF).
+
+As linhas vêm de `values_list` (tuplas, sem instâncias de modelo) lidas
+com cursor no servidor (`iterator(chunk_size=...)`). O XLSX é montado pelo
+openpyxl em modo somente escrita (as linhas vão direto para o XML
+temporário, sem manter células em memória) e salvo em um arquivo
+temporário que fica em memória até `SPOOL_MAX_SIZE` e depois passa para o
+disco; a resposta lê esse arquivo em blocos (`FileResponse`). O CSV é
+enviado enquanto é gerado (`StreamingHttpResponse`): o cabeçalho sai antes
+da primeira consulta e as linhas seguem em blocos de `CSV_BATCH_ROWS`.
+O PDF é montado pelo ReportLab (`write_pdf`) com as mesmas tuplas, em
+tabelas de `PDF_TABLE_ROWS` linhas entregues ao documento uma de cada vez.
+
+As funções `write_*` gravam em qualquer arquivo binário: a resposta HTTP
+(exportação direta) ou o arquivo em disco de uma exportação em segundo
+plano (`app/export_jobs.py`).
+"""
+import csv
+import functools
+import io
+import os
+import tempfile
+from xml.sax.saxutils import escape
+from datetime import date, datetime
+
+import openpyxl
+from django.conf import settings
+from django.http import FileResponse, StreamingHttpResponse
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Font, PatternFill
+from openpyxl.utils import get_column_letter
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER, TA_LEFT
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import inch
+from reportlab.lib.utils import simpleSplit
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.platypus import Image, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+from . import aggregations
+from .models import Category, Church, Field, Shepherd, User
+
+
+CHUNK_SIZE = 2000
+SPOOL_MAX_SIZE = 5 * 1024 * 1024
+CSV_BATCH_ROWS = 500
+
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+CSV_CONTENT_TYPE = 'text/csv; charset=utf-8'
+
+COLUMNS = [
+    "ID", "Data", "Categoria", "Tipo", "Valor", "Igreja",
+    "Campo", "Pastor", "Descrição", "Usuário", "Data de Criação"
+]
+COLUMN_WIDTHS = [8, 12, 20, 10, 15, 25, 20, 20, 30, 20, 20]
+
+# Pastor da igreja na data da transação (`Transaction.shepherd_at_time`), não o atual
+VALUES = (
+    'id', 'date', 'category__name', 'type', 'value', 'church__name', 'field__name',
+    'shepherd_at_time__name', 'desc', 'user__first_name', 'user__last_name', 'user__username', 'created_at',
+)
+
+PDF_COLUMNS = ['Data', 'Tipo', 'Categoria', 'Campo', 'Igreja', 'Descrição', 'Valor', 'Usuário', 'Pastor']
+PDF_COLUMN_WIDTHS = [0.7*inch, 0.5*inch, 0.8*inch, 0.8*inch, 1.0*inch, 1.2*inch, 0.7*inch, 0.8*inch, 0.8*inch]
+PDF_VALUES = (
+    'date', 'type', 'category__name', 'field__name', 'church__name', 'desc', 'value',
+    'user__first_name', 'user__last_name', 'shepherd_at_time__name',
+)
+# Linhas por tabela: o ReportLab mede e divide uma tabela a cada página, então
+# tabelas de ~2 páginas mantêm o custo linear (número par mantém a alternância de cores)
+PDF_TABLE_ROWS = 100
+PDF_FONT = 'Helvetica'
+PDF_FONT_SIZE = 7
+PDF_CELL_PADDING = 3
+# Largura útil de cada coluna: acima dela o texto precisa quebrar linha
+PDF_TEXT_WIDTHS = [width - 2 * PDF_CELL_PADDING for width in PDF_COLUMN_WIDTHS]
+
+# Estilos criados uma vez (e não a cada linha ou exportação)
+_pdf_styles = getSampleStyleSheet()
+PDF_TITLE_STYLE = ParagraphStyle(
+    'CustomTitle',
+    parent=_pdf_styles['Heading1'],
+    fontSize=18,
+    spaceAfter=20,
+    alignment=TA_CENTER,
+    textColor=colors.HexColor('#673ab7')
+)
+PDF_SUBTITLE_STYLE = ParagraphStyle(
+    'CustomSubtitle',
+    parent=_pdf_styles['Heading2'],
+    fontSize=10,
+    spaceAfter=8,
+    alignment=TA_LEFT,
+    textColor=colors.HexColor('#495057')
+)
+PDF_ICON_STYLE = ParagraphStyle(
+    'IconStyle',
+    parent=_pdf_styles['Normal'],
+    fontSize=40,
+    alignment=TA_CENTER,
+    textColor=colors.HexColor('#673ab7')
+)
+
+
+def _pdf_table_style(first_row):
+    """Estilo das tabelas de transações; `first_row` é a primeira linha de dados (1 se houver cabeçalho)."""
+    commands = [
+        ('FONTNAME', (0, first_row), (-1, -1), PDF_FONT),
+        ('FONTSIZE', (0, first_row), (-1, -1), PDF_FONT_SIZE),
+        ('LEADING', (0, first_row), (-1, -1), 9),
+        ('ALIGN', (0, first_row), (1, -1), 'CENTER'),
+        ('ALIGN', (6, first_row), (6, -1), 'RIGHT'),
+        ('ROWBACKGROUNDS', (0, first_row), (-1, -1), [colors.beige, colors.lightgrey]),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+        ('LEFTPADDING', (0, 0), (-1, -1), PDF_CELL_PADDING),
+        ('RIGHTPADDING', (0, 0), (-1, -1), PDF_CELL_PADDING),
+        ('TOPPADDING', (0, 0), (-1, -1), 2),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 2),
+    ]
+    if first_row:
+        commands += [
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#673ab7')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 8),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
+        ]
+    return TableStyle(commands)
+
+
+PDF_FIRST_TABLE_STYLE = _pdf_table_style(1)
+PDF_TABLE_STYLE = _pdf_table_style(0)
+
+
+def rows(queryset, chunk_size=CHUNK_SIZE, decimal_separator='.', progress=None):
+    """Linhas da exportação (mesma ordem de `COLUMNS`), já formatadas.
+
+    `progress(linhas)` é chamado a cada `chunk_size` linhas lidas.
+    """
+    values = queryset.values_list(*VALUES).iterator(chunk_size=chunk_size)
+    for count, (pk, day, category, type_, value, church, field, shepherd, desc,
+                first_name, last_name, username, created_at) in enumerate(values, 1):
+        if progress and count % chunk_size == 0:
+            progress(count)
+        yield [
+            pk,
+            day.strftime('%d/%m/%Y'),
+            category or '',
+            'Entrada' if type_ == 'income' else 'Saída',
+            f'{value:.2f}'.replace('.', decimal_separator),
+            church or '',
+            field or '',
+            shepherd or '',
+            desc or '',
+            f'{first_name} {last_name}'.strip() or username or '',
+            created_at.strftime('%d/%m/%Y %H:%M') if created_at else '',
+        ]
+
+
+def write_xlsx(queryset, output, progress=None):
+    """Grava o XLSX das transações em `output` (arquivo binário) em modo somente escrita."""
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet("Transações")
+    # Em modo somente escrita as larguras precisam ser definidas antes das linhas
+    for i, width in enumerate(COLUMN_WIDTHS, 1):
+        ws.column_dimensions[get_column_letter(i)].width = width
+
+    header_font = Font(bold=True, color="FFFFFF")
+    header_fill = PatternFill(start_color="673AB7", end_color="673AB7", fill_type="solid")
+    header_alignment = Alignment(horizontal="center")
+    header = []
+    for title in COLUMNS:
+        cell = WriteOnlyCell(ws, value=title)
+        cell.font = header_font
+        cell.fill = header_fill
+        cell.alignment = header_alignment
+        header.append(cell)
+    ws.append(header)
+
+    for row in rows(queryset, progress=progress):
+        ws.append(row)
+    wb.save(output)
+
+
+def filename(extension):
+    """Nome do arquivo baixado, com a data no formato brasileiro (dia-mês-ano)."""
+    return f"transacoes_{date.today():%d-%m-%Y}.{extension}"
+
+
+def xlsx_response(queryset):
+    """`FileResponse` com o XLSX das transações, lido de um arquivo temporário."""
+    output = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    try:
+        write_xlsx(queryset, output)
+    except BaseException:
+        output.close()
+        raise
+    output.seek(0)
+    return FileResponse(
+        output,
+        as_attachment=True,
+        filename=filename("xlsx"),
+        content_type=XLSX_CONTENT_TYPE,
+    )
+
+
+def csv_chunks(queryset, progress=None):
+    """CSV pt-BR das transações (`;`, vírgula decimal, BOM para o Excel), em blocos de bytes."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter=';')
+    buffer.write('\ufeff')
+    writer.writerow(COLUMNS)
+    yield buffer.getvalue().encode('utf-8')
+    buffer.seek(0)
+    buffer.truncate()
+    for i, row in enumerate(rows(queryset, decimal_separator=',', progress=progress), 1):
+        writer.writerow(row)
+        if i % CSV_BATCH_ROWS == 0:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+
+def csv_response(queryset):
+    """`StreamingHttpResponse` com o CSV das transações, gerado durante o envio."""
+    response = StreamingHttpResponse(csv_chunks(queryset), content_type=CSV_CONTENT_TYPE)
+    response["Content-Disposition"] = f'attachment; filename="{filename("csv")}"'
+    # Sem buffer no nginx: os blocos chegam ao cliente assim que gerados
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+class _PdfDocTemplate(SimpleDocTemplate):
+    """Documento que recebe as tabelas de um gerador.
+
+    Um marcador no fim da lista de flowables é trocado pela próxima tabela
+    só quando chega a vez dele (`filterFlowables`), depois que a anterior já
+    foi distribuída nas páginas: as linhas entram no documento aos poucos,
+    sem montar a tabela inteira antes do `build`.
+    """
+
+    def __init__(self, output, tables, **kwargs):
+        super().__init__(output, **kwargs)
+        self._tables = tables
+        self._next_table = Spacer(0, 0)
+
+    def build(self, flowables, **kwargs):
+        super().build([*flowables, self._next_table], **kwargs)
+
+    def filterFlowables(self, flowables):
+        if flowables and flowables[0] is self._next_table:
+            table = next(self._tables, None)
+            # None é descartado pelo handle_flowable
+            flowables[0:1] = [table, self._next_table] if table is not None else [None]
+
+
+def _pdf_money(value):
+    return f"{value:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
+
+
+@functools.lru_cache(maxsize=4096)
+def _pdf_cell(text, width):
+    """Texto da célula com as quebras de linha já aplicadas para a largura da coluna.
+
+    Textos simples (e não `Paragraph`) são medidos e desenhados pela tabela
+    sem novo cálculo de quebras a cada passagem; nomes de categorias,
+    igrejas, campos e usuários se repetem e vêm do cache.
+    """
+    if '\n' not in text and stringWidth(text, PDF_FONT, PDF_FONT_SIZE) <= width:
+        return text
+    return '\n'.join(simpleSplit(text, PDF_FONT, PDF_FONT_SIZE, width))
+
+
+def pdf_rows(queryset, chunk_size=CHUNK_SIZE, progress=None):
+    """Textos das linhas da tabela do PDF (mesma ordem de `PDF_COLUMNS`), da data mais recente para a mais antiga.
+
+    `progress(linhas)` é chamado a cada `chunk_size` linhas lidas.
+    """
+    values = queryset.order_by('-date', '-id').values_list(*PDF_VALUES).iterator(chunk_size=chunk_size)
+    for count, (day, type_, category, field, church, desc, value,
+                first_name, last_name, shepherd) in enumerate(values, 1):
+        if progress and count % chunk_size == 0:
+            progress(count)
+        yield (
+            day.strftime('%d/%m/%Y'),
+            'Entrada' if type_ == 'income' else 'Saída',
+            category or '-',
+            field or '-',
+            church or '-',
+            desc or '-',
+            _pdf_money(value),
+            f'{first_name} {last_name}'.strip(),
+            shepherd or '-',
+        )
+
+
+def pdf_tables(rows):
+    """Tabelas de até `PDF_TABLE_ROWS` linhas (a primeira com o cabeçalho), montadas sob demanda."""
+    data, style = [PDF_COLUMNS], PDF_FIRST_TABLE_STYLE
+    count = 0
+    for day, type_, category, field, church, desc, value, user, shepherd in rows:
+        data.append([
+            day,
+            type_,
+            _pdf_cell(category, PDF_TEXT_WIDTHS[2]),
+            _pdf_cell(field, PDF_TEXT_WIDTHS[3]),
+            _pdf_cell(church, PDF_TEXT_WIDTHS[4]),
+            _pdf_cell(desc, PDF_TEXT_WIDTHS[5]),
+            _pdf_cell(value, PDF_TEXT_WIDTHS[6]),
+            _pdf_cell(user, PDF_TEXT_WIDTHS[7]),
+            _pdf_cell(shepherd, PDF_TEXT_WIDTHS[8]),
+        ])
+        count += 1
+        if count % PDF_TABLE_ROWS == 0:
+            yield Table(data, colWidths=PDF_COLUMN_WIDTHS, style=style)
+            data, style = [], PDF_TABLE_STYLE
+    if data:
+        yield Table(data, colWidths=PDF_COLUMN_WIDTHS, style=style)
+
+
+def build_pdf(output, elements, rows):
+    """Grava em `output` o PDF A4 com `elements` (cabeçalho) seguidos da tabela de `rows` (`pdf_rows`)."""
+    doc = _PdfDocTemplate(
+        output, pdf_tables(rows), pagesize=A4,
+        leftMargin=0.5*inch, rightMargin=0.5*inch, topMargin=0.5*inch, bottomMargin=0.5*inch,
+    )
+    doc.build(elements)
+
+
+def _pdf_header(transaction_filter, totals):
+    """Título com logo, filtros aplicados e totais do relatório."""
+    search = transaction_filter.search
+    selected_categories = transaction_filter.categories
+    transaction_type = transaction_filter.type
+    date_from = transaction_filter.date_from.strftime('%Y-%m-%d')
+    date_to = transaction_filter.date_to.strftime('%Y-%m-%d')
+    selected_fields = transaction_filter.fields
+    selected_churches = transaction_filter.churches
+    selected_shepherds = transaction_filter.shepherds
+    selected_users = transaction_filter.users
+    total_transactions = totals['total_transactions']
+    total_income = totals['total_income']
+    total_expense = totals['total_expense']
+    balance = totals['balance']
+    elements = []
+
+    # Título com logo
+    title_data = []
+    
+    # Verificar se o logo existe
+    possible_paths = [
+        os.path.join(settings.STATIC_ROOT, 'img', 'icon.png'),
+        os.path.join(settings.BASE_DIR, 'static', 'img', 'icon.png'),
+        os.path.join(os.path.dirname(os.path.dirname(__file__)), 'static', 'img', 'icon.png'),
+    ]
+    
+    icon_path = None
+    icon_exists = False
+    
+    for path in possible_paths:
+        if os.path.exists(path):
+            icon_path = path
+            icon_exists = True
+            break
+    
+    if icon_exists:
+        try:
+            # Carregar o logo PNG
+            icon = Image(icon_path, width=1.2*inch, height=1.2*inch)
+            title_data = [[icon, Paragraph("Relatório de Transações", PDF_TITLE_STYLE)]]
+        except Exception as e:
+            print(f"Erro ao carregar logo PNG: {e}")
+            icon_symbol = Paragraph("●", PDF_ICON_STYLE)
+            title_data = [[icon_symbol, Paragraph("Relatório de Transações", PDF_TITLE_STYLE)]]
+    else:
+        icon_symbol = Paragraph("●", PDF_ICON_STYLE)
+        title_data = [[icon_symbol, Paragraph("Relatório de Transações", PDF_TITLE_STYLE)]]
+    
+    # Criar tabela do título
+    title_table = Table(title_data, colWidths=[1.5*inch, 5.5*inch])
+    title_table.setStyle(TableStyle([
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ('LEFTPADDING', (0, 0), (-1, -1), 0),
+        ('RIGHTPADDING', (0, 0), (-1, -1), 0),
+        ('TOPPADDING', (0, 0), (-1, -1), 0),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 0),
+    ]))
+    
+    elements.append(title_table)
+    elements.append(Spacer(1, 15))
+    
+    # Mostrar filtros aplicados
+    filters_applied = []
+    
+    # Formatar datas para o formato brasileiro
+    try:
+        date_from_formatted = datetime.strptime(date_from, '%Y-%m-%d').strftime('%d/%m/%Y')
+    except (ValueError, TypeError):
+        date_from_formatted = date_from
+    
+    try:
+        date_to_formatted = datetime.strptime(date_to, '%Y-%m-%d').strftime('%d/%m/%Y')
+    except (ValueError, TypeError):
+        date_to_formatted = date_to
+    
+    filters_applied.append(f"Período: {date_from_formatted} a {date_to_formatted}")
+    
+    if selected_categories:
+        category_names = list(
+            Category.objects.filter(id__in=selected_categories).values_list('name', flat=True)
+        )
+        if category_names:
+            filters_applied.append(f"Categoria: {', '.join(category_names)}")
+    
+    if transaction_type:
+        type_name = "Entrada" if transaction_type == "income" else "Saída"
+        filters_applied.append(f"Tipo: {type_name}")
+    
+    if selected_fields:
+        field_names = list(
+            Field.objects.filter(id__in=selected_fields).values_list('name', flat=True)
+        )
+        if field_names:
+            filters_applied.append(f"Campo: {', '.join(field_names)}")
+    
+    if selected_churches:
+        church_names = list(
+            Church.objects.filter(id__in=selected_churches).values_list('name', flat=True)
+        )
+        if church_names:
+            filters_applied.append(f"Igreja: {', '.join(church_names)}")
+    
+    if selected_shepherds:
+        shepherd_names = list(
+            Shepherd.objects.filter(id__in=selected_shepherds).values_list('name', flat=True)
+        )
+        if shepherd_names:
+            filters_applied.append(f"Pastor: {', '.join(shepherd_names)}")
+
+    if selected_users:
+        user_names = [str(user) for user in User.objects.filter(id__in=selected_users)]
+        if user_names:
+            filters_applied.append(f"Usuário: {', '.join(user_names)}")
+    
+    if search:
+        filters_applied.append(f"Busca: {search}")
+    
+    # Adicionar filtros aplicados
+    if filters_applied:
+        elements.append(Paragraph("Filtros Aplicados:", PDF_SUBTITLE_STYLE))
+        for filter_info in filters_applied:
+            elements.append(Paragraph(f"• {escape(filter_info)}", PDF_SUBTITLE_STYLE))
+        elements.append(Spacer(1, 10))
+    
+    # Informações do relatório
+    report_info = [
+        f"Total de Transações: {total_transactions}",
+        f"Total de Entradas: R$ {total_income:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
+        f"Total de Saídas: R$ {total_expense:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
+        f"Saldo: R$ {balance:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
+    ]
+    
+    for info in report_info:
+        elements.append(Paragraph(info, PDF_SUBTITLE_STYLE))
+    
+    elements.append(Spacer(1, 15))
+
+    return elements
+
+
+def write_pdf(transaction_filter, output, progress=None):
+    """Grava o PDF das transações filtradas (`TransactionFilter`) em `output`.
+
+    `progress(linhas)` é chamado a cada `CHUNK_SIZE` linhas lidas. Retorna
+    o número de transações do relatório.
+    """
+    transactions = transaction_filter.queryset()
+    totals = aggregations.totals(transactions)
+    build_pdf(output, _pdf_header(transaction_filter, totals), pdf_rows(transactions, progress=progress))
+    return totals['total_transactions']
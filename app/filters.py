@@ -0,0 +1,304 @@
+"""Filtros canônicos de transações.
+
+`TransactionFilter` concentra o que antes cada view fazia à mão: leitura dos
+parâmetros (GET ou corpo JSON), validação de IDs, escopo por papel do
+usuário, montagem do queryset e um hash canônico dos filtros, usado como
+chave de cache de resultados e de exportações.
+"""
+import hashlib
+import json
+from calendar import monthrange
+from datetime import date, datetime, time, timedelta
+
+from django.db.models import Q
+from django.utils import timezone
+
+from . import rollups
+from .models import Category, Church, Transaction, TransactionMonthlyRollup, User
+from .scopes import get_scope
+from .search import fulltext_match, fulltext_query, fulltext_rank, search_q
+
+
+# Tabelas de dimensão pesquisadas pela busca de transações:
+# (coluna em `Transaction`, modelo, campos pesquisados no modelo)
+SEARCH_DIMENSIONS = (
+    ('category_id', Category, ('name',)),
+    ('church_id', Church, ('name', 'field__name', 'shepherd__name')),
+    ('user_id', User, ('first_name', 'last_name', 'username')),
+)
+
+# Acima deste número de IDs encontrados a busca usa subquery em vez de `IN (...)`
+SEARCH_ID_LIMIT = 500
+
+
+def get_transactions_for_user(user, model=Transaction):
+    """
+    Retorna QuerySet de transações baseado no role do usuário.
+
+    - Admin: Todas as transações
+    - Tesoureiro: Apenas suas próprias transações
+    - Supervisor: Suas próprias transações + transações de tesoureiros e
+      supervisores que compartilham campos
+
+    O escopo vem de `UserScope` (IDs em cache), então o filtro é um
+    `IN (...)` simples sobre `user_id`/`church_id`, sem subqueries nem
+    DISTINCT. `model` permite aplicar o mesmo escopo ao rollup mensal
+    (`TransactionMonthlyRollup`), que usa os mesmos nomes de campos.
+    """
+    condition = get_scope(user).transactions_q()
+    if condition is None:
+        return model.objects.none()
+    return model.objects.filter(condition)
+
+
+def _ids(values):
+    """Converte valores (lista ou valor único) em IDs inteiros, descartando inválidos."""
+    if values is None:
+        return []
+    if not isinstance(values, (list, tuple)):
+        values = [values]
+    ids = set()
+    for value in values:
+        value = str(value).strip()
+        if value.isdigit():
+            ids.add(int(value))
+    return sorted(ids)
+
+
+def transaction_search_q(term):
+    """Busca de transações em duas fases.
+
+    Primeiro pesquisa as tabelas pequenas (categorias, igrejas com seus
+    campos e pastores, usuários) e coleta os IDs encontrados; depois a
+    tabela de transações recebe apenas
+    `desc ILIKE ... OR category_id IN (...) OR church_id IN (...) OR user_id IN (...)`,
+    sem joins, coberto pelos índices de trigramas e de FK.
+    """
+    condition = search_q(term, 'desc')
+    for column, model, fields in SEARCH_DIMENSIONS:
+        matches = model.objects.filter(search_q(term, *fields)).values_list('pk', flat=True)
+        ids = list(matches[:SEARCH_ID_LIMIT + 1])
+        if len(ids) > SEARCH_ID_LIMIT:
+            condition |= Q(**{f'{column}__in': matches})
+        elif ids:
+            condition |= Q(**{f'{column}__in': ids})
+    return condition
+
+
+def _parse_date(value):
+    try:
+        return datetime.strptime(str(value).strip(), '%Y-%m-%d').date()
+    except ValueError:
+        return None
+
+
+def datetime_range(date_from, date_to):
+    """Intervalo meio-aberto `[date_from 00:00, date_to + 1 dia 00:00)` no fuso local.
+
+    Filtrar colunas de data e hora com `__gte`/`__lt` nesses limites, em
+    vez de `__date`, não envolve a coluna em uma função e permite usar
+    índices e o pruning de partições.
+    """
+    return (
+        timezone.make_aware(datetime.combine(date_from, time.min)),
+        timezone.make_aware(datetime.combine(date_to + timedelta(days=1), time.min)),
+    )
+
+
+def default_period(period='month', today=None):
+    """Período padrão dos filtros: mês atual ('month') ou ano atual ('year')."""
+    today = today or date.today()
+    if period == 'year':
+        return date(today.year, 1, 1), date(today.year, 12, 31)
+    return date(today.year, today.month, 1), date(today.year, today.month, monthrange(today.year, today.month)[1])
+
+
+class TransactionFilter:
+    """Filtros de transações já validados para um usuário.
+
+    IDs inválidos são descartados; campos e usuários fora do escopo do
+    usuário logado são ignorados (mesmas regras em todas as views):
+    - Campo: admin filtra por qualquer campo; demais apenas com mais de um
+      campo associado e somente pelos próprios campos
+    - Usuário: admin filtra por qualquer usuário; supervisor por ele mesmo,
+      tesoureiros e supervisores dos mesmos campos; tesoureiro não filtra
+    """
+
+    def __init__(self, user, *, categories=None, type='', fields=None, churches=None,
+                 shepherds=None, users=None, date_from=None, date_to=None, search='',
+                 default='month'):
+        self.user = user
+        self.categories = _ids(categories)
+        self.type = type if type in ('income', 'expense') else ''
+        self.churches = _ids(churches)
+        self.shepherds = _ids(shepherds)
+        self.search = (search or '').strip()
+        self._search_condition = None
+
+        default_from, default_to = default_period(default)
+        parsed_from = _parse_date(date_from) if date_from else None
+        parsed_to = _parse_date(date_to) if date_to else None
+        # Indica se o usuário informou o período (para exibição dos filtros ativos)
+        self.has_period = bool(parsed_from or parsed_to)
+        self.date_from = parsed_from or default_from
+        self.date_to = parsed_to or default_to
+
+        self.fields = self._validate_fields(_ids(fields))
+        self.users = self._validate_users(_ids(users))
+
+    @classmethod
+    def from_get(cls, user, params, *, date_params=('date_from', 'date_to'), default='month'):
+        """Filtros a partir de um QueryDict (GET), com listas via `getlist`."""
+        return cls(
+            user,
+            categories=params.getlist('category'),
+            type=params.get('type', ''),
+            fields=params.getlist('field'),
+            churches=params.getlist('church'),
+            shepherds=params.getlist('shepherd'),
+            users=params.getlist('user'),
+            date_from=params.get(date_params[0], ''),
+            date_to=params.get(date_params[1], ''),
+            search=params.get('search', ''),
+            default=default,
+        )
+
+    @classmethod
+    def from_json(cls, user, payload, *, default='month'):
+        """Filtros a partir de um corpo JSON (valores únicos ou listas)."""
+        return cls(
+            user,
+            categories=payload.get('category'),
+            type=str(payload.get('type') or '').strip(),
+            fields=payload.get('field'),
+            churches=payload.get('church'),
+            shepherds=payload.get('shepherd'),
+            users=payload.get('user'),
+            date_from=str(payload.get('date_from') or '').strip(),
+            date_to=str(payload.get('date_to') or '').strip(),
+            search=str(payload.get('search') or ''),
+            default=default,
+        )
+
+    def _validate_fields(self, field_ids):
+        if not field_ids or self.user.is_admin():
+            return field_ids
+        scope = get_scope(self.user)
+        if len(scope.field_ids) > 1:
+            return [fid for fid in field_ids if fid in scope.field_ids]
+        return []
+
+    def _validate_users(self, user_ids):
+        if not user_ids or self.user.is_admin():
+            return user_ids
+        scope = get_scope(self.user)
+        if self.user.is_supervisor() and scope.field_ids:
+            # O próprio supervisor, tesoureiros e supervisores dos mesmos campos
+            return [uid for uid in user_ids if uid in scope.user_ids]
+        return []
+
+    @property
+    def scope(self):
+        """Escopo de visibilidade: compartilhado entre administradores, individual para os demais."""
+        return 'admin' if self.user.is_admin() else f'{self.user.role}:{self.user.pk}'
+
+    def canonical(self):
+        """Representação canônica (ordenada e normalizada) dos filtros e do escopo."""
+        return {
+            'scope': self.scope,
+            'category': self.categories,
+            'type': self.type,
+            'field': self.fields,
+            'church': self.churches,
+            'shepherd': self.shepherds,
+            'user': self.users,
+            'date_from': self.date_from.isoformat(),
+            'date_to': self.date_to.isoformat(),
+            'search': self.search,
+        }
+
+    def hash(self, **extra):
+        """Hash estável dos filtros + escopo (e de parâmetros extras da view)."""
+        data = dict(self.canonical(), **extra)
+        return hashlib.sha256(json.dumps(data, sort_keys=True, default=str).encode()).hexdigest()
+
+    def base(self, model=Transaction, active_only=True):
+        """Queryset com o escopo por papel do usuário (e só registros ativos, por padrão)."""
+        queryset = get_transactions_for_user(self.user, model)
+        if active_only:
+            queryset = queryset.filter(
+                category__is_active=True,
+                church__is_active=True,
+                field__is_active=True,
+            )
+        return queryset
+
+    def apply(self, queryset, date_from=None, date_to=None):
+        """Aplica os filtros ao queryset (período padrão: o dos filtros)."""
+        queryset = queryset.filter(
+            date__gte=date_from or self.date_from,
+            date__lte=date_to or self.date_to,
+        )
+        if self.search:
+            query = fulltext_query(self.search)
+            if query:
+                queryset = queryset.filter(fulltext_match(query))
+            else:
+                if self._search_condition is None:
+                    # IDs resolvidos uma vez por filtro (lista, totais e resumos reutilizam)
+                    self._search_condition = transaction_search_q(self.search)
+                queryset = queryset.filter(self._search_condition)
+        if self.categories:
+            queryset = queryset.filter(category_id__in=self.categories)
+        if self.type:
+            queryset = queryset.filter(type=self.type)
+        if self.fields:
+            queryset = queryset.filter(field_id__in=self.fields)
+        if self.churches:
+            queryset = queryset.filter(church_id__in=self.churches)
+        if self.shepherds:
+            queryset = queryset.filter(church__shepherd_id__in=self.shepherds)
+        if self.users:
+            queryset = queryset.filter(user_id__in=self.users)
+        return queryset
+
+    def queryset(self, active_only=True):
+        """Transações visíveis ao usuário com todos os filtros aplicados."""
+        return self.apply(self.base(active_only=active_only))
+
+    def ranked(self, queryset):
+        """Ordena por relevância quando a busca usa o texto completo (None caso contrário)."""
+        query = fulltext_query(self.search) if self.search else None
+        if not query:
+            return None
+        return queryset.annotate(search_rank=fulltext_rank(query)).order_by('-search_rank', '-date', '-id')
+
+    def summary_querysets(self, date_from=None, date_to=None, active_only=True, filtered=True):
+        """Querysets disjuntos que cobrem o período para as agregações de resumo.
+
+        Os meses inteiros do período são lidos do rollup mensal e apenas os
+        dias dos meses parciais das pontas são agregados em `Transaction`
+        (com busca textual tudo vem de `Transaction`). Com `filtered=False`
+        aplica apenas o período, sem os demais filtros.
+        """
+        date_from = date_from or self.date_from
+        date_to = date_to or self.date_to
+
+        def narrow(queryset, start, end):
+            if filtered:
+                return self.apply(queryset, start, end)
+            return queryset.filter(date__gte=start, date__lte=end)
+
+        if self.search and filtered:
+            return [narrow(self.base(active_only=active_only), date_from, date_to)]
+        months, partial_ranges = rollups.split_period(date_from, date_to)
+        querysets = []
+        if months:
+            rollup = self.base(TransactionMonthlyRollup, active_only)
+            querysets.append(narrow(rollup, months[0], months[-1]))
+        if partial_ranges or not querysets:
+            condition = Q()
+            for start, end in partial_ranges:
+                condition |= Q(date__gte=start, date__lte=end)
+            querysets.append(narrow(self.base(active_only=active_only), date_from, date_to).filter(condition))
+        return querysets
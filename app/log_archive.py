@@ -0,0 +1,104 @@
+"""Arquivo em disco dos logs de acesso antigos.
+
+`archive_access_logs` grava um arquivo comprimido (gzip) por mês e por
+execução, em JSON Lines ou CSV, em
+`<ACCESS_LOG_ARCHIVE_DIR>/AAAA/MM/access_logs_AAAA_MM_<execução>.<formato>.gz`,
+e `search_access_log_archive` lê esses arquivos linha a linha, sem
+carregá-los de volta no banco. Cada registro traz também o email e o nome
+do usuário e o tipo do objeto, para ser lido sem joins.
+"""
+import csv
+import glob
+import gzip
+import io
+import json
+import os
+from datetime import date
+
+from django.utils import timezone
+
+
+FORMATS = ('jsonl', 'csv')
+FIELDS = [
+    'id', 'timestamp', 'user_id', 'user_email', 'user_name', 'action',
+    'content_type', 'object_id', 'description',
+]
+
+
+def month_path(base_dir, month, fmt, stamp):
+    return os.path.join(base_dir, f'{month:%Y}', f'{month:%m}', f'access_logs_{month:%Y_%m}_{stamp}.{fmt}.gz')
+
+
+def records(queryset, chunk_size=2000):
+    """Registros dos logs do queryset, lidos com cursor no servidor (`iterator`)."""
+    values = queryset.values_list(
+        'id', 'created_at', 'user_id', 'user__email', 'user__first_name', 'user__last_name',
+        'action', 'content_type__app_label', 'content_type__model', 'object_id', 'description',
+    )
+    for (pk, created_at, user_id, email, first_name, last_name,
+         action, app_label, model, object_id, description) in values.iterator(chunk_size=chunk_size):
+        yield {
+            'id': pk,
+            'timestamp': timezone.localtime(created_at).isoformat(),
+            'user_id': user_id,
+            'user_email': email,
+            'user_name': f'{first_name} {last_name}'.strip(),
+            'action': action,
+            'content_type': f'{app_label}.{model}' if app_label else '',
+            'object_id': object_id,
+            'description': description,
+        }
+
+
+def write(path, rows, fmt):
+    """Grava os registros em `path` e retorna (quantidade, maior ID).
+
+    A escrita vai para `<path>.partial`, renomeado só após o fsync: um
+    arquivo com o nome final está completo no disco. Sem registros, nenhum
+    arquivo é criado.
+    """
+    partial = f'{path}.partial'
+    count, max_id = 0, None
+    with open(partial, 'wb') as raw:
+        with gzip.GzipFile(fileobj=raw, mode='wb') as compressed, \
+                io.TextIOWrapper(compressed, encoding='utf-8', newline='') as f:
+            writer = csv.DictWriter(f, FIELDS) if fmt == 'csv' else None
+            if writer:
+                writer.writeheader()
+            for row in rows:
+                if writer:
+                    writer.writerow(row)
+                else:
+                    f.write(json.dumps(row, ensure_ascii=False) + '\n')
+                count += 1
+                max_id = row['id'] if max_id is None else max(max_id, row['id'])
+        raw.flush()
+        os.fsync(raw.fileno())
+    if count:
+        os.replace(partial, path)
+    else:
+        os.remove(partial)
+    return count, max_id
+
+
+def archive_files(base_dir, date_from=None, date_to=None):
+    """Arquivos do diretório em ordem cronológica, apenas dos meses do período."""
+    first = date_from.replace(day=1) if date_from else None
+    for path in sorted(glob.glob(os.path.join(base_dir, '[0-9]' * 4, '[0-9]' * 2, 'access_logs_*.gz'))):
+        month_dir, _ = os.path.split(path)
+        year_dir, month = os.path.split(month_dir)
+        month = date(int(os.path.basename(year_dir)), int(month), 1)
+        if (first and month < first) or (date_to and month > date_to):
+            continue
+        yield path
+
+
+def read(path):
+    """Registros de um arquivo, lidos linha a linha (IDs como texto em CSV)."""
+    with gzip.open(path, 'rt', encoding='utf-8', newline='') as f:
+        if path.endswith('.csv.gz'):
+            yield from csv.DictReader(f)
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
@@ -0,0 +1,83 @@
+import os
+from datetime import date, timedelta
+
+from dateutil.relativedelta import relativedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Min
+from django.utils import timezone
+
+from app import log_archive
+from app.filters import datetime_range
+from app.models import AccessLog
+
+
+class Command(BaseCommand):
+    help = (
+        "Move para arquivos comprimidos (gzip, JSON Lines ou CSV), um por mês, os logs de acesso "
+        "mais antigos que ACCESS_LOG_ARCHIVE_MONTHS e apaga do banco, em lotes, as linhas arquivadas"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--months", type=int, help="Meses mantidos no banco, além do atual (padrão: ACCESS_LOG_ARCHIVE_MONTHS)"
+        )
+        parser.add_argument("--format", choices=log_archive.FORMATS, default="jsonl", help="Formato (padrão: jsonl)")
+        parser.add_argument("--dir", help="Diretório dos arquivos (padrão: ACCESS_LOG_ARCHIVE_DIR)")
+        parser.add_argument("--chunk-size", type=int, default=2000, help="Linhas lidas por vez do cursor (padrão: 2000)")
+        parser.add_argument("--batch-size", type=int, default=5000, help="Linhas apagadas por lote (padrão: 5000)")
+        parser.add_argument("--keep", action="store_true", help="Arquiva sem apagar as linhas do banco")
+        parser.add_argument("--dry-run", action="store_true", help="Apenas mostra o que seria arquivado")
+
+    def handle(self, *args, **options):
+        months = options["months"] or settings.ACCESS_LOG_ARCHIVE_MONTHS
+        if months < 1:
+            raise CommandError("Informe --months ou defina ACCESS_LOG_ARCHIVE_MONTHS (pelo menos 1 mês).")
+        base_dir = options["dir"] or settings.ACCESS_LOG_ARCHIVE_DIR
+
+        cutoff = date.today().replace(day=1) - relativedelta(months=months)
+        self.stdout.write(f"Arquivando logs anteriores a {cutoff:%d/%m/%Y} em {base_dir}")
+        oldest = AccessLog.objects.filter(created_at__lt=datetime_range(cutoff, cutoff)[0]).aggregate(
+            oldest=Min("created_at")
+        )["oldest"]
+        if oldest is None:
+            self.stdout.write(self.style.SUCCESS("Nenhum log a arquivar"))
+            return
+
+        stamp = timezone.localtime().strftime("%Y%m%d%H%M%S")
+        month = timezone.localtime(oldest).date().replace(day=1)
+        archived = deleted = 0
+        while month < cutoff:
+            next_month = month + relativedelta(months=1)
+            start, end = datetime_range(month, next_month - timedelta(days=1))
+            logs = AccessLog.objects.filter(created_at__gte=start, created_at__lt=end)
+            if options["dry_run"]:
+                self.stdout.write(f"  [dry-run] {month:%m/%Y}: {logs.count()} linhas")
+                month = next_month
+                continue
+
+            path = log_archive.month_path(base_dir, month, options["format"], stamp)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            count, max_id = log_archive.write(
+                path, log_archive.records(logs.order_by("created_at", "id"), options["chunk_size"]), options["format"]
+            )
+            if count:
+                archived += count
+                self.stdout.write(f"  {month:%m/%Y}: {count} linhas em {path}")
+                if not options["keep"]:
+                    # Apenas o que foi gravado no arquivo (IDs até o maior arquivado)
+                    deleted += self._delete(logs.filter(pk__lte=max_id), options["batch_size"])
+            month = next_month
+
+        if not options["dry_run"]:
+            self.stdout.write(self.style.SUCCESS(f"Resultado: {archived} linhas arquivadas, {deleted} apagadas"))
+
+    def _delete(self, logs, batch_size):
+        """Apaga em lotes (transações curtas) as linhas arquivadas."""
+        logs = logs.order_by()
+        deleted = 0
+        while True:
+            ids = list(logs.values_list("pk", flat=True)[:batch_size])
+            if not ids:
+                return deleted
+            deleted += AccessLog.objects.filter(pk__in=ids).delete()[0]
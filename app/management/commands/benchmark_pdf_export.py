@@ -0,0 +1,125 @@
+import io
+import random
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import inch
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Table, TableStyle
+
+from app import exports
+
+
+def legacy_pdf(output, rows):
+    """Tabela do PDF anterior: 4 estilos e 9 `Paragraph` por linha, uma única tabela e um comando de cor por linha."""
+    doc = SimpleDocTemplate(output, pagesize=A4,
+                            leftMargin=0.5*inch, rightMargin=0.5*inch,
+                            topMargin=0.5*inch, bottomMargin=0.5*inch)
+    styles = getSampleStyleSheet()
+    data = [exports.PDF_COLUMNS]
+    for row in rows:
+        cell_styles = [
+            ParagraphStyle(name, parent=styles['Normal'], fontSize=7, leading=9, alignment=alignment,
+                           leftIndent=1, rightIndent=1, spaceBefore=1, spaceAfter=1)
+            for name, alignment in (
+                ('CellStyle', TA_LEFT), ('ValueStyle', TA_RIGHT), ('DateStyle', TA_CENTER), ('TypeStyle', TA_CENTER)
+            )
+        ]
+        cell_style, value_style, date_style, type_style = cell_styles
+        day, type_, category, field, church, desc, value, user, shepherd = row
+        data.append([
+            Paragraph(day, date_style),
+            Paragraph(type_, type_style),
+            Paragraph(category, cell_style),
+            Paragraph(field, cell_style),
+            Paragraph(church, cell_style),
+            Paragraph(desc, cell_style),
+            Paragraph(value, value_style),
+            Paragraph(user, cell_style),
+            Paragraph(shepherd, cell_style),
+        ])
+    table = Table(data, colWidths=exports.PDF_COLUMN_WIDTHS)
+    table_style = TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#673ab7')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 8),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+        ('LEFTPADDING', (0, 0), (-1, -1), 2),
+        ('RIGHTPADDING', (0, 0), (-1, -1), 2),
+        ('TOPPADDING', (0, 0), (-1, -1), 2),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 2),
+    ])
+    for i in range(2, len(data), 2):
+        table_style.add('BACKGROUND', (0, i), (-1, i), colors.lightgrey)
+    table.setStyle(table_style)
+    doc.build([table])
+
+
+def synthetic_rows(count):
+    """Linhas no formato de `exports.pdf_rows`, com descrições de tamanhos variados (algumas quebram linha)."""
+    rng = random.Random(42)
+    words = "oferta dízimo missões reforma aluguel energia água construção evento material".split()
+    for i in range(count):
+        yield (
+            f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/2024",
+            'Entrada' if i % 3 else 'Saída',
+            rng.choice(['Dízimos', 'Ofertas', 'Manutenção do Templo', 'Missões']),
+            f"Campo {rng.randint(1, 20)}",
+            f"Igreja {rng.choice(['Central', 'da Vila Nova', 'Jardim das Flores'])} {rng.randint(1, 99)}",
+            ' '.join(rng.choices(words, k=rng.randint(1, 8))),
+            exports._pdf_money(rng.randint(100, 10_000_000) / 100),
+            rng.choice(['Maria Silva', 'José Pereira dos Santos', 'Ana Souza']),
+            rng.choice(['Pr. João', 'Pr. Antônio Carlos de Oliveira', '-']),
+        )
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede tempo, pico de memória (tracemalloc, em uma segunda execução para não distorcer o tempo) "
+        "e tamanho do PDF de transações com linhas sintéticas, no formato atual (`app/exports.py`) "
+        "e no anterior (legado)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows", type=int, nargs="+", default=[1_000, 10_000, 50_000],
+            help="Quantidades de linhas (padrão: 1000 10000 50000)",
+        )
+        parser.add_argument(
+            "--legacy-max-rows", type=int, default=10_000,
+            help="Maior quantidade medida também no formato legado, que é lento (padrão: 10000; 0 = nunca)",
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"  {'Formato':<10}{'Linhas':>8}{'Tempo (s)':>12}{'Pico (MB)':>12}{'PDF (KB)':>12}")
+        for count in options["rows"]:
+            self._measure("Atual", count, lambda output, rows: exports.build_pdf(output, [], rows))
+            if count <= options["legacy_max_rows"]:
+                self._measure("Legado", count, legacy_pdf)
+        self.stdout.write(self.style.SUCCESS("\nBenchmark concluído"))
+
+    def _measure(self, name, count, build):
+        # O tracemalloc deixa a geração bem mais lenta: o tempo vem de uma
+        # execução sem rastreamento e o pico de memória de uma segunda
+        output = io.BytesIO()
+        start = time.perf_counter()
+        build(output, synthetic_rows(count))
+        elapsed = time.perf_counter() - start
+
+        tracemalloc.start()
+        try:
+            build(io.BytesIO(), synthetic_rows(count))
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        self.stdout.write(
+            f"  {name:<10}{count:>8}{elapsed:>12.1f}{peak / 1024 / 1024:>12.1f}{len(output.getvalue()) / 1024:>12.0f}"
+        )
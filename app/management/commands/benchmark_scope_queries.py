@@ -0,0 +1,189 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count, Q, Sum
+
+from app.models import Category, Church, Field, Shepherd, Transaction, User
+from app.scopes import UserScope
+
+
+def legacy_queryset(user):
+    """Escopo de supervisor anterior: três subqueries e `.distinct()` sobre o OR."""
+    supervisor_fields = user.fields.all()
+    supervisor_churches = Church.objects.filter(field__in=supervisor_fields)
+    treasurer_ids = User.objects.filter(
+        role='treasurer',
+        fields__in=supervisor_fields
+    ).distinct().values_list('id', flat=True)
+    supervisor_ids = User.objects.filter(
+        role='supervisor',
+        fields__in=supervisor_fields
+    ).exclude(id=user.id).distinct().values_list('id', flat=True)
+    return Transaction.objects.filter(
+        Q(user=user) |
+        Q(user_id__in=treasurer_ids, church__in=supervisor_churches) |
+        Q(user_id__in=supervisor_ids, church__in=supervisor_churches)
+    ).distinct()
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara, em dados sintéticos, o escopo de supervisores com DISTINCT "
+        "(legado) e com predicados disjuntos (OR simples e UNION ALL). "
+        "Os dados são criados dentro de uma transação e descartados ao final; as "
+        "transações sintéticas ficam em uma cópia temporária de app_transaction, "
+        "sem tocar na tabela real."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--transactions", type=int, default=1_000_000, help="Transações sintéticas (padrão: 1000000)")
+        parser.add_argument("--supervisors", type=int, default=50, help="Supervisores sintéticos (padrão: 50)")
+        parser.add_argument("--fields", type=int, default=25, help="Campos sintéticos (padrão: 25)")
+        parser.add_argument("--churches-per-field", type=int, default=8)
+        parser.add_argument("--treasurers-per-field", type=int, default=4)
+        parser.add_argument("--fields-per-supervisor", type=int, default=2)
+        parser.add_argument("--repeat", type=int, default=3, help="Execuções por supervisor (usa a mediana)")
+        parser.add_argument("--explain", action="store_true", help="Mostra EXPLAIN ANALYZE do primeiro supervisor")
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Benchmark disponível apenas no PostgreSQL.")
+
+        with transaction.atomic():
+            supervisors = self._create_data(options)
+            self.stdout.write(f"Dados: {options['transactions']} transações, {len(supervisors)} supervisores")
+            if options["explain"]:
+                self._explain(supervisors[0])
+            results = self._run(supervisors, options["repeat"])
+            # Dados sintéticos nunca são gravados
+            transaction.set_rollback(True)
+
+        self.stdout.write("\nTempo mediano por supervisor (ms):")
+        self.stdout.write(f"  {'Plano':<28}{'Totais':>10}{'Página (50)':>14}")
+        for name, timings in results.items():
+            self.stdout.write(
+                f"  {name:<28}{statistics.median(timings['totals']):>10.1f}"
+                f"{statistics.median(timings['page']):>14.1f}"
+            )
+        self.stdout.write(self.style.SUCCESS("\nBenchmark concluído (dados sintéticos descartados)"))
+
+    def _create_data(self, options):
+        rng = random.Random(42)
+        tag = f"bench-scope-{time.time_ns()}"
+
+        category = Category.objects.create(name=f"{tag} categoria", mandatory_proof=False)
+        shepherd = Shepherd.objects.create(name=f"{tag} pastor")
+        fields = Field.objects.bulk_create(
+            [Field(name=f"{tag} campo {i}") for i in range(options["fields"])]
+        )
+        churches = Church.objects.bulk_create([
+            Church(name=f"{tag} igreja {field.id}-{i}", shepherd=shepherd, field=field)
+            for field in fields
+            for i in range(options["churches_per_field"])
+        ])
+
+        users = []
+        for field in fields:
+            for i in range(options["treasurers_per_field"]):
+                users.append((User(
+                    username=f"{tag}-t{field.id}-{i}", email=f"{tag}-t{field.id}-{i}@bench.local",
+                    role="treasurer", password="!",
+                ), [field]))
+        for i in range(options["supervisors"]):
+            supervisor_fields = rng.sample(fields, min(options["fields_per_supervisor"], len(fields)))
+            users.append((User(
+                username=f"{tag}-s{i}", email=f"{tag}-s{i}@bench.local",
+                role="supervisor", password="!",
+            ), supervisor_fields))
+        created = User.objects.bulk_create([user for user, _ in users])
+        User.fields.through.objects.bulk_create([
+            User.fields.through(user_id=user.id, field_id=field.id)
+            for user, (_, user_fields) in zip(created, users)
+            for field in user_fields
+        ])
+
+        # Pares (igreja, usuário) válidos: usuários vinculados ao campo da igreja
+        users_by_field = {}
+        for user, (_, user_fields) in zip(created, users):
+            for field in user_fields:
+                users_by_field.setdefault(field.id, []).append(user.id)
+        pairs = [
+            (church.id, user_id)
+            for church in churches
+            for user_id in users_by_field.get(church.field_id, [])
+        ]
+        rng.shuffle(pairs)
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "CREATE TEMP TABLE bench_scope_pairs (n integer PRIMARY KEY, church_id bigint, user_id bigint) ON COMMIT DROP"
+            )
+            cursor.executemany(
+                "INSERT INTO bench_scope_pairs VALUES (%s, %s, %s)",
+                [(n, church_id, user_id) for n, (church_id, user_id) in enumerate(pairs)],
+            )
+            # Tabela temporária com o mesmo nome: o schema temporário vem primeiro
+            # no search_path, então o ORM desta conexão passa a ler a cópia. A
+            # tabela real não recebe linhas (nem tuplas mortas, nem o trigger do
+            # search_vector) e o ANALYZE não altera as estatísticas dela
+            cursor.execute("SELECT current_schema()")
+            schema = connection.ops.quote_name(cursor.fetchone()[0])
+            cursor.execute(
+                f"CREATE TEMP TABLE app_transaction (LIKE {schema}.app_transaction "
+                "INCLUDING DEFAULTS INCLUDING INDEXES) ON COMMIT DROP"
+            )
+            cursor.execute(
+                """
+                INSERT INTO pg_temp.app_transaction
+                    (id, type, "desc", category_id, value, date, user_id, church_id,
+                     created_at, updated_at, is_active)
+                SELECT g, CASE WHEN g %% 3 = 0 THEN 'expense' ELSE 'income' END,
+                       'Benchmark ' || g, %s, ((g %% 100000) / 100.0 + 1)::numeric(10, 2),
+                       CURRENT_DATE - (g %% 730), p.user_id, p.church_id, now(), now(), true
+                FROM generate_series(1, %s) AS g
+                JOIN bench_scope_pairs p ON p.n = g %% %s
+                """,
+                [category.id, options["transactions"], len(pairs)],
+            )
+            cursor.execute("ANALYZE pg_temp.app_transaction")
+
+        return [user for user in created if user.role == "supervisor"]
+
+    def _plans(self, supervisor):
+        scope = UserScope.build(supervisor)
+        parts = [Transaction.objects.filter(predicate) for predicate in scope.predicates()]
+        return {
+            "DISTINCT (legado)": [legacy_queryset(supervisor)],
+            "Predicados disjuntos (OR)": [Transaction.objects.filter(scope.transactions_q())],
+            "UNION ALL (partes)": parts,
+        }
+
+    def _run(self, supervisors, repeat):
+        results = {}
+        for supervisor in supervisors:
+            for name, querysets in self._plans(supervisor).items():
+                timings = results.setdefault(name, {"totals": [], "page": []})
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    for queryset in querysets:
+                        queryset.aggregate(total=Sum("value"), count=Count("id"))
+                    timings["totals"].append((time.perf_counter() - start) * 1000)
+
+                    start = time.perf_counter()
+                    if len(querysets) == 1:
+                        list(querysets[0].order_by("-date", "-id").values_list("id", flat=True)[:50])
+                    else:
+                        union = querysets[0].values_list("id", "date")
+                        union = union.union(*[qs.values_list("id", "date") for qs in querysets[1:]], all=True)
+                        list(union.order_by("-date", "-id")[:50])
+                    timings["page"].append((time.perf_counter() - start) * 1000)
+        return results
+
+    def _explain(self, supervisor):
+        for name, querysets in self._plans(supervisor).items():
+            self.stdout.write(f"\n=== {name} ===")
+            for queryset in querysets:
+                self.stdout.write(queryset.order_by().values("id", "value").explain(analyze=True))
@@ -14,7 +14,7 @@ class Command(BaseCommand):
             return
 
         valid_paths = set(
-            Transaction.objects.filter(proof__isnull=False).values_list(
+            Transaction.objects.filter(proof__isnull=False).exclude(proof="").values_list(
                 "proof", flat=True
             )
         )
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from app import audit
+
+
+class Command(BaseCommand):
+    help = (
+        "Grava no banco, em lotes (um INSERT por lote), as entradas do log de auditoria "
+        "enfileiradas no Redis (AUDIT_LOG_QUEUE=True)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000, help="Entradas por lote (padrão: 1000)")
+
+    def handle(self, *args, **options):
+        batch_size = max(options["batch_size"], 1)
+        total = 0
+        while True:
+            drained = audit.drain(batch_size)
+            total += drained
+            if drained < batch_size:
+                break
+        self.stdout.write(self.style.SUCCESS(f"Entradas do log de auditoria gravadas: {total}"))
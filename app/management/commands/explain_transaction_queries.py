@@ -0,0 +1,111 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count, Q, Sum
+
+from app.models import Transaction
+
+
+# Índices de acesso de `Transaction` (migração 0013) comparados pelo comando
+ACCESS_INDEXES = [
+    'app_trans_date_type_idx',
+    'app_trans_church_date_idx',
+    'app_trans_user_date_idx',
+    'app_trans_cat_date_idx',
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Mostra os planos (EXPLAIN) das consultas canônicas de transações sem e com "
+        "os índices de acesso. O 'antes' desliga as varreduras por índice só na "
+        "transação do comando (SET LOCAL), sem bloquear leituras ou gravações; com "
+        "--drop-indexes remove os índices de acesso (ACCESS EXCLUSIVE: bloqueia "
+        "leituras e gravações em app_transaction até o fim do comando)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--date-from", help="Início do período (YYYY-MM-DD, padrão: 1º de janeiro do ano atual)")
+        parser.add_argument("--date-to", help="Fim do período (YYYY-MM-DD, padrão: 31 de dezembro do ano atual)")
+        parser.add_argument("--analyze", action="store_true", help="Usa EXPLAIN ANALYZE (executa as consultas)")
+        parser.add_argument("--after-only", action="store_true", help="Mostra apenas os planos com os índices")
+        parser.add_argument(
+            "--drop-indexes", action="store_true",
+            help="No 'antes', remove só os índices de acesso em vez de desligar todas as varreduras por índice. "
+                 "Bloqueia leituras e gravações em app_transaction: não use em produção",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Comando disponível apenas no PostgreSQL.")
+
+        today = date.today()
+        try:
+            date_from = date.fromisoformat(options["date_from"]) if options["date_from"] else date(today.year, 1, 1)
+            date_to = date.fromisoformat(options["date_to"]) if options["date_to"] else date(today.year, 12, 31)
+        except ValueError:
+            raise CommandError("Datas devem estar no formato YYYY-MM-DD.")
+
+        queries = self._canonical_queries(date_from, date_to)
+
+        if not options["after_only"]:
+            with transaction.atomic():
+                with connection.cursor() as cursor:
+                    if options["drop_indexes"]:
+                        for name in ACCESS_INDEXES:
+                            cursor.execute(f"DROP INDEX IF EXISTS {connection.ops.quote_name(name)}")
+                        title = "ANTES (sem os índices de acesso)"
+                    else:
+                        # Vale só até o fim da transação; nenhum lock além do das próprias consultas
+                        for setting in ("enable_indexscan", "enable_indexonlyscan", "enable_bitmapscan"):
+                            cursor.execute(f"SET LOCAL {setting} = off")
+                        title = "ANTES (sem varreduras por índice)"
+                self._explain_all(title, queries, options["analyze"])
+                # Os índices (ou as configurações) voltam com o rollback
+                transaction.set_rollback(True)
+
+        self._explain_all("DEPOIS (com os índices de acesso)", queries, options["analyze"])
+
+    def _canonical_queries(self, date_from, date_to):
+        """Consultas no formato usado por lista, exportações e resumos."""
+        period = Transaction.objects.filter(
+            date__gte=date_from,
+            date__lte=date_to,
+            category__is_active=True,
+            church__is_active=True,
+            field__is_active=True,
+        )
+        sample = Transaction.objects.filter(date__gte=date_from, date__lte=date_to).values(
+            "church_id", "user_id", "category_id"
+        ).first() or {"church_id": 0, "user_id": 0, "category_id": 0}
+        totals = {
+            "count": Count("id"),
+            "income": Sum("value", filter=Q(type="income")),
+            "expense": Sum("value", filter=Q(type="expense")),
+        }
+        return [
+            ("Totais do período", period, totals),
+            ("Totais do período por tipo", period.filter(type="income"), {"total": Sum("value")}),
+            ("Totais de uma igreja", period.filter(church_id=sample["church_id"]), totals),
+            ("Totais de um usuário (tesoureiro)", period.filter(user_id=sample["user_id"]), totals),
+            ("Totais de uma categoria", period.filter(category_id=sample["category_id"]), totals),
+            ("Página da lista (50 itens)", period.order_by("-date", "-id")[:50], None),
+        ]
+
+    def _explain_all(self, title, queries, analyze):
+        self.stdout.write(self.style.MIGRATE_HEADING(f"\n##### {title} #####"))
+        for name, queryset, aggregates in queries:
+            self.stdout.write(self.style.MIGRATE_LABEL(f"\n=== {name} ==="))
+            self.stdout.write(self._explain(queryset, aggregates, analyze))
+
+    def _explain(self, queryset, aggregates, analyze):
+        if aggregates is None:
+            return queryset.explain(analyze=analyze)
+        # `aggregate()` não tem explain(): monta a mesma consulta com values() vazio
+        aggregated = queryset.order_by().values().annotate(**aggregates).values(*aggregates)
+        aggregated.query.group_by = None
+        sql, params = aggregated.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN {'(ANALYZE, BUFFERS) ' if analyze else ''}{sql}", params)
+            return "\n".join(row[0] for row in cursor.fetchall())
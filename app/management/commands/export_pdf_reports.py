@@ -0,0 +1,70 @@
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.http import QueryDict
+
+from app import pdf_reports
+from app.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "Gera um PDF de transações por campo (ou por igreja) do período e reúne todos em um ZIP, "
+        "com um processo por núcleo disponível (fechamento mensal)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--by", choices=pdf_reports.GROUPS, default="field", help="Um PDF por campo ou por igreja (padrão: field)")
+        parser.add_argument("--month", help="Mês no formato AAAA-MM (padrão: mês anterior)")
+        parser.add_argument("--from", dest="date_from", type=date.fromisoformat, help="Data inicial (AAAA-MM-DD), em vez de --month")
+        parser.add_argument("--to", dest="date_to", type=date.fromisoformat, help="Data final (AAAA-MM-DD), em vez de --month")
+        parser.add_argument("--user", help="Email do usuário cujo escopo é usado (padrão: primeiro administrador ativo)")
+        parser.add_argument("--output", help="Arquivo ZIP (padrão: relatorios_<campos|igrejas>_<mm-aaaa>.zip)")
+        parser.add_argument("--workers", type=int, help="Processos em paralelo (padrão: PDF_REPORT_WORKERS ou um por núcleo)")
+
+    def handle(self, *args, **options):
+        date_from, date_to = self._period(options)
+        user = self._user(options["user"])
+        output = options["output"] or (
+            f"relatorios_{'campos' if options['by'] == 'field' else 'igrejas'}_{date_from:%m-%Y}.zip"
+        )
+
+        query = QueryDict(mutable=True)
+        query["date_from"] = date_from.isoformat()
+        query["date_to"] = date_to.isoformat()
+
+        self.stdout.write(
+            f"Gerando relatórios de {date_from:%d/%m/%Y} a {date_to:%d/%m/%Y} por "
+            f"{'campo' if options['by'] == 'field' else 'igreja'} em {output}"
+        )
+        started = time.monotonic()
+        with open(output, "wb") as f:
+            count = pdf_reports.write_zip(
+                user, query.urlencode(), options["by"], f,
+                progress=lambda rows: self.stdout.write(f"  {rows} transações"),
+                max_workers=options["workers"],
+            )
+        self.stdout.write(self.style.SUCCESS(f"{count} PDFs em {output} ({time.monotonic() - started:.1f}s)"))
+
+    def _period(self, options):
+        if options["date_from"] or options["date_to"]:
+            if not (options["date_from"] and options["date_to"]):
+                raise CommandError("Informe --from e --to.")
+            return options["date_from"], options["date_to"]
+        if options["month"]:
+            try:
+                first = date.fromisoformat(f"{options['month']}-01")
+            except ValueError:
+                raise CommandError("Use --month no formato AAAA-MM.")
+        else:
+            first = (date.today().replace(day=1) - timedelta(days=1)).replace(day=1)
+        next_month = (first + timedelta(days=32)).replace(day=1)
+        return first, next_month - timedelta(days=1)
+
+    def _user(self, email):
+        users = User.objects.filter(is_active=True)
+        user = users.filter(email=email).first() if email else users.filter(role="admin").order_by("pk").first()
+        if user is None:
+            raise CommandError("Usuário não encontrado." if email else "Nenhum administrador ativo; informe --user.")
+        return user
@@ -0,0 +1,50 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from app.partitions import ACCESS_LOGS
+
+
+class Command(BaseCommand):
+    help = (
+        "Particionamento mensal (RANGE por data e hora) de app_accesslog no PostgreSQL: "
+        "converte a tabela existente (--convert) e cria as partições dos próximos meses"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--convert",
+            action="store_true",
+            help="Converte a tabela atual em particionada (bloqueia app_accesslog durante a cópia)",
+        )
+        parser.add_argument(
+            "--months-ahead", type=int, default=2, help="Meses futuros com partição criada (padrão: 2)"
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Comando disponível apenas no PostgreSQL.")
+
+        today = date.today()
+        last = ACCESS_LOGS.period_start(today)
+        for _ in range(max(options["months_ahead"], 0)):
+            last = ACCESS_LOGS.next_start(last)
+        with transaction.atomic(), connection.cursor() as cursor:
+            partitioned = ACCESS_LOGS.is_partitioned(cursor)
+            if options["convert"]:
+                if partitioned:
+                    raise CommandError(f"{ACCESS_LOGS.table} já é particionada.")
+                copied = ACCESS_LOGS.convert(cursor, last)
+                self.stdout.write(f"Linhas copiadas: {copied}")
+            elif not partitioned:
+                self.stdout.write(self.style.WARNING(
+                    f"{ACCESS_LOGS.table} não é particionada; nada a fazer (use --convert para converter)."
+                ))
+                return
+            else:
+                for name in ACCESS_LOGS.create_partitions(cursor, today, last):
+                    self.stdout.write(f"Partição criada: {name}")
+            partitions = ACCESS_LOGS.partitions(cursor)
+
+        self.stdout.write(self.style.SUCCESS(f"Partições de {ACCESS_LOGS.table}: {len(partitions)}"))
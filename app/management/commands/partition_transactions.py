@@ -0,0 +1,59 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from app.partitions import TRANSACTIONS
+
+
+class Command(BaseCommand):
+    help = (
+        "Particionamento anual (RANGE por data) de app_transaction no PostgreSQL: "
+        "converte a tabela existente (--convert), cria as partições dos próximos anos "
+        "e move partições antigas para outro tablespace"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--convert",
+            action="store_true",
+            help="Converte a tabela atual em particionada (bloqueia app_transaction durante a cópia)",
+        )
+        parser.add_argument(
+            "--years-ahead", type=int, default=1, help="Anos futuros com partição criada (padrão: 1)"
+        )
+        parser.add_argument("--tablespace", help="Tablespace de destino das partições antigas")
+        parser.add_argument(
+            "--before", type=int, help="Move para --tablespace as partições de anos anteriores a este"
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Comando disponível apenas no PostgreSQL.")
+        if bool(options["tablespace"]) != bool(options["before"]):
+            raise CommandError("Use --tablespace e --before juntos.")
+
+        today = date.today()
+        last = date(today.year + max(options["years_ahead"], 0), 1, 1)
+        with transaction.atomic(), connection.cursor() as cursor:
+            partitioned = TRANSACTIONS.is_partitioned(cursor)
+            if options["convert"]:
+                if partitioned:
+                    raise CommandError(f"{TRANSACTIONS.table} já é particionada.")
+                copied = TRANSACTIONS.convert(cursor, last)
+                self.stdout.write(f"Linhas copiadas: {copied}")
+            elif not partitioned:
+                self.stdout.write(self.style.WARNING(
+                    f"{TRANSACTIONS.table} não é particionada; nada a fazer (use --convert para converter)."
+                ))
+                return
+            else:
+                for name in TRANSACTIONS.create_partitions(cursor, today, last):
+                    self.stdout.write(f"Partição criada: {name}")
+            if options["tablespace"]:
+                for name in TRANSACTIONS.older_partitions(cursor, date(options["before"], 1, 1)):
+                    TRANSACTIONS.set_tablespace(cursor, name, options["tablespace"])
+                    self.stdout.write(f"{name} movida para o tablespace {options['tablespace']}")
+            partitions = TRANSACTIONS.partitions(cursor)
+
+        self.stdout.write(self.style.SUCCESS(f"Partições de {TRANSACTIONS.table}: {', '.join(partitions)}"))
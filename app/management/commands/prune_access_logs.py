@@ -0,0 +1,89 @@
+from datetime import date, datetime, time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from app.models import AccessLog
+from app.partitions import ACCESS_LOGS
+
+
+class Command(BaseCommand):
+    help = (
+        "Remove logs de acesso mais antigos que a retenção (--months ou ACCESS_LOG_RETENTION_MONTHS; "
+        "0 desativa). "
+        "Com app_accesslog particionada desanexa (ou remove, com --drop, junto com as "
+        "desanexadas em execuções anteriores) as partições mensais antigas inteiras; o "
+        "restante é apagado em lotes"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--months", type=int, help="Meses mantidos, além do atual (padrão: ACCESS_LOG_RETENTION_MONTHS)"
+        )
+        parser.add_argument(
+            "--drop", action="store_true",
+            help="Remove as partições antigas (e as desanexadas antes) em vez de só desanexar",
+        )
+        parser.add_argument("--batch-size", type=int, default=5000, help="Linhas apagadas por lote (padrão: 5000)")
+        parser.add_argument("--dry-run", action="store_true", help="Apenas mostra o que seria removido")
+
+    def handle(self, *args, **options):
+        if options["months"] is not None:
+            months = options["months"]
+            if months < 1:
+                raise CommandError("A retenção deve ser de pelo menos 1 mês.")
+        else:
+            months = settings.ACCESS_LOG_RETENTION_MONTHS
+            if months < 1:
+                raise CommandError("Retenção desativada: defina ACCESS_LOG_RETENTION_MONTHS ou use --months.")
+
+        today = date.today()
+        total_months = today.year * 12 + today.month - 1 - months
+        cutoff = date(total_months // 12, total_months % 12 + 1, 1)
+        self.stdout.write(f"Removendo logs anteriores a {cutoff:%d/%m/%Y} (retenção: {months} meses)")
+
+        if connection.vendor == "postgresql":
+            self._detach_partitions(cutoff, options["drop"], options["dry_run"])
+        self._delete_rows(cutoff, options["batch_size"], options["dry_run"])
+
+    def _detach_partitions(self, cutoff, drop, dry_run):
+        with transaction.atomic(), connection.cursor() as cursor:
+            if not ACCESS_LOGS.is_partitioned(cursor):
+                return
+            for name in ACCESS_LOGS.older_partitions(cursor, cutoff):
+                if dry_run:
+                    self.stdout.write(f"  [dry-run] {name}")
+                    continue
+                cursor.execute(f"ALTER TABLE {ACCESS_LOGS.table} DETACH PARTITION {name}")
+                if drop:
+                    cursor.execute(f"DROP TABLE {name}")
+                    self.stdout.write(f"  Partição removida: {name}")
+                else:
+                    self.stdout.write(f"  Partição desanexada: {name} (tabela mantida; remova com --drop)")
+            if not drop:
+                return
+            # Desanexadas em execuções sem --drop: fora da tabela, nada mais as visita
+            for name in ACCESS_LOGS.detached_partitions(cursor, cutoff):
+                if dry_run:
+                    self.stdout.write(f"  [dry-run] {name} (desanexada)")
+                    continue
+                cursor.execute(f"DROP TABLE {name}")
+                self.stdout.write(f"  Partição desanexada removida: {name}")
+
+    def _delete_rows(self, cutoff, batch_size, dry_run):
+        """Apaga em lotes (transações curtas) as linhas antigas fora das partições desanexadas."""
+        old_logs = AccessLog.objects.filter(
+            created_at__lt=timezone.make_aware(datetime.combine(cutoff, time.min))
+        ).order_by()
+        if dry_run:
+            self.stdout.write(f"  [dry-run] {old_logs.count()} linhas seriam apagadas")
+            return
+        deleted = 0
+        while True:
+            ids = list(old_logs.values_list("pk", flat=True)[:batch_size])
+            if not ids:
+                break
+            deleted += AccessLog.objects.filter(pk__in=ids).delete()[0]
+        self.stdout.write(self.style.SUCCESS(f"Resultado: {deleted} linhas apagadas"))
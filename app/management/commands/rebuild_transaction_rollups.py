@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from app.models import TransactionMonthlyRollup
+from app import rollups
+
+
+class Command(BaseCommand):
+    help = "Reconstrói o rollup mensal de transações a partir da tabela de transações"
+
+    def handle(self, *args, **options):
+        rollups.rebuild()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rollup reconstruído: {TransactionMonthlyRollup.objects.count()} linhas"
+            )
+        )
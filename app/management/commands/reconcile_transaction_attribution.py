@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from app import attribution
+
+
+class Command(BaseCommand):
+    help = (
+        "Confere o campo e o pastor na data gravados nas transações (e o campo do "
+        "rollup mensal) com as igrejas e o histórico de pastores, corrigindo divergências"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--church", type=int, action="append", help="Limita a uma igreja (ID); pode repetir")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            fixed, fixed_rollups = attribution.reconcile(options["church"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Atribuição conferida: {fixed} transações e {fixed_rollups} linhas do rollup corrigidas"
+            )
+        )
@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from app import export_jobs
+
+
+class Command(BaseCommand):
+    help = (
+        "Processa a fila de exportações em segundo plano (ExportJob): gera os arquivos no "
+        "volume de mídia e remove os antigos"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Processa a fila atual e sai")
+        parser.add_argument(
+            "--sleep", type=float, default=2, help="Segundos de espera com a fila vazia (padrão: 2)"
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write("Aguardando exportações...")
+        last_cleanup = 0
+        while True:
+            if time.monotonic() - last_cleanup > 600:
+                removed, stale = export_jobs.cleanup()
+                last_cleanup = time.monotonic()
+                if removed or stale:
+                    self.stdout.write(f"Limpeza: {removed} exportações removidas, {stale} interrompidas")
+
+            job = export_jobs.claim()
+            if job is None:
+                if options["once"]:
+                    return
+                # Conexão ociosa não fica aberta entre as verificações
+                close_old_connections()
+                time.sleep(options["sleep"])
+                continue
+
+            started = time.monotonic()
+            job = export_jobs.run(job)
+            self.stdout.write(
+                f"Exportação {job.pk} ({job.format}, {job.total_rows} linhas): "
+                f"{job.get_status_display()} em {time.monotonic() - started:.1f}s"
+            )
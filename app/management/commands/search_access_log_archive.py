@@ -0,0 +1,72 @@
+import json
+from datetime import date
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from app import log_archive
+
+
+class Command(BaseCommand):
+    help = (
+        "Pesquisa os logs de acesso arquivados (archive_access_logs) lendo os arquivos "
+        "comprimidos linha a linha, sem carregá-los no banco"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--text", help="Trecho da descrição (sem diferenciar maiúsculas)")
+        parser.add_argument("--user", help="ID exato, ou trecho do email ou do nome do usuário")
+        parser.add_argument("--action", help="Ação (login, logout, create, update, delete)")
+        parser.add_argument("--object", help="Objeto no formato app.modelo:id (ex.: app.transaction:42)")
+        parser.add_argument("--from", dest="date_from", type=date.fromisoformat, help="Data inicial (AAAA-MM-DD)")
+        parser.add_argument("--to", dest="date_to", type=date.fromisoformat, help="Data final (AAAA-MM-DD)")
+        parser.add_argument("--dir", help="Diretório dos arquivos (padrão: ACCESS_LOG_ARCHIVE_DIR)")
+        parser.add_argument("--limit", type=int, default=100, help="Máximo de resultados (padrão: 100; 0 = todos)")
+        parser.add_argument("--json", action="store_true", help="Imprime os registros em JSON Lines")
+
+    def handle(self, *args, **options):
+        base_dir = options["dir"] or settings.ACCESS_LOG_ARCHIVE_DIR
+        text = (options["text"] or "").lower()
+        user = (options["user"] or "").lower()
+        date_from = options["date_from"].isoformat() if options["date_from"] else None
+        date_to = options["date_to"].isoformat() if options["date_to"] else None
+        content_type, _, object_id = (options["object"] or "").partition(":")
+
+        found = 0
+        files = log_archive.archive_files(base_dir, options["date_from"], options["date_to"])
+        for path in files:
+            for record in log_archive.read(path):
+                # Datas no fuso local, em ISO: a comparação de texto basta
+                day = record["timestamp"][:10]
+                if (date_from and day < date_from) or (date_to and day > date_to):
+                    continue
+                if options["action"] and record["action"] != options["action"]:
+                    continue
+                if text and text not in (record["description"] or "").lower():
+                    continue
+                if user and not (
+                    user == str(record["user_id"])
+                    or user in (record["user_email"] or "").lower()
+                    or user in (record["user_name"] or "").lower()
+                ):
+                    continue
+                if content_type and (
+                    record["content_type"] != content_type
+                    or (object_id and str(record["object_id"] or "") != object_id)
+                ):
+                    continue
+                found += 1
+                self._print(record, options["json"])
+                if options["limit"] and found >= options["limit"]:
+                    self.stderr.write(f"Limite de {options['limit']} resultados atingido")
+                    return
+        self.stderr.write(f"Resultados: {found}")
+
+    def _print(self, record, as_json):
+        if as_json:
+            self.stdout.write(json.dumps(record, ensure_ascii=False))
+            return
+        when = record["timestamp"][:19].replace("T", " ")
+        self.stdout.write(
+            f"{when} | {record['user_name'] or record['user_email']} | {record['action']} | {record['description']}"
+        )
@@ -3,6 +3,8 @@ from django.urls import reverse
 from django.contrib import messages
 from django.utils.deprecation import MiddlewareMixin
 
+from . import audit
+
 
 class AdminAccessMiddleware(MiddlewareMixin):
     """
@@ -30,3 +32,17 @@ class AdminAccessMiddleware(MiddlewareMixin):
             return redirect('index')
         
         return None
+
+
+class AuditLogMiddleware:
+    """
+    Abre o buffer do log de auditoria da requisição: as entradas de
+    `log_action` são gravadas juntas, após o envio da resposta (app/audit.py)
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        audit.start()
+        return self.get_response(request)
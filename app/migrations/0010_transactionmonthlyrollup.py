@@ -0,0 +1,65 @@
+# Generated by Django 5.2.4 on 2026-10-18 15:10
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncMonth
+
+
+def backfill_monthly_rollup(apps, schema_editor):
+    Transaction = apps.get_model("app", "Transaction")
+    TransactionMonthlyRollup = apps.get_model("app", "TransactionMonthlyRollup")
+    rows = (
+        Transaction.objects.order_by()
+        .values("church_id", "category_id", "type", "user_id", month=TruncMonth("date"))
+        .annotate(total=Sum("value"), count=Count("id"))
+    )
+    TransactionMonthlyRollup.objects.bulk_create(
+        [
+            TransactionMonthlyRollup(
+                date=row["month"],
+                church_id=row["church_id"],
+                category_id=row["category_id"],
+                type=row["type"],
+                user_id=row["user_id"],
+                total=row["total"],
+                count=row["count"],
+            )
+            for row in rows
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0009_enable_unaccent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TransactionMonthlyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Mês')),
+                ('type', models.CharField(choices=[('income', 'Entrada'), ('expense', 'Saída')], max_length=10, verbose_name='Tipo')),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Total (R$)')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='Quantidade')),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='app.category', verbose_name='Categoria')),
+                ('church', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='app.church', verbose_name='Igreja')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL, verbose_name='Usuário')),
+            ],
+            options={
+                'verbose_name': 'Resumo Mensal de Transações',
+                'verbose_name_plural': 'Resumos Mensais de Transações',
+                'ordering': ['-date'],
+                'constraints': [models.UniqueConstraint(fields=('date', 'church', 'category', 'type', 'user'), name='unique_transaction_monthly_rollup')],
+            },
+        ),
+        migrations.RunPython(
+            backfill_monthly_rollup,
+            reverse_code=migrations.RunPython.noop,
+        ),
+    ]
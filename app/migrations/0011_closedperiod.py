@@ -0,0 +1,35 @@
+# Generated by Django 5.2.4 on 2026-10-18 15:14
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0010_transactionmonthlyrollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClosedPeriod',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+                ('is_active', models.BooleanField(db_index=True, default=True, verbose_name='Registro Ativo')),
+                ('month', models.DateField(unique=True, verbose_name='Mês')),
+                ('total_transactions', models.PositiveIntegerField(default=0, verbose_name='Transações')),
+                ('total_income', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Entradas (R$)')),
+                ('total_expense', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Saídas (R$)')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_created', to=settings.AUTH_USER_MODEL, verbose_name='Criado por')),
+                ('updated_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_updated', to=settings.AUTH_USER_MODEL, verbose_name='Atualizado por')),
+            ],
+            options={
+                'verbose_name': 'Período Fechado',
+                'verbose_name_plural': 'Períodos Fechados',
+                'ordering': ['-month'],
+            },
+        ),
+    ]
@@ -0,0 +1,52 @@
+from django.db import migrations
+
+
+# (tabela, coluna, nome do índice) pesquisados por `app.search.search_q`
+TRIGRAM_INDEXES = [
+    ('app_transaction', 'desc', 'app_trans_desc_trgm'),
+    ('app_category', 'name', 'app_category_name_trgm'),
+    ('app_church', 'name', 'app_church_name_trgm'),
+    ('app_field', 'name', 'app_field_name_trgm'),
+    ('app_shepherd', 'name', 'app_shepherd_name_trgm'),
+    ('app_user', 'first_name', 'app_user_first_name_trgm'),
+    ('app_user', 'last_name', 'app_user_last_name_trgm'),
+    ('app_user', 'username', 'app_user_username_trgm'),
+    ('app_user', 'email', 'app_user_email_trgm'),
+]
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    # `unaccent()` é STABLE e não pode ser usada em índices: wrapper IMMUTABLE
+    # com o dicionário explícito (mesmo resultado, independente do search_path)
+    schema_editor.execute(
+        "CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text "
+        "LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT AS "
+        "$$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$"
+    )
+    for table, column, name in TRIGRAM_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {name} ON {table} '
+            f'USING gin (f_unaccent("{column}") gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for _, _, name in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+    schema_editor.execute('DROP FUNCTION IF EXISTS f_unaccent(text)')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0013_transaction_access_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
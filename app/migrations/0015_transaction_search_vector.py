@@ -0,0 +1,146 @@
+from django.db import migrations
+
+
+# Configuração de busca textual: português com remoção de acentos
+CREATE_CONFIGURATION = """
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = 'pt_unaccent') THEN
+        CREATE TEXT SEARCH CONFIGURATION pt_unaccent (COPY = pg_catalog.portuguese);
+        ALTER TEXT SEARCH CONFIGURATION pt_unaccent
+            ALTER MAPPING FOR hword, hword_part, word WITH unaccent, portuguese_stem;
+    END IF;
+END
+$$;
+"""
+
+# Vetor da transação: descrição (A), categoria (B), igreja/campo/pastor (C) e usuário (D)
+CREATE_BUILD_FUNCTION = """
+CREATE OR REPLACE FUNCTION app_transaction_search_vector(
+    p_desc text, p_category_id bigint, p_church_id bigint, p_user_id bigint
+) RETURNS tsvector LANGUAGE sql STABLE AS $$
+    SELECT
+        setweight(to_tsvector('pt_unaccent', coalesce(p_desc, '')), 'A')
+        || setweight(to_tsvector('pt_unaccent', coalesce(
+            (SELECT name FROM app_category WHERE id = p_category_id), '')), 'B')
+        || setweight(to_tsvector('pt_unaccent', coalesce(
+            (SELECT concat_ws(' ', c.name, f.name, s.name)
+             FROM app_church c
+             JOIN app_field f ON f.id = c.field_id
+             JOIN app_shepherd s ON s.id = c.shepherd_id
+             WHERE c.id = p_church_id), '')), 'C')
+        || setweight(to_tsvector('pt_unaccent', coalesce(
+            (SELECT concat_ws(' ', first_name, last_name, username) FROM app_user WHERE id = p_user_id), '')), 'D')
+$$;
+"""
+
+# Inserção/alteração da transação: recalcula o vetor da própria linha
+CREATE_TRANSACTION_TRIGGER = """
+CREATE OR REPLACE FUNCTION app_transaction_search_vector_trigger() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    NEW.search_vector := app_transaction_search_vector(NEW."desc", NEW.category_id, NEW.church_id, NEW.user_id);
+    RETURN NEW;
+END
+$$;
+
+CREATE TRIGGER app_transaction_search_vector_update
+    BEFORE INSERT OR UPDATE OF "desc", category_id, church_id, user_id ON app_transaction
+    FOR EACH ROW EXECUTE FUNCTION app_transaction_search_vector_trigger();
+"""
+
+# Renomear categoria, igreja, campo, pastor ou usuário recalcula as transações afetadas
+CREATE_RENAME_TRIGGERS = """
+CREATE OR REPLACE FUNCTION app_transaction_search_vector_refresh() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    UPDATE app_transaction t
+    SET search_vector = app_transaction_search_vector(t."desc", t.category_id, t.church_id, t.user_id)
+    WHERE CASE TG_TABLE_NAME
+        WHEN 'app_category' THEN t.category_id = NEW.id
+        WHEN 'app_church' THEN t.church_id = NEW.id
+        WHEN 'app_field' THEN t.church_id IN (SELECT id FROM app_church WHERE field_id = NEW.id)
+        WHEN 'app_shepherd' THEN t.church_id IN (SELECT id FROM app_church WHERE shepherd_id = NEW.id)
+        WHEN 'app_user' THEN t.user_id = NEW.id
+    END;
+    RETURN NULL;
+END
+$$;
+
+CREATE TRIGGER app_category_search_vector_refresh
+    AFTER UPDATE OF name ON app_category FOR EACH ROW
+    WHEN (OLD.name IS DISTINCT FROM NEW.name)
+    EXECUTE FUNCTION app_transaction_search_vector_refresh();
+
+CREATE TRIGGER app_church_search_vector_refresh
+    AFTER UPDATE OF name, field_id, shepherd_id ON app_church FOR EACH ROW
+    WHEN (OLD.name IS DISTINCT FROM NEW.name
+          OR OLD.field_id IS DISTINCT FROM NEW.field_id
+          OR OLD.shepherd_id IS DISTINCT FROM NEW.shepherd_id)
+    EXECUTE FUNCTION app_transaction_search_vector_refresh();
+
+CREATE TRIGGER app_field_search_vector_refresh
+    AFTER UPDATE OF name ON app_field FOR EACH ROW
+    WHEN (OLD.name IS DISTINCT FROM NEW.name)
+    EXECUTE FUNCTION app_transaction_search_vector_refresh();
+
+CREATE TRIGGER app_shepherd_search_vector_refresh
+    AFTER UPDATE OF name ON app_shepherd FOR EACH ROW
+    WHEN (OLD.name IS DISTINCT FROM NEW.name)
+    EXECUTE FUNCTION app_transaction_search_vector_refresh();
+
+CREATE TRIGGER app_user_search_vector_refresh
+    AFTER UPDATE OF first_name, last_name, username ON app_user FOR EACH ROW
+    WHEN (OLD.first_name IS DISTINCT FROM NEW.first_name
+          OR OLD.last_name IS DISTINCT FROM NEW.last_name
+          OR OLD.username IS DISTINCT FROM NEW.username)
+    EXECUTE FUNCTION app_transaction_search_vector_refresh();
+"""
+
+RENAME_TRIGGERS = [
+    ('app_category', 'app_category_search_vector_refresh'),
+    ('app_church', 'app_church_search_vector_refresh'),
+    ('app_field', 'app_field_search_vector_refresh'),
+    ('app_shepherd', 'app_shepherd_search_vector_refresh'),
+    ('app_user', 'app_user_search_vector_refresh'),
+]
+
+
+def create_search_vector(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('ALTER TABLE app_transaction ADD COLUMN IF NOT EXISTS search_vector tsvector')
+    schema_editor.execute(CREATE_CONFIGURATION)
+    schema_editor.execute(CREATE_BUILD_FUNCTION)
+    schema_editor.execute(CREATE_TRANSACTION_TRIGGER)
+    schema_editor.execute(CREATE_RENAME_TRIGGERS)
+    # Preenche as transações existentes
+    schema_editor.execute(
+        'UPDATE app_transaction SET search_vector = '
+        'app_transaction_search_vector("desc", category_id, church_id, user_id)'
+    )
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS app_trans_search_vector_gin ON app_transaction USING gin (search_vector)'
+    )
+
+
+def drop_search_vector(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for table, trigger in RENAME_TRIGGERS:
+        schema_editor.execute(f'DROP TRIGGER IF EXISTS {trigger} ON {table}')
+    schema_editor.execute('DROP TRIGGER IF EXISTS app_transaction_search_vector_update ON app_transaction')
+    schema_editor.execute('DROP FUNCTION IF EXISTS app_transaction_search_vector_refresh()')
+    schema_editor.execute('DROP FUNCTION IF EXISTS app_transaction_search_vector_trigger()')
+    schema_editor.execute('DROP FUNCTION IF EXISTS app_transaction_search_vector(text, bigint, bigint, bigint)')
+    schema_editor.execute('ALTER TABLE app_transaction DROP COLUMN IF EXISTS search_vector')
+    schema_editor.execute('DROP TEXT SEARCH CONFIGURATION IF EXISTS pt_unaccent')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0014_trigram_search_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_vector, drop_search_vector),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.2.4 on 2026-10-18 15:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_field_and_shepherd(apps, schema_editor):
+    Church = apps.get_model("app", "Church")
+    ShepherdHistory = apps.get_model("app", "ShepherdHistory")
+    Transaction = apps.get_model("app", "Transaction")
+    TransactionMonthlyRollup = apps.get_model("app", "TransactionMonthlyRollup")
+    church_field = Subquery(Church.objects.filter(pk=OuterRef("church_id")).values("field_id")[:1])
+    # Pastor da igreja na data segundo o histórico; sem histórico, o pastor atual
+    history = ShepherdHistory.objects.filter(
+        Q(end_date__isnull=True) | Q(end_date__gte=OuterRef("date")),
+        church_id=OuterRef("church_id"),
+        start_date__lte=OuterRef("date"),
+    ).order_by("-start_date", "-id").values("shepherd_id")[:1]
+    current = Church.objects.filter(pk=OuterRef("church_id")).values("shepherd_id")[:1]
+    Transaction.objects.update(
+        field_id=church_field,
+        shepherd_at_time_id=Coalesce(Subquery(history), Subquery(current)),
+    )
+    TransactionMonthlyRollup.objects.update(field_id=church_field)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0015_transaction_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='field',
+            field=models.ForeignKey(editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, to='app.field', verbose_name='Campo'),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='shepherd_at_time',
+            field=models.ForeignKey(editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, to='app.shepherd', verbose_name='Pastor na Data'),
+        ),
+        migrations.AddField(
+            model_name='transactionmonthlyrollup',
+            name='field',
+            field=models.ForeignKey(editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, to='app.field', verbose_name='Campo'),
+        ),
+        migrations.RunPython(
+            backfill_field_and_shepherd,
+            reverse_code=migrations.RunPython.noop,
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['field', 'date'], include=('type', 'value'), name='app_trans_field_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['shepherd_at_time', 'date'], name='app_trans_shepherd_date_idx'),
+        ),
+    ]
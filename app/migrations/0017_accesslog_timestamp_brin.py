@@ -0,0 +1,29 @@
+from django.db import migrations
+
+
+def create_brin_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    # Logs são gravados em ordem de data e hora: BRIN guarda só o intervalo de
+    # cada faixa de blocos (índice minúsculo) e atende filtros por período
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS app_accesslog_timestamp_brin ON app_accesslog '
+        'USING brin ("timestamp") WITH (pages_per_range = 32)'
+    )
+
+
+def drop_brin_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS app_accesslog_timestamp_brin')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0016_transaction_field_shepherd_at_time'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_brin_index, drop_brin_index),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.4 on 2026-10-18 15:48
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0017_accesslog_timestamp_brin'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='accesslog',
+            name='created_at',
+            field=models.DateTimeField(db_column='timestamp', default=django.utils.timezone.now, editable=False, verbose_name='Data e Hora'),
+        ),
+    ]
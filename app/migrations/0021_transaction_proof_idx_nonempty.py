@@ -0,0 +1,21 @@
+# Generated by Django 5.2.4 on 2026-10-18 16:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0020_exportjob_zip_format'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='transaction',
+            name='app_trans_proof_idx',
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(condition=models.Q(('proof__isnull', False), models.Q(('proof', ''), _negated=True)), fields=['proof'], name='app_trans_proof_idx'),
+        ),
+    ]
@@ -1,11 +1,12 @@
 from django.conf import settings
-from django.db import models
+from django.db import connection, models, transaction as db_transaction
 from django.db.models.signals import pre_delete
 from django.dispatch import receiver
 from django.contrib.auth.models import AbstractUser
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 from django.core.validators import MinValueValidator
+from django.utils import timezone
 from django.utils.text import slugify
 from decimal import Decimal
 from datetime import datetime, timedelta
@@ -155,6 +156,16 @@ class Transaction(BaseModel):
     date = models.DateField(verbose_name="Data")
     user = models.ForeignKey(User, on_delete=models.CASCADE, verbose_name="Usuário")
     church = models.ForeignKey(Church, on_delete=models.CASCADE, verbose_name="Igreja")
+    # Cópias desnormalizadas (ver `app.attribution`): campo atual da igreja e
+    # pastor da igreja na data da transação, segundo o `ShepherdHistory`
+    field = models.ForeignKey(Field, on_delete=models.CASCADE, null=True, editable=False, verbose_name="Campo")
+    shepherd_at_time = models.ForeignKey(
+        Shepherd,
+        on_delete=models.SET_NULL,
+        null=True,
+        editable=False,
+        verbose_name="Pastor na Data"
+    )
     proof = models.FileField(
         upload_to=transaction_proof_path,
         blank=True,
@@ -166,6 +177,26 @@ class Transaction(BaseModel):
         verbose_name = "Transação"
         verbose_name_plural = "Transações"
         ordering = ['-updated_at', '-date', '-created_at']
+        indexes = [
+            # Paginação por cursor da lista de transações: ordem (-date, -id)
+            models.Index(fields=['date', 'id'], name='app_trans_date_id_idx'),
+            # Período (+ tipo): cobre as colunas dos totais e do escopo, permitindo
+            # SUMs só com o índice (index-only scan) no PostgreSQL
+            models.Index(
+                fields=['date', 'type'],
+                include=['value', 'category', 'church', 'user'],
+                name='app_trans_date_type_idx',
+            ),
+            # Filtros por igreja, usuário (tesoureiro) e categoria dentro do período
+            models.Index(fields=['church', 'date'], include=['type', 'value'], name='app_trans_church_date_idx'),
+            models.Index(fields=['user', 'date'], include=['type', 'value'], name='app_trans_user_date_idx'),
+            models.Index(fields=['category', 'date'], include=['type', 'value'], name='app_trans_cat_date_idx'),
+            # Filtros e quebras por campo sem join com app_church
+            models.Index(fields=['field', 'date'], include=['type', 'value'], name='app_trans_field_date_idx'),
+            models.Index(fields=['shepherd_at_time', 'date'], name='app_trans_shepherd_date_idx'),
+            # Parcial: apenas transações com comprovante (limpeza de comprovantes órfãos)
+            models.Index(fields=['proof'], condition=models.Q(proof__isnull=False) & ~models.Q(proof=''), name='app_trans_proof_idx'),
+        ]
 
     def __str__(self):
         return f"{self.get_type_display()} - {self.category.name} - R$ {self.value}"
@@ -180,6 +211,135 @@ class Transaction(BaseModel):
             raise ValidationError({
                 'proof': 'Esta categoria requer anexo de comprovante obrigatório.'
             })
+        # Meses fechados não aceitam novas transações nem alterações (data nova ou original)
+        if self.date and ClosedPeriod.is_closed(self.date):
+            raise ValidationError({
+                'date': 'Este mês está fechado e não aceita lançamentos ou alterações.'
+            })
+        if self.pk and self.is_in_closed_period():
+            raise ValidationError('Esta transação pertence a um mês fechado e não pode ser alterada.')
+
+    def is_in_closed_period(self):
+        """Indica se a data gravada da transação está em um mês fechado."""
+        stored_date = self._stored_date()
+        return bool(stored_date) and ClosedPeriod.is_closed(stored_date)
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or {'church', 'church_id', 'date'} & set(update_fields):
+            self.field_id = self.church.field_id
+            self.shepherd_at_time_id = ShepherdHistory.shepherd_at(self.church, self.date)
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'field', 'shepherd_at_time'}
+        # A gravação e a atualização do rollup mensal (via sinais) ocorrem na mesma transação do banco
+        with db_transaction.atomic():
+            ClosedPeriod.lock_for_write([self.date, self._stored_date()])
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with db_transaction.atomic():
+            ClosedPeriod.lock_for_write([self._stored_date()])
+            return super().delete(*args, **kwargs)
+
+    def _stored_date(self):
+        if not self.pk:
+            return None
+        return Transaction.objects.filter(pk=self.pk).values_list('date', flat=True).first()
+
+
+class TransactionMonthlyRollup(models.Model):
+    """Soma e quantidade de transações por mês, igreja, categoria, tipo e usuário.
+
+    Mantido pelos sinais de `app.rollups` na mesma transação de cada
+    gravação/exclusão de `Transaction`. `date` guarda o primeiro dia do mês e
+    os demais campos têm os mesmos nomes de `Transaction`, de modo que os
+    filtros das views (período em meses inteiros, categoria, tipo, igreja,
+    campo, pastor e usuário) se aplicam aos dois modelos sem adaptação.
+    """
+    date = models.DateField(verbose_name="Mês")
+    church = models.ForeignKey(Church, on_delete=models.CASCADE, verbose_name="Igreja")
+    # Campo atual da igreja (mesma cópia desnormalizada de `Transaction.field`)
+    field = models.ForeignKey(Field, on_delete=models.CASCADE, null=True, editable=False, verbose_name="Campo")
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, verbose_name="Categoria")
+    type = models.CharField(max_length=10, choices=Transaction.TYPE_CHOICES, verbose_name="Tipo")
+    user = models.ForeignKey(User, on_delete=models.CASCADE, verbose_name="Usuário")
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="Total (R$)")
+    count = models.PositiveIntegerField(default=0, verbose_name="Quantidade")
+
+    class Meta:
+        verbose_name = "Resumo Mensal de Transações"
+        verbose_name_plural = "Resumos Mensais de Transações"
+        ordering = ['-date']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['date', 'church', 'category', 'type', 'user'],
+                name='unique_transaction_monthly_rollup',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.date:%m/%Y} - {self.get_type_display()} - R$ {self.total} ({self.count})"
+
+
+class ClosedPeriod(BaseModel):
+    """Mês contábil fechado.
+
+    Transações do mês não podem ser criadas, editadas ou excluídas, de modo
+    que as linhas de `TransactionMonthlyRollup` do mês passam a ser os
+    agregados definitivos do período. Os totais apurados no fechamento ficam
+    registrados aqui; `created_by` é quem fechou o mês.
+    """
+    month = models.DateField(unique=True, verbose_name="Mês")
+    total_transactions = models.PositiveIntegerField(default=0, verbose_name="Transações")
+    total_income = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="Entradas (R$)")
+    total_expense = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="Saídas (R$)")
+
+    class Meta:
+        verbose_name = "Período Fechado"
+        verbose_name_plural = "Períodos Fechados"
+        ordering = ['-month']
+
+    def __str__(self):
+        return f"{self.month:%m/%Y}"
+
+    @property
+    def balance(self):
+        return self.total_income - self.total_expense
+
+    # Primeira chave dos advisory locks de mês: pg_advisory_xact_lock(LOCK_NAMESPACE, AAAAMM)
+    LOCK_NAMESPACE = 20251
+
+    @classmethod
+    def is_closed(cls, day):
+        """Indica se o mês da data informada está fechado."""
+        return cls.objects.filter(month=day.replace(day=1)).exists()
+
+    @classmethod
+    def lock_months(cls, days, exclusive=False):
+        """Trava os meses das datas até o fim da transação do banco (deve rodar em `atomic()`).
+
+        Gravações de transações pegam o lock compartilhado (não se bloqueiam
+        entre si) e o fechamento do mês o exclusivo, então um fechamento
+        espera as gravações em andamento no mês e as novas esperam o
+        fechamento terminar. Advisory locks do PostgreSQL; no SQLite as
+        escritas já são serializadas pelo banco.
+        """
+        if connection.vendor != 'postgresql':
+            return
+        function = 'pg_advisory_xact_lock' if exclusive else 'pg_advisory_xact_lock_shared'
+        with connection.cursor() as cursor:
+            # Sempre na mesma ordem, sem deadlock entre gravações de vários meses
+            for key in sorted({day.year * 100 + day.month for day in days if day}):
+                cursor.execute(f'SELECT {function}(%s, %s)', [cls.LOCK_NAMESPACE, key])
+
+    @classmethod
+    def lock_for_write(cls, days):
+        """Trava os meses das datas para gravação e falha se algum estiver fechado (verificação sob o lock)."""
+        from django.core.exceptions import ValidationError
+        cls.lock_months(days)
+        closed = cls.objects.filter(month__in={day.replace(day=1) for day in days if day}).order_by('month').first()
+        if closed:
+            raise ValidationError(f'O mês {closed} está fechado e não aceita lançamentos ou alterações.')
 
 
 class AccessLog(BaseModel):
@@ -191,7 +351,8 @@ class AccessLog(BaseModel):
         ('delete', 'Exclusão'),
     ]
 
-    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Data e Hora", db_column='timestamp')
+    # Hora do registro, não da gravação: entradas do log são gravadas em lote (app/audit.py)
+    created_at = models.DateTimeField(default=timezone.now, editable=False, verbose_name="Data e Hora", db_column='timestamp')
     user = models.ForeignKey(User, on_delete=models.CASCADE, verbose_name="Usuário")
     action = models.CharField(max_length=20, choices=ACTION_CHOICES, verbose_name="Ação")
     content_type = models.ForeignKey(ContentType, on_delete=models.SET_NULL, null=True, blank=True)
@@ -213,22 +374,66 @@ class AccessLog(BaseModel):
         super().save(*args, **kwargs)
 
 
+class ExportJob(BaseModel):
+    """Exportação de transações gerada em segundo plano (`run_export_jobs`).
+
+    `query` guarda os filtros da lista (query string) e o arquivo gerado
+    fica no volume de mídia, baixado pelo dono via X-Accel-Redirect.
+    """
+    FORMAT_CHOICES = [
+        ('pdf', 'PDF'),
+        ('xlsx', 'Excel (XLSX)'),
+        ('csv', 'CSV'),
+        ('zip', 'PDFs por campo/igreja (ZIP)'),
+    ]
+    STATUS_CHOICES = [
+        ('pending', 'Na fila'),
+        ('running', 'Gerando'),
+        ('done', 'Concluída'),
+        ('failed', 'Falhou'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='export_jobs', verbose_name="Usuário")
+    format = models.CharField(max_length=4, choices=FORMAT_CHOICES, verbose_name="Formato")
+    query = models.TextField(blank=True, verbose_name="Filtros")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending', verbose_name="Situação")
+    total_rows = models.PositiveIntegerField(null=True, blank=True, verbose_name="Total de Linhas")
+    processed_rows = models.PositiveIntegerField(default=0, verbose_name="Linhas Processadas")
+    file = models.FileField(upload_to='exports/', max_length=255, blank=True, verbose_name="Arquivo")
+    error = models.TextField(blank=True, verbose_name="Erro")
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name="Iniciada em")
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name="Concluída em")
+
+    class Meta(BaseModel.Meta):
+        verbose_name = "Exportação"
+        verbose_name_plural = "Exportações"
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='app_exportjob_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_format_display()} - {self.user} - {self.get_status_display()}"
+
+    @property
+    def progress(self):
+        """Percentual concluído (0-100)."""
+        if self.status == 'done':
+            return 100
+        if not self.total_rows:
+            return 0
+        # O PDF ainda é montado depois de lidas as linhas: 99% no máximo até concluir
+        return min(99, self.processed_rows * 100 // self.total_rows)
+
+
 def log_action(user, action, obj=None, description='', request=None):
-    if user and (user.is_superuser or user.email == settings.SYSTEM_HIDDEN_EMAIL):
-        return
-    kwargs = {
-        'user': user,
-        'action': action,
-        'description': description,
-    }
-    if obj:
-        kwargs['content_object'] = obj
-        if not description:
-            kwargs['description'] = f'{action} em {obj._meta.verbose_name}'
-    try:
-        AccessLog.objects.create(**kwargs)
-    except Exception:
-        pass
+    """Registra uma ação no log de auditoria.
+
+    A entrada só é gravada se a transação do banco atual for confirmada e,
+    em requisições, é gravada em lote após a resposta (`app/audit.py`).
+    """
+    from . import audit
+    audit.record(user, action, obj, description)
 
 
 class Notification(BaseModel):
@@ -289,6 +494,16 @@ class ShepherdHistory(BaseModel):
         verbose_name_plural = "Histórico de Pastores"
         ordering = ['-start_date']
 
+    @classmethod
+    def shepherd_at(cls, church, day):
+        """ID do pastor da igreja na data (o da igreja, se o histórico não cobre a data)."""
+        shepherd_id = cls.objects.filter(
+            models.Q(end_date__isnull=True) | models.Q(end_date__gte=day),
+            church_id=church.pk,
+            start_date__lte=day,
+        ).order_by('-start_date', '-id').values_list('shepherd_id', flat=True).first()
+        return shepherd_id or church.shepherd_id
+
     def __str__(self):
         end = self.end_date.strftime('%d/%m/%Y') if self.end_date else 'Atual'
         return f"{self.shepherd.name} → {self.church.name} ({self.start_date.strftime('%d/%m/%Y')} - {end})"
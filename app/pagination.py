@@ -0,0 +1,186 @@
+"""Paginação por cursor (keyset) e estratégias de contagem para listas grandes.
+
+Em vez de `OFFSET`, cada página parte da chave da última (ou primeira)
+linha da página anterior: `(date, id) < (d, i)` na ordem `(-date, -id)`.
+O custo de uma página independe da sua posição, e linhas com a mesma data
+não se repetem nem somem entre páginas (o `id` desempata).
+
+O cursor é opaco para o cliente (JSON em base64 url-safe) e carrega a
+direção, a chave de posição e o número da página exibido na interface.
+Listas em outra ordem (ex.: por relevância da busca textual) usam
+`offset_page`, com a mesma interface e cursores que carregam só a página.
+
+`count_items` conta os itens de uma lista com uma de três estratégias:
+- `exact`: `COUNT(*)` exato
+- `capped`: conta no máximo `cap` linhas; acima disso informa "cap+"
+- `estimate` (PostgreSQL): até `cap` linhas conta exatamente; acima usa
+  `reltuples` (tabela sem filtros) ou a estimativa de linhas do `EXPLAIN`
+"""
+import base64
+import binascii
+import json
+from datetime import date
+
+from django.db import connections
+from django.db.models import Q
+
+
+COUNT_EXACT = 'exact'
+COUNT_CAPPED = 'capped'
+COUNT_ESTIMATE = 'estimate'
+
+# Até este número de linhas a contagem é sempre exata (barata e sem erro de estimativa)
+COUNT_CAP = 10000
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(data):
+    raw = json.dumps(data, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Decodifica e valida um cursor; levanta `InvalidCursor` se malformado."""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        data = json.loads(raw)
+        direction = data['dir']
+        page = int(data['p'])
+        if direction in ('last', 'page'):
+            return {'dir': direction, 'p': page}
+        if direction not in ('next', 'prev'):
+            raise ValueError(direction)
+        return {
+            'dir': direction,
+            'p': page,
+            'date': date.fromisoformat(data['d']),
+            'id': int(data['i']),
+        }
+    except (binascii.Error, ValueError, TypeError, KeyError) as e:
+        raise InvalidCursor(str(e)) from e
+
+
+def _position_cursor(direction, page, item):
+    return encode_cursor({'dir': direction, 'p': page, 'd': item.date.isoformat(), 'i': item.pk})
+
+
+def keyset_page(queryset, token, per_page, total_items):
+    """Página de `queryset` na ordem `(-date, -id)` a partir do cursor `token`.
+
+    `total_items` (já calculado para os totais da lista) é usado apenas para
+    o número de páginas e para o tamanho da última página, de modo que as
+    páginas coincidam com a numeração exibida. Retorna `(items, pagination)`.
+    """
+    total_pages = max(1, (total_items + per_page - 1) // per_page)
+    cursor = decode_cursor(token) if token else {'dir': 'first', 'p': 1}
+    if cursor['dir'] == 'page':
+        # Cursor de `offset_page` (a ordem da lista mudou): volta ao início
+        cursor = {'dir': 'first', 'p': 1}
+    page = min(max(cursor['p'], 1), total_pages)
+
+    if cursor['dir'] == 'last':
+        # Última página: as N linhas mais antigas, com N = resto da divisão
+        size = total_items - (total_pages - 1) * per_page or per_page
+        items = list(queryset.order_by('date', 'id')[:size])[::-1]
+        has_previous, has_next = total_pages > 1, False
+    elif cursor['dir'] == 'prev':
+        after = Q(date__gte=cursor['date']) & (Q(date__gt=cursor['date']) | Q(date=cursor['date'], id__gt=cursor['id']))
+        items = list(queryset.filter(after).order_by('date', 'id')[:per_page + 1])
+        has_previous = len(items) > per_page
+        items = items[:per_page][::-1]
+        has_next = True
+    else:
+        if cursor['dir'] == 'next':
+            # `date <= d` redundante delimita a varredura do índice (date, id)
+            before = Q(date__lte=cursor['date']) & (Q(date__lt=cursor['date']) | Q(date=cursor['date'], id__lt=cursor['id']))
+            queryset = queryset.filter(before)
+        items = list(queryset.order_by('-date', '-id')[:per_page + 1])
+        has_next = len(items) > per_page
+        items = items[:per_page]
+        has_previous = cursor['dir'] == 'next'
+
+    pagination = {
+        'mode': 'cursor',
+        'current_page': page,
+        'total_pages': total_pages,
+        'per_page': per_page,
+        'total_items': total_items,
+        'has_previous': has_previous,
+        'has_next': has_next,
+        'previous_cursor': _position_cursor('prev', page - 1, items[0]) if has_previous and items else None,
+        'next_cursor': _position_cursor('next', page + 1, items[-1]) if has_next and items else None,
+        'last_cursor': encode_cursor({'dir': 'last', 'p': total_pages}) if total_pages > 1 else None,
+    }
+    return items, pagination
+
+
+def offset_page(queryset, token, per_page, total_items):
+    """Página de `queryset` (já ordenado) por OFFSET, com a interface de `keyset_page`.
+
+    Para ordens sem chave de posição estável, como a relevância da busca
+    textual; os cursores carregam apenas o número da página.
+    """
+    total_pages = max(1, (total_items + per_page - 1) // per_page)
+    cursor = decode_cursor(token) if token else {'dir': 'page', 'p': 1}
+    page = min(max(cursor['p'], 1), total_pages) if cursor['dir'] in ('page', 'last') else 1
+    start = (page - 1) * per_page
+    items = list(queryset[start:start + per_page])
+    has_previous, has_next = page > 1, page < total_pages
+    pagination = {
+        'mode': 'cursor',
+        'current_page': page,
+        'total_pages': total_pages,
+        'per_page': per_page,
+        'total_items': total_items,
+        'has_previous': has_previous,
+        'has_next': has_next,
+        'previous_cursor': encode_cursor({'dir': 'page', 'p': page - 1}) if has_previous else None,
+        'next_cursor': encode_cursor({'dir': 'page', 'p': page + 1}) if has_next else None,
+        'last_cursor': encode_cursor({'dir': 'page', 'p': total_pages}) if total_pages > 1 else None,
+    }
+    return items, pagination
+
+
+def _capped_count(queryset, cap):
+    return queryset.order_by().values('pk')[:cap + 1].count()
+
+
+def _estimated_count(queryset):
+    """Estimativa do planejador do PostgreSQL (None se indisponível)."""
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    if not queryset.query.where:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                [queryset.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        # -1: tabela ainda não analisada
+        return row[0] if row and row[0] >= 0 else None
+    plan = json.loads(queryset.order_by().explain(format='json'))
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def count_items(queryset, strategy=COUNT_EXACT, cap=COUNT_CAP):
+    """Conta os itens do queryset. Retorna `(total, tipo)`.
+
+    `tipo` é a estratégia que produziu o total: `exact` até `cap` linhas
+    (em qualquer estratégia), `capped` quando o total é o limite ("cap+")
+    e `estimate` quando é uma estimativa do PostgreSQL; fora do PostgreSQL
+    `estimate` cai para `capped`.
+    """
+    if strategy == COUNT_EXACT:
+        return queryset.count(), COUNT_EXACT
+    total = _capped_count(queryset, cap)
+    if total <= cap:
+        return total, COUNT_EXACT
+    if strategy == COUNT_ESTIMATE:
+        estimate = _estimated_count(queryset)
+        if estimate is not None:
+            return max(estimate, cap + 1), COUNT_ESTIMATE
+    return cap, COUNT_CAPPED
@@ -0,0 +1,202 @@
+"""Particionamento por intervalo (RANGE) de tabelas grandes no PostgreSQL.
+
+Opcional: a conversão é feita por comando (`partition_transactions`,
+`partition_access_logs`), não por migração. Cada tabela particionada tem
+uma partição por período (ano ou mês) e uma partição padrão para datas sem
+partição; consultas com período leem apenas as partições do intervalo
+(partition pruning).
+
+Os limites de partições por `timestamp` são meia-noite UTC (fuso da
+conexão do Django com `USE_TZ`).
+"""
+from datetime import date, datetime
+
+
+class RangePartitioning:
+    """Particionamento de `table` por `column`, por ano ou por mês (`monthly`)."""
+
+    def __init__(self, table, column, monthly=False):
+        self.table = table
+        self.column = column
+        self.monthly = monthly
+        self.default_partition = f"{table}_default"
+
+    def period_start(self, day):
+        return date(day.year, day.month if self.monthly else 1, 1)
+
+    def next_start(self, start):
+        if not self.monthly:
+            return date(start.year + 1, 1, 1)
+        return date(start.year + start.month // 12, start.month % 12 + 1, 1)
+
+    def partition_name(self, start):
+        if self.monthly:
+            return f"{self.table}_p{start:%Y%m}"
+        return f"{self.table}_y{start.year}"
+
+    def partition_start(self, name):
+        """Início do período de uma partição pelo nome (None para a padrão/desconhecidas)."""
+        suffix = name[len(self.table) + 1:]
+        try:
+            if self.monthly and suffix.startswith("p"):
+                return datetime.strptime(suffix[1:], "%Y%m").date()
+            if not self.monthly and suffix.startswith("y"):
+                return date(int(suffix[1:]), 1, 1)
+        except ValueError:
+            pass
+        return None
+
+    def is_partitioned(self, cursor):
+        cursor.execute(
+            "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s))",
+            [self.table],
+        )
+        return cursor.fetchone()[0]
+
+    def partitions(self, cursor):
+        """Nomes das partições anexadas, em ordem."""
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = %s::regclass ORDER BY c.relname",
+            [self.table],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+    def create_partition(self, cursor, start):
+        """Cria a partição do período, movendo as linhas dele que estejam na partição padrão.
+
+        Retorna o nome da partição criada (None se já existia).
+        """
+        name = self.partition_name(start)
+        cursor.execute("SELECT to_regclass(%s) IS NOT NULL", [name])
+        if cursor.fetchone()[0]:
+            return None
+        bounds = [start, self.next_start(start)]
+        create = f"CREATE TABLE {name} PARTITION OF {self.table} FOR VALUES FROM (%s) TO (%s)"
+        in_range = f'"{self.column}" >= %s AND "{self.column}" < %s'
+        cursor.execute(f"SELECT EXISTS (SELECT 1 FROM {self.default_partition} WHERE {in_range})", bounds)
+        if not cursor.fetchone()[0]:
+            cursor.execute(create, bounds)
+            return name
+        # A partição padrão não pode conter linhas do novo intervalo ao criá-lo
+        cursor.execute(f"ALTER TABLE {self.table} DETACH PARTITION {self.default_partition}")
+        cursor.execute(create, bounds)
+        cursor.execute(f"INSERT INTO {name} SELECT * FROM {self.default_partition} WHERE {in_range}", bounds)
+        cursor.execute(f"DELETE FROM {self.default_partition} WHERE {in_range}", bounds)
+        cursor.execute(f"ALTER TABLE {self.table} ATTACH PARTITION {self.default_partition} DEFAULT")
+        return name
+
+    def create_partitions(self, cursor, first, last):
+        """Cria as partições faltantes de `first` até `last` (inclusive). Retorna os nomes criados."""
+        created = []
+        start = self.period_start(first)
+        while start <= last:
+            name = self.create_partition(cursor, start)
+            if name:
+                created.append(name)
+            start = self.next_start(start)
+        return created
+
+    def convert(self, cursor, last):
+        """Recria a tabela como particionada, com partições até `last`, e copia as linhas.
+
+        Índices, FKs e triggers são recriados na tabela nova. A chave
+        primária passa a ser `(id, coluna)` e uma sequência própria continua
+        a numeração (IDENTITY não é suportado em tabelas particionadas antes
+        do PostgreSQL 17). Deve rodar em uma transação. Retorna as linhas copiadas.
+        """
+        table, old = self.table, f"{self.table}_unpartitioned"
+        cursor.execute(f"LOCK TABLE {table} IN ACCESS EXCLUSIVE MODE")
+
+        cursor.execute(
+            "SELECT indexname, indexdef FROM pg_indexes WHERE schemaname = current_schema() "
+            "AND tablename = %s AND indexname <> %s",
+            [table, f"{table}_pkey"],
+        )
+        indexes = cursor.fetchall()
+        cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = %s::regclass AND contype = 'f'",
+            [table],
+        )
+        foreign_keys = cursor.fetchall()
+        cursor.execute(
+            "SELECT pg_get_triggerdef(oid) FROM pg_trigger WHERE tgrelid = %s::regclass AND NOT tgisinternal",
+            [table],
+        )
+        triggers = [row[0] for row in cursor.fetchall()]
+        cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", [table])
+        old_sequence = cursor.fetchone()[0]
+        cursor.execute(f'SELECT MIN("{self.column}") FROM {table}')
+        oldest = cursor.fetchone()[0]
+        if isinstance(oldest, datetime):
+            oldest = oldest.date()
+        first = min(oldest or last, date.today())
+
+        # Libera os nomes de índices e da chave primária para a tabela nova
+        for name, _ in indexes:
+            cursor.execute(f'DROP INDEX "{name}"')
+        cursor.execute(f"ALTER TABLE {table} RENAME CONSTRAINT {table}_pkey TO {old}_pkey")
+        cursor.execute(f"ALTER TABLE {table} RENAME TO {old}")
+
+        cursor.execute(
+            f"CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING STORAGE) "
+            f'PARTITION BY RANGE ("{self.column}")'
+        )
+        # A chave primária de uma tabela particionada precisa incluir a coluna da partição
+        cursor.execute(f'ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY (id, "{self.column}")')
+        cursor.execute(f"CREATE SEQUENCE {table}_id_partitioned_seq")
+        if old_sequence:
+            cursor.execute(f"SELECT setval('{table}_id_partitioned_seq', last_value, is_called) FROM {old_sequence}")
+        cursor.execute(f"ALTER TABLE {table} ALTER COLUMN id SET DEFAULT nextval('{table}_id_partitioned_seq')")
+
+        cursor.execute(f"CREATE TABLE {self.default_partition} PARTITION OF {table} DEFAULT")
+        self.create_partitions(cursor, first, last)
+
+        cursor.execute(f"INSERT INTO {table} SELECT * FROM {old}")
+        copied = cursor.rowcount
+        cursor.execute(f"DROP TABLE {old}")
+        cursor.execute(f"ALTER SEQUENCE {table}_id_partitioned_seq RENAME TO {table}_id_seq")
+        cursor.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id")
+
+        for name, definition in foreign_keys:
+            cursor.execute(f'ALTER TABLE {table} ADD CONSTRAINT "{name}" {definition}')
+        for _, definition in indexes:
+            cursor.execute(definition)
+        for definition in triggers:
+            cursor.execute(definition)
+        cursor.execute(f"ANALYZE {table}")
+        return copied
+
+    def older_partitions(self, cursor, before):
+        """Partições cujo período inteiro é anterior a `before`."""
+        return [
+            name for name in self.partitions(cursor)
+            if (start := self.partition_start(name)) and self.next_start(start) <= before
+        ]
+
+    def detached_partitions(self, cursor, before):
+        """Tabelas de partições já desanexadas (nome no formato das partições) com período anterior a `before`."""
+        cursor.execute(
+            "SELECT c.relname FROM pg_class c WHERE c.relkind = 'r' AND c.relnamespace = current_schema()::regnamespace "
+            "AND c.relname LIKE %s AND NOT c.relispartition ORDER BY c.relname",
+            [f"{self.table}\\_%"],
+        )
+        return [
+            name for (name,) in cursor.fetchall()
+            if (start := self.partition_start(name)) and self.next_start(start) <= before
+        ]
+
+    def set_tablespace(self, cursor, name, tablespace):
+        """Move a partição e seus índices para o tablespace."""
+        cursor.execute(f'ALTER TABLE {name} SET TABLESPACE "{tablespace}"')
+        cursor.execute(
+            "SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid WHERE i.indrelid = %s::regclass",
+            [name],
+        )
+        for (index,) in cursor.fetchall():
+            cursor.execute(f'ALTER INDEX "{index}" SET TABLESPACE "{tablespace}"')
+
+
+TRANSACTIONS = RangePartitioning("app_transaction", "date")
+ACCESS_LOGS = RangePartitioning("app_accesslog", "timestamp", monthly=True)
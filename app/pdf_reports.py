@@ -0,0 +1,124 @@
+"""Relatórios PDF por campo ou por igreja reunidos em um ZIP (fechamento mensal).
+
+O ReportLab usa um único núcleo, então cada relatório é gerado em um
+processo de um `ProcessPoolExecutor` (fork; um processo por núcleo
+disponível ao container, ver `available_cpus`) e gravado em um arquivo
+temporário. O processo principal adiciona cada PDF ao ZIP assim que ele
+fica pronto, na ordem de conclusão, e apaga o temporário: o ZIP é escrito
+em sequência e o disco guarda no máximo um PDF por processo.
+
+Não deve ser chamado nos workers do gunicorn (fork de um processo web):
+os usos são o `run_export_jobs` (formato `zip` de `ExportJob`) e o
+comando `export_pdf_reports`.
+"""
+import math
+import multiprocessing
+import os
+import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.conf import settings
+from django.db import connections
+from django.http import QueryDict
+from django.utils.text import slugify
+
+from . import exports
+from .filters import TransactionFilter
+from .models import User
+
+
+# Agrupamento: coluna do ID, coluna do nome e atributo do TransactionFilter
+GROUPS = {
+    'field': ('field_id', 'field__name', 'fields'),
+    'church': ('church_id', 'church__name', 'churches'),
+}
+
+
+def available_cpus():
+    """Núcleos disponíveis: afinidade do processo limitada pela cota de CPU do cgroup (`limits.cpus` do compose)."""
+    cpus = len(os.sched_getaffinity(0))
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as f:
+            quota, period = f.read().split()
+        if quota != 'max':
+            cpus = min(cpus, max(1, math.ceil(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+
+def groups(transaction_filter, group):
+    """(id, nome) dos campos ou igrejas com transações nos filtros, em ordem alfabética."""
+    column, name, _ = GROUPS[group]
+    return list(
+        transaction_filter.queryset()
+        .filter(**{f'{column}__isnull': False})
+        .order_by(name, column)
+        .values_list(column, name)
+        .distinct()
+    )
+
+
+def _filenames(items):
+    """Nome do PDF de cada grupo no ZIP (nome do campo/igreja, com o ID se repetido)."""
+    names = {}
+    used = set()
+    for group_id, name in items:
+        filename = slugify(name) or str(group_id)
+        if filename in used:
+            filename = f'{filename}-{group_id}'
+        used.add(filename)
+        names[group_id] = f'{filename}.pdf'
+    return names
+
+
+def _render(user_id, query, group, group_id, path):
+    """Executado no processo filho: gera o PDF de um campo/igreja e retorna o número de transações."""
+    transaction_filter = TransactionFilter.from_get(User.objects.get(pk=user_id), QueryDict(query))
+    # IDs vindos de `groups`, já dentro do escopo e dos filtros do usuário
+    setattr(transaction_filter, GROUPS[group][2], [group_id])
+    try:
+        with open(path, 'wb') as output:
+            return exports.write_pdf(transaction_filter, output)
+    finally:
+        connections.close_all()
+
+
+def write_zip(user, query, group, output, progress=None, max_workers=None):
+    """Grava em `output` um ZIP com um PDF por campo ou igreja (`group`) das transações filtradas.
+
+    `query` é a query string dos filtros da lista; `progress(linhas)` é
+    chamado com o total de transações já geradas a cada PDF concluído.
+    Retorna o número de PDFs.
+    """
+    items = groups(TransactionFilter.from_get(user, QueryDict(query)), group)
+    names = _filenames(items)
+    max_workers = min(max_workers or settings.PDF_REPORT_WORKERS or available_cpus(), len(items))
+
+    with zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED) as archive:
+        if not items:
+            return 0
+        with tempfile.TemporaryDirectory(prefix='pdf-reports-') as tmp:
+            # Os processos filhos (fork) abrem as próprias conexões com o banco
+            connections.close_all()
+            pool = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('fork'))
+            try:
+                futures = {
+                    pool.submit(_render, user.pk, query, group, group_id, os.path.join(tmp, f'{group_id}.pdf')): group_id
+                    for group_id, _ in items
+                }
+                done = 0
+                for future in as_completed(futures):
+                    group_id = futures[future]
+                    done += future.result()
+                    path = os.path.join(tmp, f'{group_id}.pdf')
+                    archive.write(path, names[group_id])
+                    os.remove(path)
+                    if progress:
+                        progress(done)
+            except BaseException:
+                pool.shutdown(wait=True, cancel_futures=True)
+                raise
+            pool.shutdown()
+    return len(items)
@@ -0,0 +1,41 @@
+"""Fechamento de meses contábeis.
+
+Fechar um mês recalcula as linhas do rollup mensal a partir das transações
+(garantindo agregados exatos) e registra os totais em `ClosedPeriod`. A
+partir daí `Transaction.clean()` e as views de edição/exclusão bloqueiam
+alterações no mês, então os agregados do período não mudam mais. O
+fechamento e as gravações de transações do mês são serializados por um
+advisory lock do mês (`ClosedPeriod.lock_months`), e `Transaction.save()`,
+`Transaction.delete()` e a exclusão em lote repetem a verificação de mês
+fechado sob esse lock.
+"""
+from datetime import date
+
+from django.core.exceptions import ValidationError
+from django.db import transaction as db_transaction
+
+from . import aggregations, rollups
+from .models import ClosedPeriod, TransactionMonthlyRollup
+
+
+def close_month(month, user):
+    """Fecha o mês (primeiro dia) e retorna o `ClosedPeriod` criado."""
+    month = month.replace(day=1)
+    if month >= date.today().replace(day=1):
+        raise ValidationError('Apenas meses anteriores ao mês atual podem ser fechados.')
+    with db_transaction.atomic():
+        # Espera as gravações em andamento no mês e bloqueia novas até o commit
+        ClosedPeriod.lock_months([month], exclusive=True)
+        if ClosedPeriod.objects.filter(month=month).exists():
+            raise ValidationError(f'O mês {month:%m/%Y} já está fechado.')
+        rollups.rebuild(month)
+        totals = aggregations.totals(TransactionMonthlyRollup.objects.filter(date=month))
+        return ClosedPeriod.objects.create(
+            month=month,
+            total_transactions=totals['total_transactions'],
+            total_income=totals['total_income'],
+            total_expense=totals['total_expense'],
+            created_by=user,
+            updated_by=user,
+        )
+
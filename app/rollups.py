@@ -0,0 +1,197 @@
+"""Manutenção incremental do rollup mensal de transações.
+
+Cada gravação ou exclusão de `Transaction` vira uma variação (valor,
+quantidade) na linha do rollup da sua chave (mês, igreja, categoria, tipo,
+usuário). Edições que mudam a chave (igreja, categoria, tipo, usuário ou
+mês) subtraem da linha antiga e somam na nova. Os sinais rodam dentro da
+transação do banco aberta por `Transaction.save()`/`delete()`, então o
+rollup nunca fica divergente das transações.
+"""
+import threading
+from calendar import monthrange
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction as db_transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncMonth
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .models import Church, Transaction, TransactionMonthlyRollup
+
+
+KEY_FIELDS = ('date', 'church_id', 'category_id', 'type', 'user_id')
+
+_state = threading.local()
+
+
+def _key(values):
+    return (values['date'].replace(day=1), values['church_id'], values['category_id'], values['type'], values['user_id'])
+
+
+def _instance_values(instance):
+    return {name: getattr(instance, name) for name in KEY_FIELDS + ('value',)}
+
+
+def _month_end(day):
+    return day.replace(day=monthrange(day.year, day.month)[1])
+
+
+def covers_whole_months(start_date, end_date):
+    """Indica se o período começa no dia 1 e termina no último dia de um mês."""
+    return (
+        start_date <= end_date
+        and start_date.day == 1
+        and end_date == _month_end(end_date)
+    )
+
+
+def split_period(start_date, end_date):
+    """Divide o período em meses inteiros e intervalos de meses parciais.
+
+    Retorna (meses, intervalos): `meses` é a lista (contígua) do primeiro dia
+    de cada mês inteiro contido no período e `intervalos` são os pares
+    (início, fim) das pontas que não cobrem um mês inteiro.
+    """
+    if start_date > end_date:
+        return [], []
+    first = start_date if start_date.day == 1 else _month_end(start_date) + timedelta(days=1)
+    last = end_date if end_date == _month_end(end_date) else end_date.replace(day=1) - timedelta(days=1)
+    if first > last:
+        return [], [(start_date, end_date)]
+    months = []
+    month = first
+    while month <= last:
+        months.append(month)
+        month = _month_end(month) + timedelta(days=1)
+    ranges = []
+    if start_date < first:
+        ranges.append((start_date, first - timedelta(days=1)))
+    if last < end_date:
+        ranges.append((last + timedelta(days=1), end_date))
+    return months, ranges
+
+
+def apply(deltas):
+    """Aplica {chave: [valor, quantidade]} às linhas do rollup."""
+    for key, (value, count) in deltas.items():
+        if not value and not count:
+            continue
+        lookup = dict(zip(KEY_FIELDS, key))
+        rows = TransactionMonthlyRollup.objects.filter(**lookup)
+        updated = rows.update(total=F('total') + value, count=F('count') + count)
+        if not updated and count <= 0:
+            # Linha já removida (ex.: exclusão em cascata da igreja ou do usuário)
+            continue
+        if not updated:
+            try:
+                with db_transaction.atomic():
+                    TransactionMonthlyRollup.objects.create(
+                        total=value,
+                        count=count,
+                        field_id=Church.objects.filter(pk=lookup['church_id']).values_list('field_id', flat=True).first(),
+                        **lookup,
+                    )
+            except IntegrityError:
+                # Linha criada por outra requisição entre o UPDATE e o INSERT
+                rows.update(total=F('total') + value, count=F('count') + count)
+        if count < 0:
+            rows.filter(count__lte=0).delete()
+
+
+def _record(deltas):
+    pending = getattr(_state, 'pending', None)
+    if pending is None:
+        apply(deltas)
+        return
+    for key, (value, count) in deltas.items():
+        pending[key][0] += value
+        pending[key][1] += count
+
+
+@contextmanager
+def batch():
+    """Acumula as variações do rollup e aplica uma vez por chave ao sair.
+
+    Usado em operações em lote (ex.: `transaction_bulk_delete`); deve rodar
+    dentro do mesmo `atomic()` da operação.
+    """
+    if getattr(_state, 'pending', None) is not None:
+        yield
+        return
+    _state.pending = defaultdict(lambda: [0, 0])
+    try:
+        yield
+        deltas = _state.pending
+    finally:
+        _state.pending = None
+    apply(deltas)
+
+
+def rebuild(month=None):
+    """Recalcula o rollup a partir das transações (ex.: após `bulk_create`).
+
+    Com `month` (primeiro dia do mês) recalcula apenas as linhas desse mês.
+    Agrupa pela chave única do rollup; o campo vem da igreja, como em
+    `apply`, e não do `field_id` gravado na transação (que pode divergir).
+    """
+    transactions = Transaction.objects.all()
+    rollups = TransactionMonthlyRollup.objects.all()
+    if month is not None:
+        transactions = transactions.filter(date__gte=month, date__lte=_month_end(month))
+        rollups = rollups.filter(date=month)
+    rows = (
+        transactions.order_by()
+        .values('church_id', 'category_id', 'type', 'user_id', month=TruncMonth('date'))
+        .annotate(total=Sum('value'), count=Count('id'))
+    )
+    church_fields = dict(Church.objects.values_list('id', 'field_id'))
+    with db_transaction.atomic():
+        rollups.delete()
+        TransactionMonthlyRollup.objects.bulk_create(
+            [
+                TransactionMonthlyRollup(
+                    date=row['month'],
+                    church_id=row['church_id'],
+                    field_id=church_fields.get(row['church_id']),
+                    category_id=row['category_id'],
+                    type=row['type'],
+                    user_id=row['user_id'],
+                    total=row['total'],
+                    count=row['count'],
+                )
+                for row in rows
+            ],
+            batch_size=1000,
+        )
+
+
+@receiver(pre_save, sender=Transaction)
+def remember_previous_rollup_key(sender, instance, **kwargs):
+    instance._rollup_previous = None
+    if instance.pk:
+        instance._rollup_previous = (
+            Transaction.objects.filter(pk=instance.pk).values(*KEY_FIELDS, 'value').first()
+        )
+
+
+@receiver(post_save, sender=Transaction)
+def update_rollup_on_save(sender, instance, **kwargs):
+    deltas = defaultdict(lambda: [0, 0])
+    previous = getattr(instance, '_rollup_previous', None)
+    if previous:
+        deltas[_key(previous)][0] -= previous['value']
+        deltas[_key(previous)][1] -= 1
+    current = _instance_values(instance)
+    deltas[_key(current)][0] += current['value']
+    deltas[_key(current)][1] += 1
+    _record(deltas)
+    instance._rollup_previous = None
+
+
+@receiver(post_delete, sender=Transaction)
+def update_rollup_on_delete(sender, instance, **kwargs):
+    values = _instance_values(instance)
+    _record({_key(values): [-values['value'], -1]})
@@ -0,0 +1,206 @@
+"""Escopo de visibilidade por usuário, pré-calculado e guardado no cache.
+
+`UserScope` guarda os IDs de campos, igrejas e usuários visíveis a um
+usuário, para que as views filtrem transações com `IN (...)` simples em vez
+de montar, a cada requisição, subqueries de campos, tesoureiros e
+supervisores com `DISTINCT`.
+
+Os escopos ficam no Redis por usuário junto com a "geração de escopos"; toda
+alteração de vínculos usuário–campo, igrejas, campos ou usuários incrementa a
+geração após o commit e os escopos antigos deixam de ser usados (mesmo
+esquema de `dashboard_cache`). Dentro da requisição o escopo fica memorizado
+na própria instância do usuário.
+"""
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction as db_transaction
+from django.db.models import Q
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Church, Field, User
+
+
+logger = logging.getLogger(__name__)
+
+GENERATION_KEY = 'scope:generation'
+
+
+class UserScope:
+    """IDs visíveis a um usuário.
+
+    - Admin: sem restrição (`unrestricted`)
+    - Tesoureiro: apenas as próprias transações
+    - Supervisor: as próprias transações + transações de tesoureiros e
+      supervisores que compartilham campos, nas igrejas desses campos
+    """
+
+    def __init__(self, user_id, role, field_ids=(), church_ids=(), user_ids=()):
+        self.user_id = user_id
+        self.role = role
+        self.field_ids = list(field_ids)
+        self.church_ids = list(church_ids)
+        self.user_ids = list(user_ids)
+
+    @classmethod
+    def build(cls, user):
+        """Calcula o escopo do usuário no banco."""
+        if user.is_admin():
+            return cls(user.pk, user.role)
+        field_ids = sorted(user.fields.values_list('id', flat=True))
+        church_ids = sorted(Church.objects.filter(field_id__in=field_ids).values_list('id', flat=True))
+        user_ids = [user.pk]
+        if user.is_supervisor() and field_ids:
+            user_ids = sorted(set(User.objects.filter(
+                Q(id=user.pk) |  # O próprio supervisor
+                Q(role__in=('treasurer', 'supervisor'), fields__id__in=field_ids)  # Tesoureiros e supervisores dos mesmos campos
+            ).values_list('id', flat=True)))
+        return cls(user.pk, user.role, field_ids, church_ids, user_ids)
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['user_id'], data['role'], data['field_ids'], data['church_ids'], data['user_ids'])
+
+    def to_dict(self):
+        return {
+            'user_id': self.user_id,
+            'role': self.role,
+            'field_ids': self.field_ids,
+            'church_ids': self.church_ids,
+            'user_ids': self.user_ids,
+        }
+
+    @property
+    def unrestricted(self):
+        return self.role == 'admin'
+
+    def predicates(self):
+        """Condições disjuntas de visibilidade sobre `user_id`/`church_id`.
+
+        Nenhuma transação satisfaz duas condições (as próprias transações
+        saem do segundo ramo), então o resultado não tem duplicatas por
+        construção: o `OR` das condições dispensa `DISTINCT` e cada condição
+        pode ser consultada/agregada isoladamente e somada (UNION ALL).
+        Lista vazia quando o usuário não enxerga nenhuma transação.
+        """
+        if self.unrestricted:
+            return [Q()]
+        if self.role not in ('treasurer', 'supervisor'):
+            return []
+        predicates = [Q(user_id=self.user_id)]  # Suas próprias transações
+        other_ids = [uid for uid in self.user_ids if uid != self.user_id]
+        if self.role == 'supervisor' and other_ids and self.church_ids:
+            # Tesoureiros e supervisores dos mesmos campos, nas igrejas desses campos
+            predicates.append(Q(user_id__in=other_ids, church_id__in=self.church_ids))
+        return predicates
+
+    def transactions_q(self):
+        """Condição de visibilidade sobre `user_id`/`church_id` (Transaction ou rollup mensal).
+
+        Retorna None quando o usuário não enxerga nenhuma transação.
+        """
+        predicates = self.predicates()
+        if not predicates:
+            return None
+        condition = predicates[0]
+        for predicate in predicates[1:]:
+            condition |= predicate
+        return condition
+
+    def can_view(self, transaction):
+        """Indica se a transação está no escopo do usuário."""
+        if self.unrestricted or transaction.user_id == self.user_id:
+            return True
+        return (
+            self.role == 'supervisor'
+            and transaction.user_id in self.user_ids
+            and transaction.church_id in self.church_ids
+        )
+
+
+def _initial_generation():
+    # Valor baseado no relógio: se a chave for perdida, nenhum escopo antigo volta a casar
+    return time.time_ns()
+
+
+def get_scope(user):
+    """Escopo do usuário: memorizado na instância, depois cache, depois banco."""
+    scope = getattr(user, '_user_scope', None)
+    if scope is not None:
+        return scope
+    if not getattr(settings, 'USER_SCOPE_CACHE', True):
+        scope = UserScope.build(user)
+        user._user_scope = scope
+        return scope
+    key = f'scope:user:{user.pk}'
+    try:
+        values = cache.get_many([GENERATION_KEY, key])
+        generation = values.get(GENERATION_KEY)
+        if generation is None:
+            cache.add(GENERATION_KEY, _initial_generation(), timeout=None)
+            generation = cache.get(GENERATION_KEY)
+        entry = values.get(key)
+        if entry and entry.get('generation') == generation:
+            scope = UserScope.from_dict(entry['scope'])
+    except Exception as e:
+        # Redis indisponível: calcula sem cache
+        logger.warning('Cache de escopos indisponível: %s', e)
+        generation = None
+    if scope is None:
+        scope = UserScope.build(user)
+        if generation is not None:
+            try:
+                cache.set(
+                    key,
+                    {'generation': generation, 'scope': scope.to_dict()},
+                    timeout=getattr(settings, 'USER_SCOPE_CACHE_TIMEOUT', 3600),
+                )
+            except Exception as e:
+                logger.warning('Falha ao gravar cache de escopos: %s', e)
+    user._user_scope = scope
+    return scope
+
+
+def bump_generation():
+    """Invalida todos os escopos em cache incrementando a geração."""
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.add(GENERATION_KEY, _initial_generation(), timeout=None)
+    except Exception as e:
+        logger.warning('Falha ao invalidar cache de escopos: %s', e)
+
+
+def _schedule_bump(**kwargs):
+    db_transaction.on_commit(bump_generation)
+
+
+# Igrejas mudando de campo e campos removidos alteram as igrejas visíveis
+for _model in (Church, Field):
+    post_save.connect(_schedule_bump, sender=_model, dispatch_uid=f'user_scope_save_{_model.__name__}')
+    post_delete.connect(_schedule_bump, sender=_model, dispatch_uid=f'user_scope_delete_{_model.__name__}')
+
+
+@receiver(m2m_changed, sender=User.fields.through)
+def bump_on_user_fields_change(sender, instance, action, **kwargs):
+    # Vínculos de um usuário mudam também o escopo dos supervisores dos mesmos campos
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        instance.__dict__.pop('_user_scope', None)
+        _schedule_bump()
+
+
+@receiver(post_save, sender=User)
+def bump_on_user_change(sender, instance, update_fields=None, **kwargs):
+    # Ignora a atualização de `last_login` feita a cada login
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    instance.__dict__.pop('_user_scope', None)
+    _schedule_bump()
+
+
+@receiver(post_delete, sender=User)
+def bump_on_user_delete(sender, instance, **kwargs):
+    _schedule_bump()
@@ -1,7 +1,10 @@
+import re
 import unicodedata
 
 from django.db import connection
-from django.db.models import CharField, Q, TextField, Transform
+from django.db.models import BooleanField, CharField, FloatField, Q, TextField, Transform
+from django.db.models.expressions import RawSQL
+from django.db.models.lookups import IContains
 
 
 class Unaccent(Transform):
@@ -10,8 +13,25 @@ class Unaccent(Transform):
     bilateral = True
 
 
+class UnaccentContains(IContains):
+    """`f_unaccent(coluna) ILIKE '%termo%'` (PostgreSQL).
+
+    Mesma expressão dos índices GIN de trigramas (migração 0014), então a
+    busca usa os índices em vez de varrer as tabelas. O termo deve chegar
+    sem acentos (ver `strip_accents`).
+    """
+    lookup_name = 'unaccent_contains'
+
+    def as_postgresql(self, compiler, connection):
+        lhs_sql, lhs_params = self.process_lhs(compiler, connection)
+        rhs_sql, rhs_params = self.process_rhs(compiler, connection)
+        return f'f_unaccent({lhs_sql}) ILIKE {rhs_sql}', (*lhs_params, *rhs_params)
+
+
 CharField.register_lookup(Unaccent)
 TextField.register_lookup(Unaccent)
+CharField.register_lookup(UnaccentContains)
+TextField.register_lookup(UnaccentContains)
 
 
 def strip_accents(text):
@@ -22,16 +42,52 @@ def strip_accents(text):
 def search_q(term, *fields):
     """Constrói um Q de busca case- e accent-insensitive sobre os campos dados.
 
-    No PostgreSQL usa o lookup `unaccent` (extensão habilitada por migração)
-    tanto na coluna quanto no termo; em outros backends (ex.: SQLite em dev)
-    cai para `icontains` com o termo original (comportamento atual).
+    No PostgreSQL usa o lookup `unaccent_contains`
+    (`f_unaccent(coluna) ILIKE '%termo%'`, coberto pelos índices GIN de
+    trigramas) com o termo sem acentos; em outros backends (ex.: SQLite em
+    dev) cai para `icontains` com o termo original (comportamento atual).
     """
     q = Q()
     if connection.vendor == 'postgresql':
         term = strip_accents(term)
-        lookup = 'unaccent__icontains'
+        lookup = 'unaccent_contains'
     else:
         lookup = 'icontains'
     for field in fields:
         q |= Q(**{f'{field}__{lookup}': term})
-    return q
\ No newline at end of file
+    return q
+
+
+# Configuração de busca textual (português + unaccent) da migração 0015
+FULLTEXT_CONFIG = 'pt_unaccent'
+
+
+def fulltext_query(term):
+    """Converte a busca em um `tsquery` de prefixos (`'dizim:* & maria:*'`).
+
+    Retorna None fora do PostgreSQL ou com menos de duas palavras: buscas de
+    uma palavra continuam em `search_q` (substring via trigramas), que acha
+    trechos no meio das palavras.
+    """
+    if connection.vendor != 'postgresql':
+        return None
+    words = re.findall(r'\w+', strip_accents(term).lower())
+    if len(words) < 2:
+        return None
+    return ' & '.join(f'{word}:*' for word in words)
+
+
+def fulltext_match(query):
+    """`search_vector @@ to_tsquery(...)` (coluna mantida por triggers, índice GIN)."""
+    return RawSQL(
+        f'"app_transaction"."search_vector" @@ to_tsquery(\'{FULLTEXT_CONFIG}\', %s)',
+        [query], output_field=BooleanField(),
+    )
+
+
+def fulltext_rank(query):
+    """Relevância (`ts_rank`) da transação para o `tsquery`; pesos: descrição > categoria > igreja > usuário."""
+    return RawSQL(
+        f'ts_rank("app_transaction"."search_vector", to_tsquery(\'{FULLTEXT_CONFIG}\', %s))',
+        [query], output_field=FloatField(),
+    )
@@ -27,6 +27,10 @@ urlpatterns = [
     path('api/category/<int:category_id>/', views.category_info_api, name='category_info_api'),
     path('transactions/export-pdf/', views.transaction_export_pdf, name='transaction_export_pdf'),
     path('transactions/export-xlsx/', views.transaction_export_xlsx, name='transaction_export_xlsx'),
+    path('transactions/export-csv/', views.transaction_export_csv, name='transaction_export_csv'),
+    path('transactions/export-jobs/<str:format>/', views.transaction_export_job_create, name='transaction_export_job_create'),
+    path('exports/<int:pk>/', views.export_job_status, name='export_job_status'),
+    path('exports/<int:pk>/download/', views.export_job_download, name='export_job_download'),
     
     # Categorias
     path('categories/', views.category_list, name='category_list'),
@@ -52,6 +56,10 @@ urlpatterns = [
     path('users/<int:pk>/activate/', views.user_activate, name='user_activate'),
     path('users/<int:pk>/reset-password/', views.user_reset_password, name='user_reset_password'),
     
+    # Fechamento de Períodos
+    path('periods/', views.closed_period_list, name='closed_period_list'),
+    path('periods/<int:pk>/reopen/', views.closed_period_reopen, name='closed_period_reopen'),
+    
     # Logs de Acesso
     path('access-logs/', views.access_log_list, name='access_log_list'),
     path('access-logs/api/', views.access_log_list_api, name='access_log_list_api'),
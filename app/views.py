@@ -3,129 +3,35 @@ from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.contrib.auth.hashers import make_password
-from django.db.models import Sum, Q, Count, Min, Max
+from django.db.models import Sum, Count, Min, Max
 from .search import search_q
-from django.db import connection
-from django.http import JsonResponse, HttpResponse
+from .filters import TransactionFilter, datetime_range, get_transactions_for_user
+from .scopes import get_scope
+from .pagination import COUNT_CAPPED, COUNT_ESTIMATE, COUNT_EXACT, InvalidCursor, count_items, keyset_page, offset_page
+from . import aggregations, dashboard_cache, export_cache, export_jobs, exports, pdf_reports, periods, rollups
+from django.db import connection, transaction as db_transaction
+from django.http import FileResponse, Http404, JsonResponse, HttpResponse
+from django.core.exceptions import ValidationError
 from django.conf import settings
 from django.views.decorators.http import require_http_methods
 from django.views.decorators.cache import never_cache
+from django.urls import reverse
 from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.files.storage import default_storage
 
 from django.utils import timezone
 from datetime import datetime, timedelta, date
-from .models import Church, User, Field, Shepherd, Category, Transaction, AccessLog, Notification, ShepherdHistory, log_action
+from decimal import Decimal
+from .models import Church, User, Field, Shepherd, Category, Transaction, ClosedPeriod, AccessLog, Notification, ShepherdHistory, ExportJob, log_action
 from .forms import (
     ChurchForm, UserForm, FieldForm, ShepherdForm,
     CategoryForm, TransactionForm, ChangePasswordForm, EmailAuthenticationForm, NotificationForm
 )
 from .decorators import admin_required, treasurer_required, admin_or_treasurer_required, password_changed_required
-from calendar import monthrange
 
 # Importações para PDF
-from reportlab.lib.pagesizes import letter, A4, landscape
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image, PageBreak
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.lib import colors
-from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
 import os
 import json
-import openpyxl
-from openpyxl.styles import Font, PatternFill, Alignment
-from openpyxl.utils import get_column_letter
-
-# Função helper para obter transações baseado no role do usuário
-def get_transactions_for_user(user):
-    """
-    Retorna QuerySet de transações baseado no role do usuário.
-    
-    - Admin: Todas as transações
-    - Tesoureiro: Apenas suas próprias transações
-    - Supervisor: Suas próprias transações + transações de tesoureiros e
-      supervisores que compartilham campos
-    """
-    if user.is_admin():
-        return Transaction.objects.all()
-    
-    elif user.is_treasurer():
-        return Transaction.objects.filter(user=user)
-    
-    elif user.is_supervisor():
-        # Obter campos do supervisor
-        supervisor_fields = user.fields.all()
-        
-        if not supervisor_fields.exists():
-            # Se não tem campos, retorna apenas suas próprias transações
-            return Transaction.objects.filter(user=user)
-        
-        # Obter igrejas dos campos do supervisor
-        supervisor_churches = Church.objects.filter(field__in=supervisor_fields)
-        
-        # Obter tesoureiros que compartilham pelo menos um campo com o supervisor
-        treasurer_ids = User.objects.filter(
-            role='treasurer',
-            fields__in=supervisor_fields
-        ).distinct().values_list('id', flat=True)
-        
-        # Obter outros supervisores que compartilham pelo menos um campo
-        supervisor_ids = User.objects.filter(
-            role='supervisor',
-            fields__in=supervisor_fields
-        ).exclude(id=user.id).distinct().values_list('id', flat=True)
-        
-        # Retornar: transações próprias + transações de tesoureiros e
-        # supervisores em igrejas dos campos do supervisor
-        # Nota: Q já está importado no início do arquivo
-        return Transaction.objects.filter(
-            Q(user=user) |  # Suas próprias transações
-            Q(
-                user_id__in=treasurer_ids,
-                church__in=supervisor_churches
-            ) |  # Transações de tesoureiros dos mesmos campos
-            Q(
-                user_id__in=supervisor_ids,
-                church__in=supervisor_churches
-            )  # Transações de supervisores dos mesmos campos
-        ).distinct()
-    
-    else:
-        return Transaction.objects.none()
-
-
-def filter_transactions_by_selected_users(queryset, request, selected_users):
-    """Aplica o filtro por usuário respeitando o papel do usuário logado:
-    - Admin: pode filtrar por qualquer usuário
-    - Supervisor: apenas por ele mesmo, tesoureiros e supervisores dos mesmos campos
-    - Tesoureiro: não filtra por usuário (vê apenas as próprias transações)
-    """
-    if not selected_users:
-        return queryset
-
-    if request.user.is_admin():
-        return queryset.filter(user_id__in=selected_users)
-
-    if request.user.is_supervisor():
-        supervisor_fields = request.user.fields.all()
-        if not supervisor_fields.exists():
-            return queryset
-        allowed_user_ids = list(User.objects.filter(
-            Q(id=request.user.id) |  # O próprio supervisor
-            Q(role='treasurer', fields__in=supervisor_fields) |  # Tesoureiros dos mesmos campos
-            Q(role='supervisor', fields__in=supervisor_fields)  # Supervisores dos mesmos campos
-        ).distinct().values_list('id', flat=True))
-        valid_users = []
-        for uid in selected_users:
-            try:
-                if int(uid) in allowed_user_ids:
-                    valid_users.append(uid)
-            except (TypeError, ValueError):
-                continue
-        if valid_users:
-            return queryset.filter(user_id__in=valid_users)
-
-    return queryset
-
 
 def _can_manage_user(request_user, target, action):
     """Verifica se o usuário logado pode gerenciar o usuário alvo.
@@ -170,14 +76,7 @@ def login_view(request):
                 login(request, user)
                 
                 # Registrar o login no AccessLog
-                try:
-                    AccessLog.objects.create(
-                        user=user,
-                        action='login',
-                        description='Entrou no Sistema',
-                    )
-                except Exception:
-                    pass
+                log_action(user, 'login', description='Entrou no Sistema')
                 
                 messages.success(request, f'Bem-vindo, {user.get_full_name()}!')
                 # Verifica se o usuário precisa trocar a senha
@@ -204,14 +103,7 @@ def logout_view(request):
     """View para fazer logout do usuário"""
     # Registrar o logout no AccessLog antes de fazer logout
     if request.user.is_authenticated:
-        try:
-            AccessLog.objects.create(
-                user=request.user,
-                action='logout',
-                description='Saiu do Sistema',
-            )
-        except Exception:
-            pass
+        log_action(request.user, 'logout', description='Saiu do Sistema')
     
     # Fazer logout do usuário
     logout(request)
@@ -261,10 +153,6 @@ def index(request):
         return redirect('transaction_list')
     
     # Obter filtros da URL (agora usando getlist para múltiplas seleções)
-    selected_start_date = request.GET.get('start_date', '')
-    selected_end_date = request.GET.get('end_date', '')
-    start_date_raw = selected_start_date
-    end_date_raw = selected_end_date
     selected_categories = request.GET.getlist('category')
     selected_type = request.GET.get('type', '')
     selected_fields = request.GET.getlist('field')
@@ -272,18 +160,15 @@ def index(request):
     selected_shepherds = request.GET.getlist('shepherd')
     selected_users = request.GET.getlist('user')
     
-    # Definir datas padrão se não fornecidas (ano atual)
+    # Filtros validados (período padrão: ano atual)
     today = date.today()
-    if not selected_start_date:
-        # Primeiro dia do ano atual
-        selected_start_date = date(today.year, 1, 1).strftime('%Y-%m-%d')
-    if not selected_end_date:
-        # Último dia do ano atual
-        selected_end_date = date(today.year, 12, 31).strftime('%Y-%m-%d')
-    
-    # Converter para objetos date para cálculos
-    start_date = datetime.strptime(selected_start_date, '%Y-%m-%d').date()
-    end_date = datetime.strptime(selected_end_date, '%Y-%m-%d').date()
+    transaction_filter = TransactionFilter.from_get(
+        request.user, request.GET, date_params=('start_date', 'end_date'), default='year'
+    )
+    start_date = transaction_filter.date_from
+    end_date = transaction_filter.date_to
+    selected_start_date = start_date.strftime('%Y-%m-%d')
+    selected_end_date = end_date.strftime('%Y-%m-%d')
     
     context = {
         'title': 'Dashboard',
@@ -308,11 +193,12 @@ def index(request):
         context['users'] = User.objects.exclude(email=settings.SYSTEM_HIDDEN_EMAIL).order_by('first_name', 'last_name')
     else:
         # Tesoureiro vê seus campos e suas igrejas
-        if request.user.fields.exists():
-            context['fields'] = request.user.fields.all()
-            user_churches = Church.objects.filter(field__in=request.user.fields.all())
+        scope = get_scope(request.user)
+        if scope.field_ids:
+            context['fields'] = Field.objects.filter(id__in=scope.field_ids)
+            user_churches = Church.objects.filter(id__in=scope.church_ids)
             context['churches'] = user_churches
-            context['shepherds'] = Shepherd.objects.filter(church__field__in=request.user.fields.all()).distinct()
+            context['shepherds'] = Shepherd.objects.filter(church__id__in=scope.church_ids).distinct()
         else:
             context['fields'] = Field.objects.none()
             context['churches'] = Church.objects.none()
@@ -331,232 +217,57 @@ def index(request):
         ],
     }
     
-    # Base de transações
-    if request.user.is_admin():
-        base_transactions = Transaction.objects.filter(
-            category__is_active=True,
-            church__is_active=True,
-            church__field__is_active=True,
-        )
-    elif request.user.is_supervisor():
-        base_transactions = get_transactions_for_user(request.user).filter(
-            category__is_active=True,
-            church__is_active=True,
-            church__field__is_active=True,
-        )
-    else:
-        base_transactions = Transaction.objects.filter(
-            user=request.user,
-            category__is_active=True,
-            church__is_active=True,
-            church__field__is_active=True,
-        )
-    
-    # Aplicar filtros
-    filtered_transactions = base_transactions
-    
-    # Filtro por período de datas
-    filtered_transactions = filtered_transactions.filter(date__gte=start_date, date__lte=end_date)
-    
-    # Filtro por categoria (múltiplas seleções)
-    if selected_categories:
-        filtered_transactions = filtered_transactions.filter(category_id__in=selected_categories)
-    
-    # Filtro por tipo
-    if selected_type:
-        filtered_transactions = filtered_transactions.filter(type=selected_type)
-    
-    # Filtro por campo (múltiplas seleções)
-    if selected_fields:
-        if request.user.is_admin():
-            filtered_transactions = filtered_transactions.filter(church__field_id__in=selected_fields)
-        elif request.user.fields.count() > 1:
-            # Validar que todos os campos selecionados pertencem ao usuário
-            valid_fields = request.user.fields.filter(id__in=selected_fields).values_list('id', flat=True)
-            if valid_fields:
-                filtered_transactions = filtered_transactions.filter(church__field_id__in=valid_fields)
-    
-    # Filtro por igreja (múltiplas seleções)
-    if selected_churches:
-        filtered_transactions = filtered_transactions.filter(church_id__in=selected_churches)
-    
-    # Filtro por pastor (múltiplas seleções)
-    if selected_shepherds:
-        filtered_transactions = filtered_transactions.filter(church__shepherd_id__in=selected_shepherds)
-    
-    # Filtro por usuário (múltiplas seleções, respeitando o papel do usuário)
-    if selected_users:
-        filtered_transactions = filter_transactions_by_selected_users(filtered_transactions, request, selected_users)
-    
-    # Calcular totais
-    total_transactions = filtered_transactions.count()
-    total_income = filtered_transactions.filter(type='income').aggregate(total=Sum('value'))['total'] or 0
-    total_expense = filtered_transactions.filter(type='expense').aggregate(total=Sum('value'))['total'] or 0
-    balance = total_income - total_expense
-    
-    # Dados para o gráfico por categoria
-    categories_data = []
-    categories = Category.objects.filter(is_active=True)
-    
-    for category in categories:
-        category_transactions = filtered_transactions.filter(category=category)
-        income = category_transactions.filter(type='income').aggregate(total=Sum('value'))['total'] or 0
-        expense = category_transactions.filter(type='expense').aggregate(total=Sum('value'))['total'] or 0
-        
-        if income > 0 or expense > 0:
-            categories_data.append({
-                'category': category.name,
-                'income': float(income),
-                'expense': float(expense)
-            })
-    
-    # Dados por campo - agrupar igrejas por campo
-    churches_data = []
+    filtered_transactions = transaction_filter.queryset()
+
+    # Escopo das séries por campo e por igreja
     if request.user.is_admin():
-        # Para administradores, mostrar todos os campos
         all_fields = Field.objects.filter(is_active=True)
-    else:
-        # Para tesoureiros, mostrar apenas seus campos
-        if request.user.fields.exists():
-            all_fields = request.user.fields.all()
-        else:
-            all_fields = Field.objects.none()
-    
-    for field in all_fields:
-        # Buscar todas as transações das igrejas deste campo
-        field_transactions = filtered_transactions.filter(church__field=field)
-        
-        income = field_transactions.filter(type='income').aggregate(total=Sum('value'))['total'] or 0
-        expense = field_transactions.filter(type='expense').aggregate(total=Sum('value'))['total'] or 0
-        
-        # Mostrar apenas campos com valores maiores que zero
-        if income > 0 or expense > 0:
-            churches_data.append({
-                'name': field.name,
-                'income': float(income),
-                'expense': float(expense)
-            })
-    
-    # Ordenar por nome do campo
-    churches_data.sort(key=lambda x: x['name'])
-    
-    # Dados para o gráfico de Entrada e Saída por Igreja individual
-    churches_individual_data = []
-    if request.user.is_admin():
-        # Para administradores, mostrar todos os campos
         all_churches = Church.objects.filter(is_active=True)
+    elif get_scope(request.user).field_ids:
+        scope = get_scope(request.user)
+        all_fields = Field.objects.filter(id__in=scope.field_ids)
+        all_churches = Church.objects.filter(id__in=scope.church_ids)
     else:
-        # Para tesoureiros, mostrar apenas igrejas dos seus campos
-        if request.user.fields.exists():
-            all_churches = Church.objects.filter(field__in=request.user.fields.all())
-        else:
-            all_churches = Church.objects.none()
-    
-    for church in all_churches:
-        church_transactions = filtered_transactions.filter(church=church)
-        income = church_transactions.filter(type='income').aggregate(total=Sum('value'))['total'] or 0
-        expense = church_transactions.filter(type='expense').aggregate(total=Sum('value'))['total'] or 0
-        
-        # Mostrar apenas igrejas com valores maiores que zero
-        if income > 0 or expense > 0:
-            churches_individual_data.append({
-                'name': church.name,
-                'field': church.field.name if church.field else 'Sem Campo',
-                'income': float(income),
-                'expense': float(expense)
-            })
-    
-    # Ordenar por nome da igreja
-    churches_individual_data.sort(key=lambda x: x['name'])
-    
-    # Dados mensais para o gráfico: apenas meses entre start_date e end_date
-    monthly_data = []
-
-    # Nomes dos meses em português
-    month_names = [
-        'Janeiro', 'Fevereiro', 'Março', 'Abril', 'Maio', 'Junho',
-        'Julho', 'Agosto', 'Setembro', 'Outubro', 'Novembro', 'Dezembro'
-    ]
-
-    # Construir lista de meses do intervalo
-    months_in_period = []
-    cursor = date(start_date.year, start_date.month, 1)
-    while cursor <= end_date:
-        month_start = date(cursor.year, cursor.month, 1)
-        # Último dia do mês
-        if cursor.month == 12:
-            month_end = date(cursor.year + 1, 1, 1) - timedelta(days=1)
-        else:
-            month_end = date(cursor.year, cursor.month + 1, 1) - timedelta(days=1)
-        # Cortar para o intervalo selecionado
-        effective_start = max(month_start, start_date)
-        effective_end = min(month_end, end_date)
-        months_in_period.append({
-            'year': cursor.year,
-            'month': cursor.month,
-            'month_start': effective_start,
-            'month_end': effective_end
-        })
-        # Avançar para próximo mês
-        if cursor.month == 12:
-            cursor = date(cursor.year + 1, 1, 1)
-        else:
-            cursor = date(cursor.year, cursor.month + 1, 1)
-
-    # Calcular valores por mês
-    for month_info in months_in_period:
-        month_start = month_info['month_start']
-        month_end = month_info['month_end']
-
-        # Base de transações por perfil
-        if request.user.is_admin():
-            month_transactions = Transaction.objects.all()
-        else:
-            if request.user.fields.exists():
-                user_churches = Church.objects.filter(field__in=request.user.fields.all())
-                month_transactions = Transaction.objects.filter(church__in=user_churches)
-            else:
-                month_transactions = Transaction.objects.none()
-        # Filtros do mês e demais filtros
-        month_transactions = month_transactions.filter(date__gte=month_start, date__lte=month_end)
-        if selected_categories:
-            month_transactions = month_transactions.filter(category_id__in=selected_categories)
-        if selected_type:
-            month_transactions = month_transactions.filter(type=selected_type)
-        if selected_fields:
-            if request.user.is_admin():
-                month_transactions = month_transactions.filter(church__field_id__in=selected_fields)
-            elif request.user.fields.count() > 1:
-                valid_fields = request.user.fields.filter(id__in=selected_fields).values_list('id', flat=True)
-                if valid_fields:
-                    month_transactions = month_transactions.filter(church__field_id__in=valid_fields)
-        if selected_churches:
-            month_transactions = month_transactions.filter(church_id__in=selected_churches)
-        if selected_shepherds:
-            month_transactions = month_transactions.filter(church__shepherd_id__in=selected_shepherds)
-        if selected_users:
-            month_transactions = filter_transactions_by_selected_users(month_transactions, request, selected_users)
-        month_income = month_transactions.filter(type='income').aggregate(total=Sum('value'))['total'] or 0
-        month_expense = month_transactions.filter(type='expense').aggregate(total=Sum('value'))['total'] or 0
-
-        month_balance = float(month_income) - float(month_expense)
-        monthly_data.append({
-            'month': f"{month_names[month_info['month'] - 1]}/{month_info['year']}",
-            'month_number': month_info['month'],
-            'year': month_info['year'],
-            'income': float(month_income),
-            'expense': float(month_expense),
-            'balance': month_balance
-        })
+        all_fields = Field.objects.none()
+        all_churches = Church.objects.none()
+
+    # Totais e séries (categoria, campo, igreja e mês) com consultas agrupadas
+    # Meses inteiros vêm do rollup mensal; só as pontas parciais do período varrem as transações
+    def build_summary():
+        summary = aggregations.build_summary(
+            transaction_filter.summary_querysets(),
+            categories=Category.objects.filter(is_active=True),
+            fields=all_fields,
+            churches=all_churches,
+            # Série mensal: mesmos filtros, sem o filtro de registros ativos
+            monthly_qs=transaction_filter.summary_querysets(active_only=False),
+            monthly_start=start_date,
+            monthly_end=end_date,
+        )
+        # Valores monetários como texto para o cache em JSON
+        summary['totals'] = {key: str(value) for key, value in summary['totals'].items()}
+        return summary
+
+    # Resultado em cache por filtros + escopo, invalidado pela geração de dados
+    summary = dashboard_cache.get_or_compute('index', transaction_filter, build_summary)
+    total_transactions = int(summary['totals']['total_transactions'])
+    total_income = Decimal(summary['totals']['total_income'])
+    total_expense = Decimal(summary['totals']['total_expense'])
+    balance = Decimal(summary['totals']['balance'])
+    categories_data = summary['categories_data']
+    churches_data = summary['churches_data']
+    churches_individual_data = summary['churches_individual_data']
+    monthly_data = summary['monthly_data']
     
     # Transações recentes (últimas 10)
     recent_transactions = filtered_transactions.order_by('-date')[:10]
     
-    # Logs de acesso recentes (apenas para administradores)
+    # Logs de acesso recentes (apenas para administradores), dos últimos 30 dias
+    # para a consulta ler só o fim da tabela (índice BRIN / partições recentes)
     if request.user.is_admin():
         access_logs = AccessLog.objects.select_related('user').exclude(
             user__email=settings.SYSTEM_HIDDEN_EMAIL
-        ).order_by('-created_at')[:20]
+        ).filter(created_at__gte=timezone.now() - timedelta(days=30)).order_by('-created_at')[:20]
     else:
         access_logs = AccessLog.objects.none()
     
@@ -582,7 +293,7 @@ def index(request):
         users_qs = User.objects.filter(id__in=selected_users).exclude(email=settings.SYSTEM_HIDDEN_EMAIL)
         names = [u.get_full_name() or u.username for u in users_qs]
         active_filters.append(('Usuários', names))
-    if start_date_raw or end_date_raw:
+    if transaction_filter.has_period:
         active_filters.append(('Período', [f'{start_date:%d/%m/%Y} a {end_date:%d/%m/%Y}']))
 
     # Adicionar dados ao contexto
@@ -607,102 +318,51 @@ def index(request):
     return render(request, 'pages/dashboard.html', context)
 
 # Views de Transações
+def _list_totals(transaction_filter):
+    """Totais da lista de transações, em cache por filtros + escopo.
+
+    Meses inteiros do período vêm do rollup mensal; o resultado é
+    invalidado pela geração de dados, como o dashboard.
+    """
+    def compute():
+        totals = aggregations.breakdowns(transaction_filter.summary_querysets(), [])['totals']
+        # Valores monetários como texto para o cache em JSON
+        return {key: str(value) for key, value in totals.items()}
+
+    totals = dashboard_cache.get_or_compute('list_totals', transaction_filter, compute)
+    return {
+        'total_transactions': int(totals['total_transactions']),
+        'total_income': Decimal(totals['total_income']),
+        'total_expense': Decimal(totals['total_expense']),
+        'balance': Decimal(totals['balance']),
+    }
+
+
 @password_changed_required
 @admin_or_treasurer_required
 def transaction_list(request):
     """Lista de transações"""
     
-    if request.user.is_admin():
-        transactions = Transaction.objects.filter(
-            category__is_active=True,
-            church__is_active=True,
-            church__field__is_active=True,
-        )
-    elif request.user.is_supervisor():
-        transactions = get_transactions_for_user(request.user).filter(
-            category__is_active=True,
-            church__is_active=True,
-            church__field__is_active=True,
-        )
-    else:
-        # Tesoureiro: ver apenas transações criadas por ele
-        transactions = Transaction.objects.filter(
-            user=request.user,
-            category__is_active=True,
-            church__is_active=True,
-            church__field__is_active=True,
-        )
-    
     # Filtros (usando getlist para múltiplas seleções)
     search = request.GET.get('search', '')
     selected_categories = request.GET.getlist('category')
     transaction_type = request.GET.get('type', '')
-    date_from_raw = request.GET.get('date_from', '')
-    date_to_raw = request.GET.get('date_to', '')
-    date_from = date_from_raw
-    date_to = date_to_raw
     selected_fields = request.GET.getlist('field')
     selected_churches = request.GET.getlist('church')
     selected_shepherds = request.GET.getlist('shepherd')
     selected_users = request.GET.getlist('user')
     
-    # Definir datas padrão se não fornecidas
-    today = date.today()
-    if not date_from:
-        # Primeiro dia do mês atual
-        first_day = date(today.year, today.month, 1)
-        date_from = first_day.strftime('%Y-%m-%d')
-    
-    if not date_to:
-        # Último dia do mês atual
-        last_day = date(today.year, today.month, monthrange(today.year, today.month)[1])
-        date_to = last_day.strftime('%Y-%m-%d')
-    
-    if search:
-        transactions = transactions.filter(
-            search_q(search, 'desc', 'category__name')
-        )
-    
-    if selected_categories:
-        transactions = transactions.filter(category_id__in=selected_categories)
-    
-    if transaction_type:
-        transactions = transactions.filter(type=transaction_type)
-    
-    if date_from:
-        transactions = transactions.filter(date__gte=date_from)
-    
-    if date_to:
-        transactions = transactions.filter(date__lte=date_to)
-    
-    # Filtro por campo (múltiplas seleções)
-    if selected_fields:
-        if request.user.is_admin():
-            # Administradores podem filtrar por qualquer campo
-            transactions = transactions.filter(church__field_id__in=selected_fields)
-        elif request.user.fields.count() > 1:
-            # Tesoureiros com múltiplos campos podem filtrar por seus campos
-            valid_fields = request.user.fields.filter(id__in=selected_fields).values_list('id', flat=True)
-            if valid_fields:
-                transactions = transactions.filter(church__field_id__in=valid_fields)
-    
-    # Filtro por igreja (múltiplas seleções)
-    if selected_churches:
-        transactions = transactions.filter(church_id__in=selected_churches)
-    
-    # Filtro por pastor (múltiplas seleções)
-    if selected_shepherds:
-        transactions = transactions.filter(church__shepherd_id__in=selected_shepherds)
-    
-    # Filtro por usuário (múltiplas seleções, respeitando o papel do usuário)
-    if selected_users:
-        transactions = filter_transactions_by_selected_users(transactions, request, selected_users)
+    # Filtros validados, escopo por papel e período padrão (mês atual)
+    transaction_filter = TransactionFilter.from_get(request.user, request.GET)
+    date_from = transaction_filter.date_from.strftime('%Y-%m-%d')
+    date_to = transaction_filter.date_to.strftime('%Y-%m-%d')
     
-    # Calcular totais
-    total_transactions = transactions.count()
-    total_income = transactions.filter(type='income').aggregate(total=Sum('value'))['total'] or 0
-    total_expense = transactions.filter(type='expense').aggregate(total=Sum('value'))['total'] or 0
-    balance = total_income - total_expense  
+    # Calcular totais (mesmo cache da API da lista)
+    totals = _list_totals(transaction_filter)
+    total_transactions = totals['total_transactions']
+    total_income = totals['total_income']
+    total_expense = totals['total_expense']
+    balance = totals['balance']
     
     # Preparar dados para os filtros
     if request.user.is_admin():
@@ -718,28 +378,25 @@ def transaction_list(request):
             churches = churches.filter(shepherd_id__in=selected_shepherds)
     else:
         # Verificar se o usuário tem campos associados
-        if request.user.fields.exists():
-            fields = request.user.fields.all()
-            churches = Church.objects.filter(is_active=True, field__in=request.user.fields.all())
-            shepherds = Shepherd.objects.filter(is_active=True, church__field__in=request.user.fields.all()).distinct()
+        scope = get_scope(request.user)
+        if scope.field_ids:
+            fields = Field.objects.filter(id__in=scope.field_ids)
+            churches = Church.objects.filter(is_active=True, id__in=scope.church_ids)
+            shepherds = Shepherd.objects.filter(is_active=True, church__id__in=scope.church_ids).distinct()
             
             # Para Supervisor, incluir usuários que ele pode ver (ele mesmo,
             # tesoureiros e supervisores dos mesmos campos)
             if request.user.is_supervisor():
-                supervisor_fields = request.user.fields.all()
                 users = User.objects.filter(
-                    Q(id=request.user.id) |  # O próprio supervisor
-                    Q(role='treasurer', fields__in=supervisor_fields) |  # Tesoureiros dos mesmos campos
-                    Q(role='supervisor', fields__in=supervisor_fields)  # Supervisores dos mesmos campos
-                ).distinct().exclude(email=settings.SYSTEM_HIDDEN_EMAIL).order_by('first_name', 'last_name')
+                    id__in=scope.user_ids
+                ).exclude(email=settings.SYSTEM_HIDDEN_EMAIL).order_by('first_name', 'last_name')
             else:
                 users = User.objects.none()
             
             # Se o usuário tem múltiplos campos, permitir filtro por campo
-            if request.user.fields.count() > 1 and selected_fields:
-                valid_fields = request.user.fields.filter(id__in=selected_fields).values_list('id', flat=True)
-                if valid_fields:
-                    churches = churches.filter(field_id__in=valid_fields)
+            # (`transaction_filter.fields` já contém apenas campos válidos)
+            if transaction_filter.fields:
+                churches = churches.filter(field_id__in=transaction_filter.fields)
             if selected_shepherds:
                 churches = churches.filter(shepherd_id__in=selected_shepherds)
         else:
@@ -785,10 +442,8 @@ def transaction_list(request):
         users_qs = User.objects.filter(id__in=selected_users).exclude(email=settings.SYSTEM_HIDDEN_EMAIL)
         names = [u.get_full_name() or u.username for u in users_qs]
         active_filters.append(('Usuários', names))
-    date_from_obj = datetime.strptime(date_from, '%Y-%m-%d').date()
-    date_to_obj = datetime.strptime(date_to, '%Y-%m-%d').date()
-    if date_from_raw or date_to_raw:
-        active_filters.append(('Período', [f'{date_from_obj:%d/%m/%Y} a {date_to_obj:%d/%m/%Y}']))
+    if transaction_filter.has_period:
+        active_filters.append(('Período', [f'{transaction_filter.date_from:%d/%m/%Y} a {transaction_filter.date_to:%d/%m/%Y}']))
 
     context = {
         'title': 'Transações',
@@ -823,114 +478,59 @@ def transaction_list(request):
 def transaction_list_api(request):
     """API para listar transações com paginação AJAX"""
     
-    if request.user.is_admin():
-        transactions = Transaction.objects.filter(
-            category__is_active=True,
-            church__is_active=True,
-            church__field__is_active=True,
-        )
-        print(f"DEBUG API - Usuário admin: {transactions.count()} transações totais")
-    elif request.user.is_supervisor():
-        transactions = get_transactions_for_user(request.user).filter(
-            category__is_active=True,
-            church__is_active=True,
-            church__field__is_active=True,
-        )
-        print(f"DEBUG API - Usuário supervisor: {transactions.count()} transações de tesoureiros")
-    else:
-        # Tesoureiro: ver apenas transações criadas por ele
-        transactions = Transaction.objects.filter(
-            user=request.user,
-            category__is_active=True,
-            church__is_active=True,
-            church__field__is_active=True,
-        )
-        print(f"DEBUG API - Usuário tesoureiro: {transactions.count()} transações do próprio usuário")
-    
-    # Filtros (usando getlist para múltiplas seleções)
-    search = request.GET.get('search', '')
-    selected_categories = request.GET.getlist('category')
-    transaction_type = request.GET.get('type', '')
-    date_from = request.GET.get('date_from', '')
-    date_to = request.GET.get('date_to', '')
-    selected_fields = request.GET.getlist('field')
-    selected_churches = request.GET.getlist('church')
-    selected_shepherds = request.GET.getlist('shepherd')
-    selected_users = request.GET.getlist('user')
-    
-    # Debug para filtros
-    print(f"DEBUG API - search: {search}")
-    print(f"DEBUG API - shepherds: {selected_shepherds}")
-    print(f"DEBUG API - users: {selected_users}")
-    print(f"DEBUG API - request.GET: {dict(request.GET)}")
-    
-    # Definir datas padrão se não fornecidas
-    today = date.today()
-    if not date_from:
-        first_day = date(today.year, today.month, 1)
-        date_from = first_day.strftime('%Y-%m-%d')
-    
-    if not date_to:
-        last_day = date(today.year, today.month, monthrange(today.year, today.month)[1])
-        date_to = last_day.strftime('%Y-%m-%d')
-    
-    if search:
-        transactions = transactions.filter(
-            search_q(search, 'desc', 'category__name', 'church__name', 'church__field__name',
-                     'church__shepherd__name', 'user__first_name', 'user__last_name', 'user__username')
-        )
-    
-    if selected_categories:
-        transactions = transactions.filter(category_id__in=selected_categories)
-    
-    if transaction_type:
-        transactions = transactions.filter(type=transaction_type)
-    
-    if date_from:
-        transactions = transactions.filter(date__gte=date_from)
-    
-    if date_to:
-        transactions = transactions.filter(date__lte=date_to)
-    
-    if selected_fields:
-        if request.user.is_admin():
-            transactions = transactions.filter(church__field_id__in=selected_fields)
-        elif request.user.fields.count() > 1:
-            valid_fields = request.user.fields.filter(id__in=selected_fields).values_list('id', flat=True)
-            if valid_fields:
-                transactions = transactions.filter(church__field_id__in=valid_fields)
-    
-    if selected_churches:
-        transactions = transactions.filter(church_id__in=selected_churches)
-    
-    if selected_shepherds:
-        print(f"DEBUG API - Aplicando filtro de pastores: {selected_shepherds}")
-        print(f"DEBUG API - Transações antes do filtro: {transactions.count()}")
-        transactions = transactions.filter(church__shepherd_id__in=selected_shepherds)
-        print(f"DEBUG API - Após filtro de pastores: {transactions.count()} transações")
-    
-    if selected_users:
-        transactions = filter_transactions_by_selected_users(transactions, request, selected_users)
+    # Filtros validados, escopo por papel e período padrão (mês atual)
+    transaction_filter = TransactionFilter.from_get(request.user, request.GET)
+    transactions = transaction_filter.queryset()
     
-    # Calcular totais
-    total_transactions = transactions.count()
-    total_income = transactions.filter(type='income').aggregate(total=Sum('value'))['total'] or 0
-    total_expense = transactions.filter(type='expense').aggregate(total=Sum('value'))['total'] or 0
-    balance = total_income - total_expense
+    # Calcular totais (em cache: trocar de página não reagrega o período)
+    totals = _list_totals(transaction_filter)
+    total_transactions = totals['total_transactions']
+    total_income = totals['total_income']
+    total_expense = totals['total_expense']
+    balance = totals['balance']
     
     # Paginação
-    page = int(request.GET.get('page', 1))
     try:
         per_page = int(request.GET.get('per_page', 20))
     except (TypeError, ValueError):
         per_page = 20
     if per_page not in (10, 20, 50):
         per_page = 20
-    start = (page - 1) * per_page
-    end = start + per_page
     
-    # Obter transações da página atual (evitar N+1)
-    page_transactions = transactions.select_related('category', 'church', 'church__field', 'church__shepherd', 'user').order_by('-date')[start:end]
+    # Obter transações da página atual (evitar N+1), ordenadas por (-date, -id) ou por relevância
+    transactions = transactions.select_related('category', 'church', 'church__field', 'church__shepherd', 'user')
+    # Busca de várias palavras (texto completo): ordena por relevância
+    ranked = transaction_filter.ranked(transactions)
+    if 'cursor' in request.GET:
+        # Modo cursor (keyset): custo constante em qualquer página; por
+        # relevância não há chave de posição e os cursores levam a página
+        paginate = keyset_page if ranked is None else offset_page
+        try:
+            page_transactions, pagination = paginate(
+                transactions if ranked is None else ranked,
+                request.GET.get('cursor', ''), per_page, total_transactions
+            )
+        except InvalidCursor:
+            return JsonResponse({'error': 'Cursor inválido'}, status=400)
+    else:
+        try:
+            page = max(1, int(request.GET.get('page', 1)))
+        except (TypeError, ValueError):
+            page = 1
+        start = (page - 1) * per_page
+        end = start + per_page
+        page_transactions = (transactions.order_by('-date', '-id') if ranked is None else ranked)[start:end]
+        total_pages = (total_transactions + per_page - 1) // per_page
+        pagination = {
+            'current_page': page,
+            'total_pages': total_pages,
+            'per_page': per_page,
+            'total_items': total_transactions,
+            'has_previous': page > 1,
+            'has_next': page < total_pages,
+            'previous_page': page - 1 if page > 1 else None,
+            'next_page': page + 1 if page < total_pages else None,
+        }
     
     # Preparar dados das transações
     transactions_data = []
@@ -952,21 +552,9 @@ def transaction_list_api(request):
             'can_view': True,
         })
     
-    # Calcular informações de paginação
-    total_pages = (total_transactions + per_page - 1) // per_page
-    
     return JsonResponse({
         'transactions': transactions_data,
-        'pagination': {
-            'current_page': page,
-            'total_pages': total_pages,
-            'per_page': per_page,
-            'total_items': total_transactions,
-            'has_previous': page > 1,
-            'has_next': page < total_pages,
-            'previous_page': page - 1 if page > 1 else None,
-            'next_page': page + 1 if page < total_pages else None,
-        },
+        'pagination': pagination,
         'totals': {
             'total_transactions': total_transactions,
             'total_income': float(total_income),
@@ -979,18 +567,11 @@ def transaction_list_api(request):
 @admin_or_treasurer_required
 def transaction_summary_api(request):
     """API de resumo para dashboard: retorna agregados e séries sem expor filtros na URL."""
-    if request.user.is_admin():
-        base_transactions = Transaction.objects.all()
-    elif request.user.is_supervisor():
-        base_transactions = get_transactions_for_user(request.user)
-        if not base_transactions.exists() and not request.user.fields.exists():
+    if request.user.is_supervisor():
+        if not get_scope(request.user).field_ids and not get_transactions_for_user(request.user).exists():
             return JsonResponse({'error': 'Supervisor sem campos associados'}, status=400)
-    else:
-        if request.user.fields.exists():
-            user_churches = Church.objects.filter(field__in=request.user.fields.all())
-            base_transactions = Transaction.objects.filter(church__in=user_churches)
-        else:
-            return JsonResponse({'error': 'Usuário sem campos associados'}, status=400)
+    elif not request.user.is_admin() and not get_scope(request.user).field_ids:
+        return JsonResponse({'error': 'Usuário sem campos associados'}, status=400)
 
     # Ler filtros do corpo JSON (POST) ou do GET como fallback, mas sem refletir na URL do front
     if request.method == 'POST':
@@ -1000,262 +581,88 @@ def transaction_summary_api(request):
             payload = {}
     else:
         payload = {}
+    if not isinstance(payload, dict):
+        payload = {}
 
-    # Processar filtros - suportar arrays e valores únicos (compatibilidade)
-    try:
-        category_val = payload.get('category', [])
-        if category_val is None:
-            category_val = []
-        selected_categories = category_val if isinstance(category_val, list) else ([category_val] if category_val else [])
-        selected_categories = [str(c).strip() for c in selected_categories if str(c).strip() and str(c).strip() != 'None']
-        selected_categories = [int(c) for c in selected_categories if c.isdigit()]
-    except (ValueError, TypeError, AttributeError):
-        selected_categories = []
-    
-    selected_type = str(payload.get('type', '')).strip()
-    
-    try:
-        field_val = payload.get('field', [])
-        if field_val is None:
-            field_val = []
-        selected_fields = field_val if isinstance(field_val, list) else ([field_val] if field_val else [])
-        selected_fields = [str(f).strip() for f in selected_fields if str(f).strip() and str(f).strip() != 'None']
-        selected_fields = [int(f) for f in selected_fields if f.isdigit()]
-    except (ValueError, TypeError, AttributeError):
-        selected_fields = []
-    
-    try:
-        church_val = payload.get('church', [])
-        if church_val is None:
-            church_val = []
-        selected_churches = church_val if isinstance(church_val, list) else ([church_val] if church_val else [])
-        selected_churches = [str(c).strip() for c in selected_churches if str(c).strip() and str(c).strip() != 'None']
-        selected_churches = [int(c) for c in selected_churches if c.isdigit()]
-    except (ValueError, TypeError, AttributeError):
-        selected_churches = []
-    
-    try:
-        shepherd_val = payload.get('shepherd', [])
-        if shepherd_val is None:
-            shepherd_val = []
-        selected_shepherds = shepherd_val if isinstance(shepherd_val, list) else ([shepherd_val] if shepherd_val else [])
-        selected_shepherds = [str(s).strip() for s in selected_shepherds if str(s).strip() and str(s).strip() != 'None']
-        selected_shepherds = [int(s) for s in selected_shepherds if s.isdigit()]
-    except (ValueError, TypeError, AttributeError):
-        selected_shepherds = []
-    
-    try:
-        user_val = payload.get('user', [])
-        if user_val is None:
-            user_val = []
-        selected_users = user_val if isinstance(user_val, list) else ([user_val] if user_val else [])
-        selected_users = [str(u).strip() for u in selected_users if str(u).strip() and str(u).strip() != 'None']
-        selected_users = [int(u) for u in selected_users if u.isdigit()]
-    except (ValueError, TypeError, AttributeError):
-        selected_users = []
-    
-    date_from = str(payload.get('date_from', '')).strip()
-    date_to = str(payload.get('date_to', '')).strip()
+    # Filtros validados, escopo por papel e período padrão (mês atual)
+    transaction_filter = TransactionFilter.from_json(request.user, payload)
     monthly_use_current_year = bool(payload.get('monthly_use_current_year', False))
-
-    # Datas padrão: mês atual
     today = date.today()
-    if not date_from:
-        date_from = date(today.year, today.month, 1).strftime('%Y-%m-%d')
-    if not date_to:
-        last_day = monthrange(today.year, today.month)[1]
-        date_to = date(today.year, today.month, last_day).strftime('%Y-%m-%d')
 
-    filtered = base_transactions
-    
-    try:
-        if date_from:
-            filtered = filtered.filter(date__gte=date_from)
-        if date_to:
-            filtered = filtered.filter(date__lte=date_to)
-        if selected_categories:
-            filtered = filtered.filter(category_id__in=selected_categories)
-        if selected_type:
-            filtered = filtered.filter(type=selected_type)
-        if selected_fields:
-            if request.user.is_admin():
-                filtered = filtered.filter(church__field_id__in=selected_fields)
-            elif request.user.fields.count() > 1:
-                valid_fields = request.user.fields.filter(id__in=selected_fields).values_list('id', flat=True)
-                if valid_fields:
-                    filtered = filtered.filter(church__field_id__in=valid_fields)
-        if selected_churches:
-            filtered = filtered.filter(church_id__in=selected_churches)
-        if selected_shepherds:
-            filtered = filtered.filter(church__shepherd_id__in=selected_shepherds)
-        if selected_users:
-            filtered = filter_transactions_by_selected_users(filtered, request, selected_users)
-    except Exception as e:
-        import traceback
-        print(f"Erro ao aplicar filtros na API de resumo: {e}")
-        print(traceback.format_exc())
-        # Retornar erro ao invés de quebrar
-        return JsonResponse({'error': f'Erro ao processar filtros: {str(e)}'}, status=500)
-
-    # Totais
-    total_transactions = filtered.count()
-    total_income = filtered.filter(type='income').aggregate(total=Sum('value'))['total'] or 0
-    total_expense = filtered.filter(type='expense').aggregate(total=Sum('value'))['total'] or 0
-    balance = float(total_income) - float(total_expense)
-
-    # Por categoria
-    categories_qs = Category.objects.all()
-    categories_data = []
-    for category in categories_qs:
-        cat_qs = filtered.filter(category=category)
-        income = cat_qs.filter(type='income').aggregate(total=Sum('value'))['total'] or 0
-        expense = cat_qs.filter(type='expense').aggregate(total=Sum('value'))['total'] or 0
-        if income > 0 or expense > 0:
-            categories_data.append({
-                'category': category.name,
-                'income': float(income),
-                'expense': float(expense)
-            })
-
-    # Por campo
+    # Escopo das séries por campo e por igreja
     if request.user.is_admin():
         fields_qs = Field.objects.all()
-    else:
-        fields_qs = request.user.fields.all() if request.user.fields.exists() else Field.objects.none()
-    churches_data = []
-    for field in fields_qs:
-        field_qs = filtered.filter(church__field=field)
-        income = field_qs.filter(type='income').aggregate(total=Sum('value'))['total'] or 0
-        expense = field_qs.filter(type='expense').aggregate(total=Sum('value'))['total'] or 0
-        if income > 0 or expense > 0:
-            churches_data.append({
-                'name': field.name,
-                'income': float(income),
-                'expense': float(expense)
-            })
-    churches_data.sort(key=lambda x: x['name'])
-
-    # Entradas e saídas por campo - apenas período (ignora os demais filtros)
-    if request.user.is_admin():
         period_fields_qs = Field.objects.filter(is_active=True)
-    else:
-        period_fields_qs = request.user.fields.filter(is_active=True) if request.user.fields.exists() else Field.objects.none()
-    fields_data = []
-    period_qs = base_transactions.filter(date__gte=date_from, date__lte=date_to)
-    for field in period_fields_qs:
-        field_qs = period_qs.filter(church__field=field)
-        income = field_qs.filter(type='income').aggregate(total=Sum('value'))['total'] or 0
-        expense = field_qs.filter(type='expense').aggregate(total=Sum('value'))['total'] or 0
-        if income > 0 or expense > 0:
-            fields_data.append({
-                'name': field.name,
-                'income': float(income),
-                'expense': float(expense)
-            })
-    fields_data.sort(key=lambda x: x['name'])
-
-    # Por igreja
-    if request.user.is_admin():
         churches_qs = Church.objects.all()
+    elif get_scope(request.user).field_ids:
+        scope = get_scope(request.user)
+        fields_qs = Field.objects.filter(id__in=scope.field_ids)
+        period_fields_qs = fields_qs.filter(is_active=True)
+        churches_qs = Church.objects.filter(id__in=scope.church_ids)
     else:
-        churches_qs = Church.objects.filter(field__in=request.user.fields.all()) if request.user.fields.exists() else Church.objects.none()
-    churches_individual_data = []
-    for church in churches_qs:
-        ch_qs = filtered.filter(church=church)
-        income = ch_qs.filter(type='income').aggregate(total=Sum('value'))['total'] or 0
-        expense = ch_qs.filter(type='expense').aggregate(total=Sum('value'))['total'] or 0
-        if income > 0 or expense > 0:
-            churches_individual_data.append({
-                'name': church.name,
-                'field': church.field.name if church.field else 'Sem Campo',
-                'income': float(income),
-                'expense': float(expense)
-            })
-    churches_individual_data.sort(key=lambda x: x['name'])
+        fields_qs = Field.objects.none()
+        period_fields_qs = Field.objects.none()
+        churches_qs = Church.objects.none()
+
+    # Meses inteiros vêm do rollup mensal; só as pontas parciais do período varrem as transações
+    filtered = transaction_filter.summary_querysets(active_only=False)
 
     # Série mensal entre intervalos
-    def _month_iter(start_date_str, end_date_str):
-        start_date_obj = datetime.strptime(start_date_str, '%Y-%m-%d').date()
-        end_date_obj = datetime.strptime(end_date_str, '%Y-%m-%d').date()
-        cursor_date = date(start_date_obj.year, start_date_obj.month, 1)
-        months = []
-        while cursor_date <= end_date_obj:
-            if cursor_date.month == 12:
-                month_end = date(cursor_date.year, 12, 31)
-                next_first = date(cursor_date.year + 1, 1, 1)
-            else:
-                next_first = date(cursor_date.year, cursor_date.month + 1, 1)
-                month_end = next_first - timedelta(days=1)
-            eff_start = max(cursor_date, start_date_obj)
-            eff_end = min(month_end, end_date_obj)
-            months.append((cursor_date.year, cursor_date.month, eff_start, eff_end))
-            cursor_date = next_first
-        return months
-
-    month_names = ['Janeiro','Fevereiro','Março','Abril','Maio','Junho','Julho','Agosto','Setembro','Outubro','Novembro','Dezembro']
-    monthly_data = []
-    # Determinar intervalo da série mensal
     if monthly_use_current_year:
-        current_year = today.year
-        series_start = date(current_year, 1, 1).strftime('%Y-%m-%d')
-        series_end = date(current_year, 12, 31).strftime('%Y-%m-%d')
+        series_start = date(today.year, 1, 1)
+        series_end = date(today.year, 12, 31)
+        month_qs = transaction_filter.summary_querysets(series_start, series_end, active_only=False)
     else:
-        series_start = date_from
-        series_end = date_to
-    for year, month, m_start, m_end in _month_iter(series_start, series_end):
-        month_qs = base_transactions
-        month_qs = month_qs.filter(date__gte=m_start, date__lte=m_end)
-        if selected_categories:
-            month_qs = month_qs.filter(category_id__in=selected_categories)
-        if selected_type:
-            month_qs = month_qs.filter(type=selected_type)
-        if selected_fields:
-            if request.user.is_admin():
-                month_qs = month_qs.filter(church__field_id__in=selected_fields)
-            else:
-                valid_fields = request.user.fields.filter(id__in=selected_fields).values_list('id', flat=True)
-                if valid_fields:
-                    month_qs = month_qs.filter(church__field_id__in=valid_fields)
-        if selected_churches:
-            month_qs = month_qs.filter(church_id__in=selected_churches)
-        if selected_shepherds:
-            month_qs = month_qs.filter(church__shepherd_id__in=selected_shepherds)
-        if selected_users:
-            month_qs = filter_transactions_by_selected_users(month_qs, request, selected_users)
-        month_income = month_qs.filter(type='income').aggregate(total=Sum('value'))['total'] or 0
-        month_expense = month_qs.filter(type='expense').aggregate(total=Sum('value'))['total'] or 0
-        monthly_data.append({
-            'month': f"{month_names[month-1]}/{year}",
-            'month_number': month,
-            'year': year,
-            'income': float(month_income),
-            'expense': float(month_expense),
-            'balance': float(month_income) - float(month_expense)
-        })
-
-    return JsonResponse({
-        'totals': {
-            'total_transactions': total_transactions,
-            'total_income': float(total_income),
-            'total_expense': float(total_expense),
-            'balance': balance,
-        },
-        'categories_data': categories_data,
-        'churches_data': churches_data,
-        'churches_individual_data': churches_individual_data,
-        'fields_data': fields_data,
-        'monthly_data': monthly_data,
-        'filters_applied': {
-            'date_from': date_from,
-            'date_to': date_to,
-            'category': selected_categories or None,
-            'type': selected_type or None,
-            'field': selected_fields or None,
-            'church': selected_churches or None,
-            'shepherd': selected_shepherds or None,
-            'user': selected_users or None,
+        # Mesmo período e filtros de `filtered`: a série mensal sai da mesma varredura
+        series_start = transaction_filter.date_from
+        series_end = transaction_filter.date_to
+        month_qs = None
+
+    def build_payload():
+        summary = aggregations.build_summary(
+            filtered,
+            categories=Category.objects.all(),
+            fields=fields_qs,
+            churches=churches_qs,
+            monthly_qs=month_qs,
+            monthly_start=series_start,
+            monthly_end=series_end,
+        )
+        totals = summary['totals']
+
+        # Entradas e saídas por campo - apenas período (ignora os demais filtros)
+        period_qs = transaction_filter.summary_querysets(active_only=False, filtered=False)
+        fields_data = aggregations.fields_data(aggregations.split_by(period_qs, 'field'), period_fields_qs)
+
+        return {
+            'totals': {
+                'total_transactions': totals['total_transactions'],
+                'total_income': float(totals['total_income']),
+                'total_expense': float(totals['total_expense']),
+                'balance': float(totals['total_income']) - float(totals['total_expense']),
+            },
+            'categories_data': summary['categories_data'],
+            'churches_data': summary['churches_data'],
+            'churches_individual_data': summary['churches_individual_data'],
+            'fields_data': fields_data,
+            'monthly_data': summary['monthly_data'],
+            'filters_applied': {
+                'date_from': transaction_filter.date_from.strftime('%Y-%m-%d'),
+                'date_to': transaction_filter.date_to.strftime('%Y-%m-%d'),
+                'category': transaction_filter.categories or None,
+                'type': transaction_filter.type or None,
+                'field': transaction_filter.fields or None,
+                'church': transaction_filter.churches or None,
+                'shepherd': transaction_filter.shepherds or None,
+                'user': transaction_filter.users or None,
+            }
         }
-    })
+
+    # Resultado em cache por filtros + escopo, invalidado pela geração de dados
+    return JsonResponse(dashboard_cache.get_or_compute(
+        'summary', transaction_filter, build_payload,
+        monthly_year=today.year if monthly_use_current_year else None,
+    ))
 
 @password_changed_required
 @admin_or_treasurer_required
@@ -1266,7 +673,12 @@ def transaction_create(request):
         if form.is_valid():
             transaction = form.save(commit=False)
             transaction.user = request.user
-            transaction.save()
+            try:
+                transaction.save()
+            except ValidationError as e:
+                # Mês fechado entre a validação e a gravação
+                messages.error(request, e.messages[0])
+                return redirect('transaction_list')
             log_action(request.user, 'create', transaction, f'Criou transação ID: {transaction.id}, {transaction.get_type_display()}, {transaction.get_formatted_value()}, {transaction.category.name}', request)
 
             # Verificar se deve criar um lembrete (apenas para administradores)
@@ -1332,15 +744,7 @@ def transaction_view(request, pk):
         if request.user.is_supervisor():
             # Supervisor pode ver suas próprias transações, de tesoureiros e
             # de outros supervisores dos mesmos campos
-            supervisor_fields = request.user.fields.all()
-            can_view = (
-                transaction.user == request.user or  # Sua própria transação
-                (
-                    transaction.user.role in ('treasurer', 'supervisor') and
-                    transaction.user.fields.filter(id__in=supervisor_fields.values_list('id', flat=True)).exists() and
-                    supervisor_fields.filter(id=transaction.church.field.id).exists()
-                )
-            )
+            can_view = get_scope(request.user).can_view(transaction)
         else:
             # Tesoureiro: apenas suas próprias transações
             can_view = transaction.user == request.user
@@ -1386,10 +790,19 @@ def transaction_edit(request, pk):
     """Editar transação - Apenas administradores"""
     transaction = get_object_or_404(Transaction, pk=pk)
     
+    if transaction.is_in_closed_period():
+        messages.error(request, 'Esta transação pertence a um mês fechado e não pode ser alterada.')
+        return redirect('transaction_list')
+    
     if request.method == 'POST':
         form = TransactionForm(request.POST, request.FILES, instance=transaction, user=request.user)
         if form.is_valid():
-            form.save()
+            try:
+                form.save()
+            except ValidationError as e:
+                # Mês fechado entre a validação e a gravação
+                messages.error(request, e.messages[0])
+                return redirect('transaction_list')
             log_action(request.user, 'update', transaction, f'Editou transação ID: {transaction.id}, {transaction.get_type_display()}, {transaction.get_formatted_value()}, {transaction.category.name}', request)
 
             # Verificar se deve criar um lembrete
@@ -1452,9 +865,19 @@ def transaction_delete(request, pk):
     """Excluir transação - Apenas administradores"""
     transaction = get_object_or_404(Transaction, pk=pk)
     
+    if transaction.is_in_closed_period():
+        messages.error(request, 'Esta transação pertence a um mês fechado e não pode ser excluída.')
+        return redirect('transaction_list')
+    
     if request.method == 'POST':
-        log_action(request.user, 'delete', transaction, f'Excluiu transação ID: {transaction.id}, {transaction.get_type_display()}, {transaction.get_formatted_value()}, {transaction.category.name}', request)
-        transaction.delete()
+        try:
+            with db_transaction.atomic():
+                log_action(request.user, 'delete', transaction, f'Excluiu transação ID: {transaction.id}, {transaction.get_type_display()}, {transaction.get_formatted_value()}, {transaction.category.name}', request)
+                transaction.delete()
+        except ValidationError as e:
+            # Mês fechado depois da verificação acima
+            messages.error(request, e.messages[0])
+            return redirect('transaction_list')
         messages.success(request, 'Transação excluída com sucesso!')
         return redirect('transaction_list')
     
@@ -1485,10 +908,20 @@ def transaction_bulk_delete(request):
         return JsonResponse({'deleted': 0})
 
     transactions = Transaction.objects.filter(id__in=ids)
-    for transaction in transactions:
-        log_action(request.user, 'delete', transaction, f'Excluiu transação ID: {transaction.id}, {transaction.get_type_display()}, {transaction.get_formatted_value()}, {transaction.category.name}', request)
-    deleted_count = transactions.count()
-    transactions.delete()
+    # Uma única atualização do rollup mensal por chave afetada; os logs são
+    # gravados juntos (um INSERT) e só se a exclusão for confirmada
+    try:
+        with db_transaction.atomic(), rollups.batch():
+            # Verificação de mês fechado sob o lock dos meses: um fechamento
+            # concorrente espera a exclusão terminar (ou vice-versa)
+            ClosedPeriod.lock_for_write(set(transactions.values_list('date', flat=True)))
+            deleted_count = 0
+            for transaction in transactions.select_related('category'):
+                log_action(request.user, 'delete', transaction, f'Excluiu transação ID: {transaction.id}, {transaction.get_type_display()}, {transaction.get_formatted_value()}, {transaction.category.name}', request)
+                deleted_count += 1
+            transactions.delete()
+    except ValidationError:
+        return JsonResponse({'error': 'A seleção contém transações de meses fechados; nenhuma transação foi excluída.'}, status=400)
     return JsonResponse({'deleted': deleted_count})
 
 # Views de Categorias (apenas admin)
@@ -1978,381 +1411,19 @@ def get_churches(request):
 def transaction_export_pdf(request):
     """Exporta transações filtradas para PDF"""
     
-    # Debug: Log dos parâmetros recebidos
-    print(f"DEBUG - Parâmetros recebidos na exportação PDF:")
-    print(f"DEBUG - category: {request.GET.get('category', '')}")
-    print(f"DEBUG - type: {request.GET.get('type', '')}")
-    print(f"DEBUG - date_from: {request.GET.get('date_from', '')}")
-    print(f"DEBUG - date_to: {request.GET.get('date_to', '')}")
-    print(f"DEBUG - field: {request.GET.get('field', '')}")
-    print(f"DEBUG - church: {request.GET.get('church', '')}")
-    print(f"DEBUG - search: {request.GET.get('search', '')}")
-    
-    # Obter os mesmos filtros da view transaction_list
-    if request.user.is_admin():
-        transactions = Transaction.objects.filter(
-            category__is_active=True,
-            church__is_active=True,
-            church__field__is_active=True,
-        )
-    elif request.user.is_supervisor():
-        transactions = get_transactions_for_user(request.user).filter(
-            category__is_active=True,
-            church__is_active=True,
-            church__field__is_active=True,
-        )
-    else:
-        # Tesoureiro: exportar apenas transações criadas por ele
-        transactions = Transaction.objects.filter(
-            user=request.user,
-            category__is_active=True,
-            church__is_active=True,
-            church__field__is_active=True,
-        )
-    
-    # Aplicar filtros (usando getlist para múltiplas seleções)
-    search = request.GET.get('search', '')
-    selected_categories = request.GET.getlist('category')
-    transaction_type = request.GET.get('type', '')
-    date_from = request.GET.get('date_from', '')
-    date_to = request.GET.get('date_to', '')
-    selected_fields = request.GET.getlist('field')
-    selected_churches = request.GET.getlist('church')
-    selected_shepherds = request.GET.getlist('shepherd')
-    selected_users = request.GET.getlist('user')
-    
-    # Debug: Log dos filtros aplicados
-    print(f"DEBUG - Filtros aplicados:")
-    print(f"DEBUG - Total inicial de transações: {transactions.count()}")
-    
-    # Definir datas padrão se não fornecidas
-    today = date.today()
-    if not date_from:
-        first_day = date(today.year, today.month, 1)
-        date_from = first_day.strftime('%Y-%m-%d')
-    
-    if not date_to:
-        last_day = date(today.year, today.month, monthrange(today.year, today.month)[1])
-        date_to = last_day.strftime('%Y-%m-%d')
-    
-    # Aplicar filtros
-    if search:
-        transactions = transactions.filter(
-            search_q(search, 'desc', 'category__name')
-        )
-        print(f"DEBUG - Após filtro de busca: {transactions.count()} transações")
-    
-    if selected_categories:
-        transactions = transactions.filter(category_id__in=selected_categories)
-        print(f"DEBUG - Após filtro de categorias: {transactions.count()} transações")
-    
-    if transaction_type:
-        transactions = transactions.filter(type=transaction_type)
-        print(f"DEBUG - Após filtro de tipo: {transactions.count()} transações")
-    
-    if date_from:
-        transactions = transactions.filter(date__gte=date_from)
-        print(f"DEBUG - Após filtro de data inicial: {transactions.count()} transações")
-    
-    if date_to:
-        transactions = transactions.filter(date__lte=date_to)
-        print(f"DEBUG - Após filtro de data final: {transactions.count()} transações")
-    
-    if selected_fields:
-        if request.user.is_admin():
-            transactions = transactions.filter(church__field_id__in=selected_fields)
-        elif request.user.fields.count() > 1:
-            valid_fields = request.user.fields.filter(id__in=selected_fields).values_list('id', flat=True)
-            if valid_fields:
-                transactions = transactions.filter(church__field_id__in=valid_fields)
-        print(f"DEBUG - Após filtro de campos: {transactions.count()} transações")
-    
-    if selected_churches:
-        transactions = transactions.filter(church_id__in=selected_churches)
-        print(f"DEBUG - Após filtro de igrejas: {transactions.count()} transações")
-    
-    if selected_shepherds:
-        transactions = transactions.filter(church__shepherd_id__in=selected_shepherds)
-        print(f"DEBUG - Após filtro de pastores: {transactions.count()} transações")
-    
-    if selected_users:
-        transactions = filter_transactions_by_selected_users(transactions, request, selected_users)
-        print(f"DEBUG - Após filtro de usuários: {transactions.count()} transações")
-    
-    print(f"DEBUG - Total final de transações: {transactions.count()}")
+    # Mesmos filtros da view transaction_list
+    transaction_filter = TransactionFilter.from_get(request.user, request.GET)
     
-    # Calcular totais
-    total_transactions = transactions.count()
-    total_income = transactions.filter(type='income').aggregate(total=Sum('value'))['total'] or 0
-    total_expense = transactions.filter(type='expense').aggregate(total=Sum('value'))['total'] or 0
-    balance = total_income - total_expense
-    
-    # Criar o PDF
-    response = HttpResponse(content_type='application/pdf')
-    # Formatar nome do arquivo no formato brasileiro (dia-mes-ano)
-    filename_date = date.today().strftime("%d-%m-%Y")
-    response['Content-Disposition'] = f'attachment; filename="transacoes_{filename_date}.pdf"'
-    
-    # Configurar o documento A4 em retrato com margens de 0.5 polegadas
-    doc = SimpleDocTemplate(response, pagesize=A4, 
-                           leftMargin=0.5*inch, rightMargin=0.5*inch, 
-                           topMargin=0.5*inch, bottomMargin=0.5*inch)
-    elements = []
-    
-    # Estilos
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=18,
-        spaceAfter=20,
-        alignment=TA_CENTER,
-        textColor=colors.HexColor('#673ab7')
-    )
-    
-    subtitle_style = ParagraphStyle(
-        'CustomSubtitle',
-        parent=styles['Heading2'],
-        fontSize=10,
-        spaceAfter=8,
-        alignment=TA_LEFT,
-        textColor=colors.HexColor('#495057')
+    # Mesma exportação sem mudanças nos dados: arquivo já gerado, servido pelo nginx
+    cached = export_cache.get_or_create(
+        transaction_filter, 'pdf', lambda output: exports.write_pdf(transaction_filter, output)
     )
+    if cached:
+        return _protected_file_response(cached, exports.filename("pdf"))
     
-    # Título com logo
-    title_data = []
-    
-    # Verificar se o logo existe
-    possible_paths = [
-        os.path.join(settings.STATIC_ROOT, 'img', 'icon.png'),
-        os.path.join(settings.BASE_DIR, 'static', 'img', 'icon.png'),
-        os.path.join(os.path.dirname(os.path.dirname(__file__)), 'static', 'img', 'icon.png'),
-    ]
-    
-    icon_path = None
-    icon_exists = False
-    
-    for path in possible_paths:
-        if os.path.exists(path):
-            icon_path = path
-            icon_exists = True
-            break
-    
-    if icon_exists:
-        try:
-            # Carregar o logo PNG
-            icon = Image(icon_path, width=1.2*inch, height=1.2*inch)
-            title_data = [[icon, Paragraph("Relatório de Transações", title_style)]]
-        except Exception as e:
-            print(f"Erro ao carregar logo PNG: {e}")
-            icon_symbol = Paragraph("●", ParagraphStyle(
-                'IconStyle',
-                parent=styles['Normal'],
-                fontSize=40,
-                alignment=TA_CENTER,
-                textColor=colors.HexColor('#673ab7')
-            ))
-            title_data = [[icon_symbol, Paragraph("Relatório de Transações", title_style)]]
-    else:
-        icon_symbol = Paragraph("●", ParagraphStyle(
-            'IconStyle',
-            parent=styles['Normal'],
-            fontSize=40,
-            alignment=TA_CENTER,
-            textColor=colors.HexColor('#673ab7')
-        ))
-        title_data = [[icon_symbol, Paragraph("Relatório de Transações", title_style)]]
-    
-    # Criar tabela do título
-    title_table = Table(title_data, colWidths=[1.5*inch, 5.5*inch])
-    title_table.setStyle(TableStyle([
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('LEFTPADDING', (0, 0), (-1, -1), 0),
-        ('RIGHTPADDING', (0, 0), (-1, -1), 0),
-        ('TOPPADDING', (0, 0), (-1, -1), 0),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 0),
-    ]))
-    
-    elements.append(title_table)
-    elements.append(Spacer(1, 15))
-    
-    # Mostrar filtros aplicados
-    filters_applied = []
-    
-    # Formatar datas para o formato brasileiro
-    try:
-        date_from_formatted = datetime.strptime(date_from, '%Y-%m-%d').strftime('%d/%m/%Y')
-    except (ValueError, TypeError):
-        date_from_formatted = date_from
-    
-    try:
-        date_to_formatted = datetime.strptime(date_to, '%Y-%m-%d').strftime('%d/%m/%Y')
-    except (ValueError, TypeError):
-        date_to_formatted = date_to
-    
-    filters_applied.append(f"Período: {date_from_formatted} a {date_to_formatted}")
-    
-    if selected_categories:
-        category_names = list(
-            Category.objects.filter(id__in=selected_categories).values_list('name', flat=True)
-        )
-        if category_names:
-            filters_applied.append(f"Categoria: {', '.join(category_names)}")
-    
-    if transaction_type:
-        type_name = "Entrada" if transaction_type == "income" else "Saída"
-        filters_applied.append(f"Tipo: {type_name}")
-    
-    if selected_fields:
-        field_names = list(
-            Field.objects.filter(id__in=selected_fields).values_list('name', flat=True)
-        )
-        if field_names:
-            filters_applied.append(f"Campo: {', '.join(field_names)}")
-    
-    if selected_churches:
-        church_names = list(
-            Church.objects.filter(id__in=selected_churches).values_list('name', flat=True)
-        )
-        if church_names:
-            filters_applied.append(f"Igreja: {', '.join(church_names)}")
-    
-    if selected_shepherds:
-        shepherd_names = list(
-            Shepherd.objects.filter(id__in=selected_shepherds).values_list('name', flat=True)
-        )
-        if shepherd_names:
-            filters_applied.append(f"Pastor: {', '.join(shepherd_names)}")
-
-    if selected_users:
-        user_names = [str(user) for user in User.objects.filter(id__in=selected_users)]
-        if user_names:
-            filters_applied.append(f"Usuário: {', '.join(user_names)}")
-    
-    if search:
-        filters_applied.append(f"Busca: {search}")
-    
-    # Adicionar filtros aplicados
-    if filters_applied:
-        elements.append(Paragraph("Filtros Aplicados:", subtitle_style))
-        for filter_info in filters_applied:
-            elements.append(Paragraph(f"• {filter_info}", subtitle_style))
-        elements.append(Spacer(1, 10))
-    
-    # Informações do relatório
-    report_info = [
-        f"Total de Transações: {total_transactions}",
-        f"Total de Entradas: R$ {total_income:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
-        f"Total de Saídas: R$ {total_expense:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
-        f"Saldo: R$ {balance:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
-    ]
-    
-    for info in report_info:
-        elements.append(Paragraph(info, subtitle_style))
-    
-    elements.append(Spacer(1, 15))
-    
-    # Cabeçalho da tabela com todas as colunas solicitadas
-    headers = ['Data', 'Tipo', 'Categoria', 'Campo', 'Igreja', 'Descrição', 'Valor', 'Usuário', 'Pastor']
-    data = [headers]
-    
-    # Dados das transações
-    for transaction in transactions.order_by('-date').select_related('category', 'church', 'church__field', 'church__shepherd', 'user'):
-        # Formatar valor monetário
-        formatted_value = f"{transaction.value:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
-        
-        # Estilos para células
-        cell_style = ParagraphStyle(
-            'CellStyle',
-            parent=styles['Normal'],
-            fontSize=7,
-            leading=9,
-            alignment=TA_LEFT,
-            leftIndent=1,
-            rightIndent=1,
-            spaceBefore=1,
-            spaceAfter=1
-        )
-        
-        value_style = ParagraphStyle(
-            'ValueStyle',
-            parent=styles['Normal'],
-            fontSize=7,
-            leading=9,
-            alignment=TA_RIGHT,
-            leftIndent=1,
-            rightIndent=1,
-            spaceBefore=1,
-            spaceAfter=1
-        )
-        
-        date_style = ParagraphStyle(
-            'DateStyle',
-            parent=styles['Normal'],
-            fontSize=7,
-            leading=9,
-            alignment=TA_CENTER,
-            leftIndent=1,
-            rightIndent=1,
-            spaceBefore=1,
-            spaceAfter=1
-        )
-        
-        type_style = ParagraphStyle(
-            'TypeStyle',
-            parent=styles['Normal'],
-            fontSize=7,
-            leading=9,
-            alignment=TA_CENTER,
-            leftIndent=1,
-            rightIndent=1,
-            spaceBefore=1,
-            spaceAfter=1
-        )
-        
-        row = [
-            Paragraph(transaction.date.strftime('%d/%m/%Y'), date_style),
-            Paragraph('Entrada' if transaction.type == 'income' else 'Saída', type_style),
-            Paragraph(transaction.category.name, cell_style),
-            Paragraph(transaction.church.field.name, cell_style),
-            Paragraph(transaction.church.name, cell_style),
-            Paragraph(transaction.desc or '-', cell_style),
-            Paragraph(formatted_value, value_style),
-            Paragraph(transaction.user.get_full_name() if transaction.user else '-', cell_style),
-            Paragraph(transaction.church.shepherd.name if transaction.church.shepherd else '-', cell_style)
-        ]
-        data.append(row)
-    
-    # Criar tabela com larguras otimizadas para retrato (9 colunas)
-    table = Table(data, colWidths=[0.7*inch, 0.5*inch, 0.8*inch, 0.8*inch, 1.0*inch, 1.2*inch, 0.7*inch, 0.8*inch, 0.8*inch])
-    
-    # Estilo da tabela
-    table_style = TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#673ab7')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 8),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
-        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-        ('LEFTPADDING', (0, 0), (-1, -1), 2),
-        ('RIGHTPADDING', (0, 0), (-1, -1), 2),
-        ('TOPPADDING', (0, 0), (-1, -1), 2),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 2),
-    ])
-    
-    # Alternar cores das linhas
-    for i in range(1, len(data)):
-        if i % 2 == 0:
-            table_style.add('BACKGROUND', (0, i), (-1, i), colors.lightgrey)
-    
-    table.setStyle(table_style)
-    elements.append(table)
-    
-    # Gerar PDF
-    doc.build(elements)
+    response = HttpResponse(content_type='application/pdf')
+    response['Content-Disposition'] = f'attachment; filename="{exports.filename("pdf")}"'
+    exports.write_pdf(transaction_filter, response)
     
     return response
 
@@ -2360,165 +1431,84 @@ def transaction_export_pdf(request):
 @password_changed_required
 @admin_or_treasurer_required
 def transaction_export_xlsx(request):
-    """Exporta transações filtradas para XLSX"""
-    
-    # Debug: Log dos parâmetros recebidos
-    print(f"DEBUG - Parâmetros recebidos na exportação XLSX:")
-    print(f"DEBUG - category: {request.GET.get('category', '')}")
-    print(f"DEBUG - type: {request.GET.get('type', '')}")
-    print(f"DEBUG - date_from: {request.GET.get('date_from', '')}")
-    print(f"DEBUG - date_to: {request.GET.get('date_to', '')}")
-    print(f"DEBUG - field: {request.GET.get('field', '')}")
-    print(f"DEBUG - church: {request.GET.get('church', '')}")
-    print(f"DEBUG - shepherd: {request.GET.get('shepherd', '')}")
-    
-    # Obter os mesmos filtros da view transaction_list
-    if request.user.is_admin():
-        base_transactions = Transaction.objects.filter(
-            category__is_active=True,
-            church__is_active=True,
-            church__field__is_active=True,
-        )
-    elif request.user.is_supervisor():
-        base_transactions = get_transactions_for_user(request.user).filter(
-            category__is_active=True,
-            church__is_active=True,
-            church__field__is_active=True,
-        )
-    else:
-        # Tesoureiro: exportar apenas transações criadas por ele
-        base_transactions = Transaction.objects.filter(
-            user=request.user,
-            category__is_active=True,
-            church__is_active=True,
-            church__field__is_active=True,
-        )
-    
-    # Aplicar filtros (usando getlist para múltiplas seleções)
-    search = request.GET.get('search', '')
-    date_from = request.GET.get('date_from', '')
-    date_to = request.GET.get('date_to', '')
-    selected_categories = request.GET.getlist('category')
-    selected_type = request.GET.get('type', '')
-    selected_fields = request.GET.getlist('field')
-    selected_churches = request.GET.getlist('church')
-    selected_shepherds = request.GET.getlist('shepherd')
-    selected_users = request.GET.getlist('user')
-    
-    # Definir datas padrão se não fornecidas
-    today = date.today()
-    if not date_from:
-        first_day = date(today.year, today.month, 1)
-        date_from = first_day.strftime('%Y-%m-%d')
-    
-    if not date_to:
-        last_day = date(today.year, today.month, monthrange(today.year, today.month)[1])
-        date_to = last_day.strftime('%Y-%m-%d')
-    
-    # Debug: Log dos filtros aplicados
-    print(f"DEBUG - Total inicial de transações: {base_transactions.count()}")
-    
-    # Aplicar filtros
-    filtered_transactions = base_transactions
-    if search:
-        transactions = transactions.filter(
-            search_q(search, 'desc', 'category__name', 'church__name', 'church__field__name',
-                     'church__shepherd__name', 'user__first_name', 'user__last_name', 'user__username')
-        )
-        print(f"DEBUG - Após filtro de busca: {filtered_transactions.count()} transações")
-
-    
-    if date_from:
-        filtered_transactions = filtered_transactions.filter(date__gte=date_from)
-        print(f"DEBUG - Após filtro de data inicial: {filtered_transactions.count()} transações")
-    
-    if date_to:
-        filtered_transactions = filtered_transactions.filter(date__lte=date_to)
-        print(f"DEBUG - Após filtro de data final: {filtered_transactions.count()} transações")
-    
-    if selected_categories:
-        filtered_transactions = filtered_transactions.filter(category_id__in=selected_categories)
-        print(f"DEBUG - Após filtro de categorias: {filtered_transactions.count()} transações")
-    
-    if selected_type:
-        filtered_transactions = filtered_transactions.filter(type=selected_type)
-        print(f"DEBUG - Após filtro de tipo: {filtered_transactions.count()} transações")
-    
-    if selected_fields:
-        if request.user.is_admin():
-            filtered_transactions = filtered_transactions.filter(church__field_id__in=selected_fields)
-        elif request.user.fields.count() > 1:
-            valid_fields = request.user.fields.filter(id__in=selected_fields).values_list('id', flat=True)
-            if valid_fields:
-                filtered_transactions = filtered_transactions.filter(church__field_id__in=valid_fields)
-        print(f"DEBUG - Após filtro de campos: {filtered_transactions.count()} transações")
-    
-    if selected_churches:
-        filtered_transactions = filtered_transactions.filter(church_id__in=selected_churches)
-        print(f"DEBUG - Após filtro de igrejas: {filtered_transactions.count()} transações")
+    """Exporta transações filtradas para XLSX (modo somente escrita, memória constante)"""
     
-    if selected_shepherds:
-        filtered_transactions = filtered_transactions.filter(church__shepherd_id__in=selected_shepherds)
-        print(f"DEBUG - Após filtro de pastores: {filtered_transactions.count()} transações")
+    # Mesmos filtros da view transaction_list
+    transaction_filter = TransactionFilter.from_get(request.user, request.GET)
+    filtered_transactions = transaction_filter.queryset()
     
-    if selected_users:
-        filtered_transactions = filter_transactions_by_selected_users(filtered_transactions, request, selected_users)
-        print(f"DEBUG - Após filtro de usuários: {filtered_transactions.count()} transações")
-    
-    print(f"DEBUG - Total final de transações: {filtered_transactions.count()}")
-    
-    # Criar workbook
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = "Transações"
-    
-    # Cabeçalho
-    colunas = [
-        "ID", "Data", "Categoria", "Tipo", "Valor", "Igreja", 
-        "Campo", "Pastor", "Descrição", "Usuário", "Data de Criação"
-    ]
-    ws.append(colunas)
-    
-    # Estilizar cabeçalho
-    
-    header_font = Font(bold=True, color="FFFFFF")
-    header_fill = PatternFill(start_color="673AB7", end_color="673AB7", fill_type="solid")
-    
-    for cell in ws[1]:
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = Alignment(horizontal="center")
-    
-    # Dados do ORM
-    for transaction in filtered_transactions.select_related('category', 'church', 'church__field', 'church__shepherd', 'user'):
-        ws.append([
-            transaction.id,
-            transaction.date.strftime('%d/%m/%Y'),
-            transaction.category.name if transaction.category else '',
-            'Entrada' if transaction.type == 'income' else 'Saída',
-            f'{transaction.value:.2f}',
-            transaction.church.name if transaction.church else '',
-            transaction.church.field.name if transaction.church and transaction.church.field else '',
-            transaction.church.shepherd.name if transaction.church and transaction.church.shepherd else '',
-            transaction.desc or '',
-            (transaction.user.get_full_name() or transaction.user.username) if transaction.user else '',
-            transaction.created_at.strftime('%d/%m/%Y %H:%M') if transaction.created_at else ''
-        ])
-    
-    # Ajustar largura das colunas
-    column_widths = [8, 12, 20, 10, 15, 25, 20, 20, 30, 20, 20]
-    for i, width in enumerate(column_widths, 1):
-        ws.column_dimensions[get_column_letter(i)].width = width
-    
-    # Resposta HTTP para download
-    response = HttpResponse(
-        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    cached = export_cache.get_or_create(
+        transaction_filter, 'xlsx', lambda output: exports.write_xlsx(filtered_transactions, output)
     )
-    filename_date = date.today().strftime("%d-%m-%Y")
-    response["Content-Disposition"] = f'attachment; filename="transacoes_{filename_date}.xlsx"'
-    wb.save(response)
+    if cached:
+        return _protected_file_response(cached, exports.filename("xlsx"))
     
-    return response
+    return exports.xlsx_response(filtered_transactions)
+
+
+@password_changed_required
+@admin_or_treasurer_required
+def transaction_export_csv(request):
+    """Exporta transações filtradas para CSV (pt-BR), enviado enquanto é gerado"""
+    
+    # Mesmos filtros da view transaction_list
+    filtered_transactions = TransactionFilter.from_get(request.user, request.GET).queryset()
+    
+    return exports.csv_response(filtered_transactions)
+
+
+def _export_job_data(job):
+    data = {
+        'id': job.pk,
+        'format': job.format,
+        'status': job.status,
+        'status_display': job.get_status_display(),
+        'progress': job.progress,
+        'processed_rows': job.processed_rows,
+        'total_rows': job.total_rows,
+        'error': job.error,
+        'status_url': reverse('export_job_status', args=[job.pk]),
+        'download_url': None,
+    }
+    if job.status == 'done':
+        data['download_url'] = reverse('export_job_download', args=[job.pk])
+    return data
+
+
+@require_http_methods(["POST"])
+@password_changed_required
+@admin_or_treasurer_required
+def transaction_export_job_create(request, format):
+    """Agenda a exportação das transações filtradas (filtros na query string) em segundo plano"""
+    if format not in dict(ExportJob.FORMAT_CHOICES):
+        return JsonResponse({'error': 'Formato inválido'}, status=400)
+    if format == 'zip' and request.GET.get('report_by', 'field') not in pdf_reports.GROUPS:
+        return JsonResponse({'error': 'Agrupamento inválido'}, status=400)
+    try:
+        job = export_jobs.submit(request.user, format, request.GET.urlencode())
+    except export_jobs.TooManyJobs as e:
+        return JsonResponse({'error': str(e)}, status=429)
+    return JsonResponse(_export_job_data(job), status=202)
+
+
+@require_http_methods(["GET"])
+@password_changed_required
+@admin_or_treasurer_required
+def export_job_status(request, pk):
+    """Situação e progresso de uma exportação do usuário (consultado periodicamente pela tela)"""
+    job = get_object_or_404(ExportJob, pk=pk, user=request.user)
+    return JsonResponse(_export_job_data(job))
+
+
+@require_http_methods(["GET"])
+@password_changed_required
+@admin_or_treasurer_required
+def export_job_download(request, pk):
+    """Download do arquivo de uma exportação concluída, apenas para o dono"""
+    job = get_object_or_404(ExportJob, pk=pk, user=request.user, status='done')
+    if not job.file:
+        raise Http404
+    return _protected_file_response(job.file.name, os.path.basename(job.file.name))
 
 
 @password_changed_required
@@ -2772,6 +1762,45 @@ def shepherd_history_by_shepherd(request, pk):
     }
     return render(request, 'pages/shepherd_history.html', context)
 
+# Views de Fechamento de Períodos (apenas admin)
+@password_changed_required
+@admin_required
+def closed_period_list(request):
+    """Lista de meses fechados e fechamento de um novo mês"""
+    if request.method == 'POST':
+        month_raw = request.POST.get('month', '').strip()
+        try:
+            month = datetime.strptime(month_raw, '%Y-%m').date()
+        except ValueError:
+            messages.error(request, 'Informe um mês válido.')
+            return redirect('closed_period_list')
+        try:
+            period = periods.close_month(month, request.user)
+        except ValidationError as e:
+            messages.error(request, e.messages[0])
+            return redirect('closed_period_list')
+        log_action(request.user, 'create', period, f'Fechou o mês {period}', request)
+        messages.success(request, f'Mês {period} fechado com sucesso!')
+        return redirect('closed_period_list')
+
+    context = {
+        'title': 'Fechamento de Períodos',
+        'closed_periods': ClosedPeriod.objects.select_related('created_by'),
+        'max_month': (date.today().replace(day=1) - timedelta(days=1)).strftime('%Y-%m'),
+    }
+    return render(request, 'pages/closed_period_list.html', context)
+
+@require_http_methods(["POST"])
+@password_changed_required
+@admin_required
+def closed_period_reopen(request, pk):
+    """Reabre um mês fechado, liberando edições e exclusões"""
+    period = get_object_or_404(ClosedPeriod, pk=pk)
+    log_action(request.user, 'delete', period, f'Reabriu o mês {period}', request)
+    period.delete()
+    messages.success(request, f'Mês {period} reaberto com sucesso!')
+    return redirect('closed_period_list')
+
 # Views de Logs de Acesso (apenas admin)
 @password_changed_required
 @admin_required
@@ -2814,10 +1843,9 @@ def access_log_list(request):
         except ValueError:
             pass  # mantém default (último dia do mês atual)
 
-    logs = logs.filter(
-        created_at__date__gte=date_from_obj,
-        created_at__date__lte=date_to_obj,
-    )
+    # Intervalo meio-aberto em data e hora (sem `__date`, que impede o uso do índice)
+    range_start, range_end = datetime_range(date_from_obj, date_to_obj)
+    logs = logs.filter(created_at__gte=range_start, created_at__lt=range_end)
     
     # Indicador de filtro de data ativo (diferente do mês corrente)
     date_filter_active = (
@@ -3019,12 +2047,29 @@ def serve_protected_media(request, file_path):
     safe_path = os.path.normpath(urllib.parse.unquote(file_path))
     if safe_path.startswith('..') or safe_path.startswith('/'):
         return HttpResponse(status=404)
+    # Exportações só pelo download com verificação do dono (export_job_download)
+    if safe_path.startswith('exports/'):
+        return HttpResponse(status=404)
+    return _protected_media_response(safe_path)
+
+
+def _protected_media_response(safe_path):
+    """Resposta vazia que manda o nginx servir o arquivo de mídia (location interna)."""
     response = HttpResponse()
     response['X-Accel-Redirect'] = f'/media-internal/{safe_path}'
     response['Content-Type'] = ''
     return response
 
 
+def _protected_file_response(name, filename):
+    """Download (anexo) de um arquivo do volume de mídia: pelo nginx em produção, `FileResponse` em DEBUG."""
+    if settings.DEBUG:
+        return FileResponse(default_storage.open(name, 'rb'), as_attachment=True, filename=filename)
+    response = _protected_media_response(name)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
 @require_http_methods(["GET"])
 def health_check(request):
     """Endpoint de health check para monitoramento"""
@@ -3105,30 +2150,51 @@ def pwa_sw(request):
 # Helper genérico para paginação AJAX
 # =============================================================================
 
-def _paginate_queryset(request, queryset, per_page_default=20):
-    """Helper genérico para paginação. Retorna (page_items, pagination_dict)."""
-    page = int(request.GET.get('page', 1))
+def _paginate_queryset(request, queryset, per_page_default=20, count=COUNT_EXACT):
+    """Helper genérico para paginação. Retorna (page_items, pagination_dict).
+
+    `count` escolhe a estratégia de contagem (`exact`, `capped` ou `estimate`,
+    ver `app/pagination.py`). `total_kind` informa como o total foi obtido
+    (`exact`, `capped` = "total+" ou `estimate` = "cerca de total"); com
+    total aproximado (`total_is_approximate`), `has_next` vem da própria
+    página, buscando um item a mais.
+    """
+    try:
+        page = max(1, int(request.GET.get('page', 1)))
+    except (TypeError, ValueError):
+        page = 1
     try:
         per_page = int(request.GET.get('per_page', per_page_default))
     except (TypeError, ValueError):
         per_page = per_page_default
     if per_page not in (10, 20, 50):
         per_page = per_page_default
-    total_items = queryset.count()
+    total_items, total_kind = count_items(queryset, count)
+    approximate = total_kind != COUNT_EXACT
     total_pages = max(1, (total_items + per_page - 1) // per_page)
     start = (page - 1) * per_page
     end = start + per_page
+    if approximate:
+        page_items = list(queryset[start:end + 1])
+        has_next = len(page_items) > per_page
+        page_items = page_items[:per_page]
+        total_pages = max(total_pages, page + 1 if has_next else page)
+    else:
+        page_items = queryset[start:end]
+        has_next = page < total_pages
     pagination = {
         'current_page': page,
         'total_pages': total_pages,
         'per_page': per_page,
         'total_items': total_items,
+        'total_kind': total_kind,
+        'total_is_approximate': approximate,
         'has_previous': page > 1,
-        'has_next': page < total_pages,
+        'has_next': has_next,
         'previous_page': page - 1 if page > 1 else None,
-        'next_page': page + 1 if page < total_pages else None,
+        'next_page': page + 1 if has_next else None,
     }
-    return queryset[start:end], pagination
+    return page_items, pagination
 
 
 # =============================================================================
@@ -3262,7 +2328,7 @@ def notification_list_api(request):
     search = request.GET.get('search', '').strip()
     if search:
         notifications = notifications.filter(search_q(search, 'title', 'body'))
-    page_items, pagination = _paginate_queryset(request, notifications)
+    page_items, pagination = _paginate_queryset(request, notifications, count=COUNT_CAPPED)
     items_data = [{
         'id': n.pk,
         'title': n.title,
@@ -3305,11 +2371,11 @@ def access_log_list_api(request):
             date_to_obj = datetime.strptime(date_to, '%Y-%m-%d').date()
         except ValueError:
             pass
-    logs = logs.filter(
-        created_at__date__gte=date_from_obj,
-        created_at__date__lte=date_to_obj,
-    )
-    page_items, pagination = _paginate_queryset(request, logs)
+    # Intervalo meio-aberto em data e hora (sem `__date`, que impede o uso do índice)
+    range_start, range_end = datetime_range(date_from_obj, date_to_obj)
+    logs = logs.filter(created_at__gte=range_start, created_at__lt=range_end)
+    # Tabela de logs com milhões de linhas: contagem estimada acima de 10 000
+    page_items, pagination = _paginate_queryset(request, logs, count=COUNT_ESTIMATE)
     items_data = [{
         'id': log.pk,
         'created_at': log.created_at.strftime('%d/%m/%Y %H:%M:%S'),
@@ -41,6 +41,7 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'app.middleware.AdminAccessMiddleware',
+    'app.middleware.AuditLogMiddleware',
 ]
 
 ROOT_URLCONF = 'core.urls'
@@ -272,6 +273,40 @@ CACHES = {
     }
 }
 
+# Dashboard: totais e quebras da API de resumo em uma única query GROUPING SETS (apenas PostgreSQL)
+SUMMARY_GROUPING_SETS = os.getenv("SUMMARY_GROUPING_SETS", "True") == "True"
+
+# Dashboard: cache dos resultados do dashboard e da API de resumo, invalidado pela geração de dados
+DASHBOARD_CACHE = os.getenv("DASHBOARD_CACHE", "True") == "True"
+DASHBOARD_CACHE_TIMEOUT = int(os.getenv("DASHBOARD_CACHE_TIMEOUT", "300"))
+
+# Escopo de visibilidade por usuário (campos, igrejas e usuários visíveis) em cache
+USER_SCOPE_CACHE = os.getenv("USER_SCOPE_CACHE", "True") == "True"
+USER_SCOPE_CACHE_TIMEOUT = int(os.getenv("USER_SCOPE_CACHE_TIMEOUT", "3600"))
+
+# Logs de acesso: meses mantidos além do atual antes de serem apagados
+# (comando prune_access_logs; 0 desativa)
+ACCESS_LOG_RETENTION_MONTHS = int(os.getenv("ACCESS_LOG_RETENTION_MONTHS", "0"))
+
+# Logs de acesso: meses mantidos no banco além do atual antes de irem para arquivos comprimidos
+# (comando archive_access_logs; 0 desativa) e diretório dos arquivos (volume de backups)
+ACCESS_LOG_ARCHIVE_MONTHS = int(os.getenv("ACCESS_LOG_ARCHIVE_MONTHS", "0"))
+ACCESS_LOG_ARCHIVE_DIR = os.getenv("ACCESS_LOG_ARCHIVE_DIR", "/backups/access_logs")
+
+# Exportações PDF/XLSX em segundo plano (serviço worker: run_export_jobs); False volta ao download direto
+EXPORT_JOBS = os.getenv("EXPORT_JOBS", "True") == "True"
+EXPORT_JOB_MAX_ACTIVE = int(os.getenv("EXPORT_JOB_MAX_ACTIVE", "3"))  # por usuário, na fila ou gerando
+EXPORT_JOB_RETENTION_HOURS = int(os.getenv("EXPORT_JOB_RETENTION_HOURS", "24"))
+EXPORT_JOB_STALE_MINUTES = int(os.getenv("EXPORT_JOB_STALE_MINUTES", "30"))
+# Cache em disco (mídia) dos arquivos exportados, por filtros + escopo + geração de dados, com limite LRU
+EXPORT_CACHE = os.getenv("EXPORT_CACHE", "True") == "True"
+EXPORT_CACHE_MAX_MB = int(os.getenv("EXPORT_CACHE_MAX_MB", "500"))
+# Processos que geram os PDFs por campo/igreja em paralelo (0 = um por núcleo disponível ao container)
+PDF_REPORT_WORKERS = int(os.getenv("PDF_REPORT_WORKERS", "0"))
+
+# Log de auditoria: enfileira as entradas no Redis (gravadas pelo comando drain_audit_log) em vez de gravar no banco
+AUDIT_LOG_QUEUE = os.getenv("AUDIT_LOG_QUEUE", "False") == "True"
+
 # Session Configuration
 SESSION_ENGINE = 'django.contrib.sessions.backends.cache'
 SESSION_CACHE_ALIAS = 'default'
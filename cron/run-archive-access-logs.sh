@@ -0,0 +1,23 @@
+#!/bin/bash
+set -e
+
+# Carregar variáveis de ambiente do arquivo criado pelo start-cron.sh
+if [ -f /etc/cron.env ]; then
+    # Usar source de forma segura
+    set -a
+    . /etc/cron.env
+    set +a
+fi
+
+# Garantir variáveis essenciais
+export DJANGO_SETTINGS_MODULE=${DJANGO_SETTINGS_MODULE:-core.settings}
+export PATH="/usr/local/bin:/usr/bin:/bin:$PATH"
+
+# Arquivamento desativado sem ACCESS_LOG_ARCHIVE_MONTHS
+if [ -z "$ACCESS_LOG_ARCHIVE_MONTHS" ] || [ "$ACCESS_LOG_ARCHIVE_MONTHS" = "0" ]; then
+    exit 0
+fi
+
+# Executar comando
+cd /app
+exec python3 manage.py archive_access_logs
@@ -0,0 +1,25 @@
+#!/bin/bash
+set -e
+
+# Carregar variáveis de ambiente do arquivo criado pelo start-cron.sh
+if [ -f /etc/cron.env ]; then
+    # Usar source de forma segura
+    set -a
+    . /etc/cron.env
+    set +a
+fi
+
+# Garantir variáveis essenciais
+export DJANGO_SETTINGS_MODULE=${DJANGO_SETTINGS_MODULE:-core.settings}
+export PATH="/usr/local/bin:/usr/bin:/bin:$PATH"
+
+# Retenção desativada sem ACCESS_LOG_RETENTION_MONTHS
+if [ -z "$ACCESS_LOG_RETENTION_MONTHS" ] || [ "$ACCESS_LOG_RETENTION_MONTHS" = "0" ]; then
+    exit 0
+fi
+
+# Executar comando
+cd /app
+# Remove as partições antigas (desanexadas ficariam ocupando disco); com
+# ACCESS_LOG_ARCHIVE_MONTHS o arquivamento das 03:15 já gravou as linhas em /backups
+exec python3 manage.py prune_access_logs --drop
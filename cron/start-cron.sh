@@ -15,7 +15,7 @@ chmod 666 /var/log/cron.log /var/log/backup.log
 echo "PATH=/usr/local/bin:/usr/bin:/bin" >> /etc/cron.env
 
 # Lista de variáveis essenciais para o Django e PostgreSQL
-ESSENTIAL_VARS="DJANGO_SETTINGS_MODULE POSTGRES_HOST POSTGRES_DB POSTGRES_USER POSTGRES_PASSWORD SECRET_KEY DEBUG ALLOWED_HOSTS REDIS_HOST REDIS_PORT REDIS_DB BACKUP_RETENTION_DAYS TZ"
+ESSENTIAL_VARS="DJANGO_SETTINGS_MODULE POSTGRES_HOST POSTGRES_DB POSTGRES_USER POSTGRES_PASSWORD SECRET_KEY DEBUG ALLOWED_HOSTS REDIS_HOST REDIS_PORT REDIS_DB BACKUP_RETENTION_DAYS ACCESS_LOG_RETENTION_MONTHS ACCESS_LOG_ARCHIVE_MONTHS ACCESS_LOG_ARCHIVE_DIR AUDIT_LOG_QUEUE TZ"
 
 for var in $ESSENTIAL_VARS; do
     if [ -n "${!var}" ]; then
@@ -27,8 +27,16 @@ done
 # Copiar scripts wrapper para local acessível
 cp /app/cron/run-notifications.sh /usr/local/bin/run-notifications.sh
 cp /app/cron/run-backup.sh /usr/local/bin/run-backup.sh
+cp /app/cron/run-partitions.sh /usr/local/bin/run-partitions.sh
+cp /app/cron/run-archive-access-logs.sh /usr/local/bin/run-archive-access-logs.sh
+cp /app/cron/run-prune-access-logs.sh /usr/local/bin/run-prune-access-logs.sh
+cp /app/cron/run-audit-drain.sh /usr/local/bin/run-audit-drain.sh
 chmod +x /usr/local/bin/run-notifications.sh
 chmod +x /usr/local/bin/run-backup.sh
+chmod +x /usr/local/bin/run-partitions.sh
+chmod +x /usr/local/bin/run-archive-access-logs.sh
+chmod +x /usr/local/bin/run-prune-access-logs.sh
+chmod +x /usr/local/bin/run-audit-drain.sh
 
 # Encontrar caminho do Python
 PYTHON_PATH=$(which python3 || which python)
@@ -51,6 +59,27 @@ echo "0 * * * * /usr/local/bin/run-notifications.sh >> /var/log/cron.log 2>&1" >
 # =========================
 echo "0 2 * * * /usr/local/bin/run-backup.sh >> /var/log/backup.log 2>&1" >> $CRON_FILE
 
+# =========================
+# Partições de transações (anuais) e logs de acesso (mensais) – dia 1 de cada mês às 03:00
+# (sem efeito para tabelas não particionadas)
+# =========================
+echo "0 3 1 * * /usr/local/bin/run-partitions.sh >> /var/log/cron.log 2>&1" >> $CRON_FILE
+
+# =========================
+# Arquivamento dos logs de acesso em /backups (ACCESS_LOG_ARCHIVE_MONTHS) – dia 1 de cada mês às 03:15
+# =========================
+echo "15 3 1 * * /usr/local/bin/run-archive-access-logs.sh >> /var/log/cron.log 2>&1" >> $CRON_FILE
+
+# =========================
+# Retenção dos logs de acesso (ACCESS_LOG_RETENTION_MONTHS) – dia 1 de cada mês às 03:30
+# =========================
+echo "30 3 1 * * /usr/local/bin/run-prune-access-logs.sh >> /var/log/cron.log 2>&1" >> $CRON_FILE
+
+# =========================
+# Fila do log de auditoria (AUDIT_LOG_QUEUE=True) – a cada minuto
+# =========================
+echo "* * * * * /usr/local/bin/run-audit-drain.sh >> /var/log/cron.log 2>&1" >> $CRON_FILE
+
 # Instalar crontab
 crontab $CRON_FILE
 
@@ -26,6 +26,8 @@ class ListPagination {
 
         this.searchTimeout = null;
         this.currentSearch = '';
+        // Requisição em andamento: cancelada quando uma nova busca é disparada
+        this.abortController = null;
 
         this.init();
     }
@@ -111,17 +113,23 @@ class ListPagination {
     }
 
     async loadData() {
+        // Durante a digitação, descarta a resposta anterior (evita resultados fora de ordem)
+        if (this.abortController) this.abortController.abort();
+        const controller = new AbortController();
+        this.abortController = controller;
         this.showLoading();
         try {
             const qs = this.buildQueryString();
             const resp = await fetch(`${this.apiUrl}?${qs}`, {
-                headers: { 'X-Requested-With': 'XMLHttpRequest' }
+                headers: { 'X-Requested-With': 'XMLHttpRequest' },
+                signal: controller.signal
             });
             if (!resp.ok) throw new Error(`HTTP ${resp.status}`);
             const data = await resp.json();
             this.render(data.items, data.pagination);
             this.updateUrl();
         } catch (err) {
+            if (err.name === 'AbortError') return;
             console.error('ListPagination error:', err);
             this.showError();
         }
@@ -192,14 +200,21 @@ class ListPagination {
         // Sempre mostrar o header de paginação
         if (header) header.classList.remove('d-none');
 
-        const info = `Página ${p.current_page} de ${p.total_pages}`;
+        // Total limitado ("N+") ou estimado ("cerca de N") pela API: não saltar para a última página
+        const total = p.total_items.toLocaleString('pt-BR');
+        let info = `Página ${p.current_page} de ${p.total_pages}`;
+        if (p.total_kind === 'capped') {
+            info = `Página ${p.current_page} de ${p.total_pages}+ (${total}+ registros)`;
+        } else if (p.total_kind === 'estimate') {
+            info = `Página ${p.current_page} de cerca de ${p.total_pages} (cerca de ${total} registros)`;
+        }
         if (pageInfo) pageInfo.textContent = info;
         if (pageInfoMobile) pageInfoMobile.textContent = info;
 
         const firstDisabled = !p.has_previous;
         const prevDisabled = !p.has_previous;
         const nextDisabled = !p.has_next;
-        const lastDisabled = !p.has_next;
+        const lastDisabled = !p.has_next || p.total_is_approximate;
 
         let html = `
             <li class="page-item ${firstDisabled ? 'disabled' : ''}">
@@ -1,5 +1,7 @@
 // Variáveis globais para paginação
 let currentPage = 1;
+// Cursor opaco da página atual (paginação keyset da API); vazio = primeira página
+let currentCursor = '';
 let currentPerPage = 20;
 const PER_PAGE_STORAGE_KEY = 'per_page_transaction_list';
 let currentFilters = {};
@@ -195,19 +197,24 @@ document.addEventListener('DOMContentLoaded', function() {
     // Interceptar cliques nos botões de exportação
     document.getElementById('exportPdfButton')?.addEventListener('click', function(e) {
         e.preventDefault();
-        exportWithLoading(this.href, 'pdf');
+        exportFile(this.href, 'pdf');
     });
     document.getElementById('exportPdfButton_mobile')?.addEventListener('click', function(e) {
         e.preventDefault();
-        exportWithLoading(this.href, 'pdf');
+        exportFile(this.href, 'pdf');
     });
     document.getElementById('exportXlsxButton')?.addEventListener('click', function(e) {
         e.preventDefault();
-        exportWithLoading(this.href, 'xlsx');
+        exportFile(this.href, 'xlsx');
     });
     document.getElementById('exportXlsxButton_mobile')?.addEventListener('click', function(e) {
         e.preventDefault();
-        exportWithLoading(this.href, 'xlsx');
+        exportFile(this.href, 'xlsx');
+    });
+    // PDFs por campo (ZIP): somente em segundo plano
+    document.getElementById('exportZipButton')?.addEventListener('click', function(e) {
+        e.preventDefault();
+        exportWithJob(this.href, 'zip');
     });
     
     // Adicionar listener para o formulário de filtros
@@ -406,7 +413,8 @@ window.loadTransactions = function() {
     const queryString = queryParams.join('&');
     
     // Fazer requisição AJAX
-    fetch(`/transactions/api/?${queryString}&page=${currentPage}&per_page=${currentPerPage}`)
+    const cursor = currentPage === 1 ? '' : currentCursor;
+    fetch(`/transactions/api/?${queryString}&cursor=${encodeURIComponent(cursor)}&per_page=${currentPerPage}`)
         .then(response => response.json())
         .then(data => {
             if (data.error) {
@@ -430,6 +438,88 @@ window.loadTransactions = function() {
 }
 
 // Função para exportar com loading
+// Com EXPORT_JOBS ativo a exportação roda no worker (job + progresso);
+// caso contrário o arquivo é gerado na própria requisição
+function exportFile(url, type) {
+    if (document.body.dataset.exportJobs === 'true') {
+        exportWithJob(url, type);
+    } else {
+        exportWithLoading(url, type);
+    }
+}
+
+function exportWithJob(url, type) {
+    const modalEl = document.getElementById('exportLoadingModal');
+    const messageEl = document.getElementById('exportLoadingMessage');
+    const labels = { pdf: 'Exportando para PDF', xlsx: 'Exportando para XLSX', zip: 'Gerando PDFs por campo' };
+    const label = labels[type];
+    messageEl.textContent = label + '...';
+
+    const buttons = document.querySelectorAll('#exportPdfButton, #exportPdfButton_mobile, #exportXlsxButton, #exportXlsxButton_mobile, #exportZipButton');
+    buttons.forEach(btn => {
+        btn.classList.add('disabled');
+        btn.style.pointerEvents = 'none';
+    });
+
+    let modal = bootstrap.Modal.getInstance(modalEl);
+    if (!modal) {
+        modal = new bootstrap.Modal(modalEl);
+    }
+    modal.show();
+
+    const finish = () => {
+        modal.hide();
+        buttons.forEach(btn => {
+            btn.classList.remove('disabled');
+            btn.style.pointerEvents = 'auto';
+        });
+    };
+    const fail = (message) => {
+        alert(message || 'Erro ao exportar. Tente novamente.');
+        finish();
+    };
+
+    // Mesmos filtros do link de exportação
+    const query = url.split('?')[1] || '';
+    const csrfToken = document.querySelector('meta[name="csrf-token"]').content;
+
+    fetch(`/transactions/export-jobs/${type}/?${query}`, {
+        method: 'POST',
+        headers: { 'X-CSRFToken': csrfToken }
+    })
+        .then(response => response.json().then(data => ({ ok: response.ok, data })))
+        .then(({ ok, data }) => {
+            if (!ok) {
+                fail(data.error);
+                return;
+            }
+            const poll = () => {
+                fetch(data.status_url)
+                    .then(response => {
+                        if (!response.ok) throw new Error('Erro na exportação');
+                        return response.json();
+                    })
+                    .then(job => {
+                        if (job.status === 'done') {
+                            window.location = job.download_url;
+                            finish();
+                        } else if (job.status === 'failed') {
+                            fail(job.error);
+                        } else {
+                            messageEl.textContent = `${label}... ${job.progress}%`;
+                            setTimeout(poll, 1500);
+                        }
+                    })
+                    .catch(() => fail());
+            };
+            poll();
+        })
+        .catch(error => {
+            console.error('Erro ao exportar:', error);
+            fail();
+        });
+}
+
 function exportWithLoading(url, type) {
     const modalEl = document.getElementById('exportLoadingModal');
     const messageEl = document.getElementById('exportLoadingMessage');
@@ -539,6 +629,8 @@ function updateExportButton() {
     const exportPdfButtonMobile = document.getElementById('exportPdfButton_mobile');
     const exportXlsxButton = document.getElementById('exportXlsxButton');
     const exportXlsxButtonMobile = document.getElementById('exportXlsxButton_mobile');
+    const exportCsvButton = document.getElementById('exportCsvButton');
+    const exportZipButton = document.getElementById('exportZipButton');
     
     // Construir query string - arrays vazios não são incluídos
     const queryParams = [];
@@ -561,6 +653,7 @@ function updateExportButton() {
     
     const pdfExportUrl = `/transactions/export-pdf/?${queryString}`;
     const xlsxExportUrl = `/transactions/export-xlsx/?${queryString}`;
+    const csvExportUrl = `/transactions/export-csv/?${queryString}`;
     
     // Atualizar o href dos botões PDF
     if (exportPdfButton) {
@@ -579,6 +672,16 @@ function updateExportButton() {
     if (exportXlsxButtonMobile) {
         exportXlsxButtonMobile.href = xlsxExportUrl;
     }
+    
+    // Atualizar o href do botão CSV
+    if (exportCsvButton) {
+        exportCsvButton.href = csvExportUrl;
+    }
+    
+    // Atualizar o href do botão de PDFs por campo (ZIP)
+    if (exportZipButton) {
+        exportZipButton.href = `/transactions/export-jobs/zip/?report_by=field&${queryString}`;
+    }
 }
 
 // Função para atualizar contador e visibilidade da barra de bulk actions
@@ -874,17 +977,17 @@ function renderPagination(pagination) {
             </a>
         </li>
         <li class="page-item ${prevDisabled ? 'disabled' : ''}">
-            <a class="page-link" href="#" onclick="goToPage(${pagination.previous_page}); return false;" aria-label="Página anterior" ${prevDisabled ? 'tabindex="-1" aria-disabled="true"' : ''}>
+            <a class="page-link" href="#" onclick="goToCursor('${pagination.previous_cursor || ''}', ${pagination.current_page - 1}); return false;" aria-label="Página anterior" ${prevDisabled ? 'tabindex="-1" aria-disabled="true"' : ''}>
                 <i class="bi bi-chevron-left"></i>
             </a>
         </li>
         <li class="page-item ${nextDisabled ? 'disabled' : ''}">
-            <a class="page-link" href="#" onclick="goToPage(${pagination.next_page}); return false;" aria-label="Próxima página" ${nextDisabled ? 'tabindex="-1" aria-disabled="true"' : ''}>
+            <a class="page-link" href="#" onclick="goToCursor('${pagination.next_cursor || ''}', ${pagination.current_page + 1}); return false;" aria-label="Próxima página" ${nextDisabled ? 'tabindex="-1" aria-disabled="true"' : ''}>
                 <i class="bi bi-chevron-right"></i>
             </a>
         </li>
         <li class="page-item ${lastDisabled ? 'disabled' : ''}">
-            <a class="page-link" href="#" onclick="goToPage(${pagination.total_pages}); return false;" aria-label="Última página" ${lastDisabled ? 'tabindex="-1" aria-disabled="true"' : ''}>
+            <a class="page-link" href="#" onclick="goToCursor('${pagination.last_cursor || ''}', ${pagination.total_pages}); return false;" aria-label="Última página" ${lastDisabled ? 'tabindex="-1" aria-disabled="true"' : ''}>
                 <i class="bi bi-chevron-double-right"></i>
             </a>
         </li>
@@ -893,9 +996,18 @@ function renderPagination(pagination) {
     paginationList.innerHTML = paginationHTML;
 }
 
-// Função para ir para uma página específica
+// Função para ir para uma página específica (apenas a primeira não usa cursor)
 function goToPage(page) {
     currentPage = page;
+    currentCursor = '';
+    loadTransactions();
+}
+
+// Função para navegar pelos cursores retornados pela API (anterior, próxima, última)
+function goToCursor(cursor, page) {
+    if (!cursor) return goToPage(1);
+    currentPage = page;
+    currentCursor = cursor;
     loadTransactions();
 }
 